@@ -0,0 +1,180 @@
+"""
+Admin dashboard and management of trainings, topics and students.
+"""
+
+from flask import Blueprint, render_template, request, redirect, url_for
+
+from archive import archive_enabled
+from models import (db, Training, Topic, Student, Attendance, AttendanceArchive, AttendanceArchiveRollup, Progress,
+                    KnowledgeAssessment, Instructor, Certificate)
+from reference import reference
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/admin')
+def admin_dashboard():
+    trainings = reference().trainings
+    topics = reference().topics
+    students = Student.query.all()
+    instructors_count = Instructor.query.filter_by(is_active=True).count()
+    return render_template('admin_dashboard.html', 
+                         trainings=trainings, 
+                         topics=topics, 
+                         students=students,
+                         instructors_count=instructors_count)
+
+# Training Management
+@bp.route('/admin/trainings/add', methods=['GET', 'POST'])
+def admin_add_training():
+    if request.method == 'POST':
+        name = request.form.get('name')
+        description = request.form.get('description')
+        
+        # Generate slug from name
+        slug = name.lower().replace(' ', '-').replace('&', 'and')
+        # Remove special characters
+        import string
+        slug = ''.join(c for c in slug if c.isalnum() or c == '-')
+        
+        training = Training(name=name, slug=slug, description=description)
+        db.session.add(training)
+        db.session.commit()
+        
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin_training_form.html', training=None)
+
+@bp.route('/admin/trainings/<int:training_id>/edit', methods=['GET', 'POST'])
+def admin_edit_training(training_id):
+    training = Training.query.get_or_404(training_id)
+    
+    if request.method == 'POST':
+        training.name = request.form.get('name')
+        training.description = request.form.get('description')
+        
+        # Update slug from name
+        slug = training.name.lower().replace(' ', '-').replace('&', 'and')
+        import string
+        slug = ''.join(c for c in slug if c.isalnum() or c == '-')
+        training.slug = slug
+        
+        db.session.commit()
+        
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin_training_form.html', training=training)
+
+@bp.route('/admin/trainings/<int:training_id>/delete', methods=['POST'])
+def admin_delete_training(training_id):
+    training = Training.query.get_or_404(training_id)
+    db.session.delete(training)
+    db.session.commit()
+    return redirect(url_for('admin.admin_dashboard'))
+
+# Topic Management
+@bp.route('/admin/topics/add', methods=['GET', 'POST'])
+def admin_add_topic():
+    if request.method == 'POST':
+        training_id = request.form.get('training_id')
+        name = request.form.get('name')
+        phase = request.form.get('phase')
+        instructor = request.form.get('instructor')
+        video_url = request.form.get('video_url')
+        description = request.form.get('description')
+        order = request.form.get('order', 0)
+        
+        topic = Topic(
+            training_id=training_id,
+            name=name,
+            phase=phase,
+            instructor=instructor,
+            video_url=video_url,
+            description=description,
+            order=order
+        )
+        db.session.add(topic)
+        db.session.commit()
+        
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    trainings = reference().trainings
+    return render_template('admin_topic_form.html', topic=None, trainings=trainings)
+
+@bp.route('/admin/topics/<int:topic_id>/edit', methods=['GET', 'POST'])
+def admin_edit_topic(topic_id):
+    topic = Topic.query.get_or_404(topic_id)
+    
+    if request.method == 'POST':
+        topic.training_id = request.form.get('training_id')
+        topic.name = request.form.get('name')
+        topic.phase = request.form.get('phase')
+        topic.instructor = request.form.get('instructor')
+        topic.video_url = request.form.get('video_url')
+        topic.description = request.form.get('description')
+        topic.order = request.form.get('order', 0)
+        db.session.commit()
+        
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    trainings = reference().trainings
+    return render_template('admin_topic_form.html', topic=topic, trainings=trainings)
+
+def _delete_archived(**criteria):
+    """Delete archived attendance and its rollups (see archive.py)."""
+    if archive_enabled():
+        AttendanceArchive.query.filter_by(**criteria).delete()
+        AttendanceArchiveRollup.query.filter_by(**criteria).delete()
+
+@bp.route('/admin/topics/<int:topic_id>/delete', methods=['POST'])
+def admin_delete_topic(topic_id):
+    topic = Topic.query.get_or_404(topic_id)
+    
+    # Delete related records to avoid foreign key constraint errors
+    Attendance.query.filter_by(topic_id=topic_id).delete()
+    _delete_archived(topic_id=topic_id)
+    Progress.query.filter_by(topic_id=topic_id).delete()
+    
+    db.session.delete(topic)
+    db.session.commit()
+    return redirect(url_for('admin.admin_dashboard'))
+
+# Student Management
+@bp.route('/admin/students/add', methods=['GET', 'POST'])
+def admin_add_student():
+    if request.method == 'POST':
+        name = request.form.get('name')
+        
+        student = Student(name=name)
+        db.session.add(student)
+        db.session.commit()
+        
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin_student_form.html', student=None)
+
+@bp.route('/admin/students/<int:student_id>/edit', methods=['GET', 'POST'])
+def admin_edit_student(student_id):
+    student = Student.query.get_or_404(student_id)
+    
+    if request.method == 'POST':
+        student.name = request.form.get('name')
+        db.session.commit()
+        
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin_student_form.html', student=student)
+
+@bp.route('/admin/students/<int:student_id>/delete', methods=['POST'])
+def admin_delete_student(student_id):
+    student = Student.query.get_or_404(student_id)
+    
+    # Delete related records to avoid foreign key constraint errors
+    KnowledgeAssessment.query.filter_by(student_id=student_id).delete()
+    Attendance.query.filter_by(student_id=student_id).delete()
+    _delete_archived(student_id=student_id)
+    Progress.query.filter_by(student_id=student_id).delete()
+    Certificate.query.filter_by(student_id=student_id).delete()
+    
+    db.session.delete(student)
+    db.session.commit()
+    return redirect(url_for('admin.admin_dashboard'))
@@ -0,0 +1,156 @@
+"""
+Aggregated analytics endpoints.
+
+    /api/analytics/attendance-trend - present / absent / excused counts per
+                                      day, week or month
+
+Query parameters:
+    bucket       - day, week (starting Monday) or month; default week
+    training_id  - one series per phase of this training; without it, one
+                   series per training
+    phase        - only this phase ('No Phase' selects topics without one)
+    from, to     - inclusive date range (YYYY-MM-DD)
+
+Each response is one GROUP BY over attendance joined to topic, served from
+the (topic_id, date, status) index, and cached per parameter set. Archived
+attendance is included only when the range reaches it (see archive.py). The
+cache is dropped when attendance, the archive, topics or trainings change,
+in this process via a commit listener and in other processes via a
+cache_version row.
+"""
+
+from datetime import datetime
+
+from flask import request, jsonify
+from sqlalchemy import select, func
+
+from cache import LRUCache, VersionTracker, on_commit
+from archive import attendance_source
+from models import db, Training, Topic, Attendance, AttendanceArchive
+from reference import reference
+from replicas import primary_reads
+
+BUCKETS = ('day', 'week', 'month')
+STATUSES = ('Present', 'Absent', 'Excused')
+
+trend_cache = LRUCache(256, ttl=600)
+tracker = VersionTracker('attendance_trend', [Attendance, AttendanceArchive, Topic, Training])
+
+
+class AnalyticsError(ValueError):
+    """Invalid analytics parameters."""
+
+
+def _bucket_start(bucket, column):
+    """SQL expression for the first day of the bucket containing the date `column`."""
+    if db.engine.dialect.name == 'mysql':
+        if bucket == 'week':
+            return func.subdate(column, func.weekday(column))
+        if bucket == 'month':
+            return func.date_format(column, '%Y-%m-01')
+        return column
+    if bucket == 'week':
+        return func.date(column, 'weekday 0', '-6 days')
+    if bucket == 'month':
+        return func.strftime('%Y-%m-01', column)
+    return func.date(column)
+
+
+def _parse_date(values, name):
+    value = values.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise AnalyticsError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def parse_trend_params(values):
+    bucket = values.get('bucket', 'week')
+    if bucket not in BUCKETS:
+        raise AnalyticsError('bucket must be one of: ' + ', '.join(BUCKETS))
+    training_id = values.get('training_id')
+    try:
+        training_id = int(training_id) if training_id else None
+    except ValueError:
+        raise AnalyticsError('training_id must be an integer')
+    return {
+        'bucket': bucket,
+        'training_id': training_id,
+        'phase': values.get('phase') or None,
+        'date_from': _parse_date(values, 'from'),
+        'date_to': _parse_date(values, 'to'),
+    }
+
+
+def attendance_trend(bucket='week', training_id=None, phase=None, date_from=None, date_to=None):
+    """Series of {'start', 'present', 'absent', 'excused', 'total'} buckets."""
+    attendance = attendance_source(date_from, date_to, training_id)
+    start = _bucket_start(bucket, attendance.c.date).label('start')
+    group = Topic.phase if training_id else Topic.training_id
+    stmt = select(group, start, attendance.c.status, func.count()) \
+        .join(Topic, Topic.id == attendance.c.topic_id) \
+        .where(attendance.c.date.isnot(None)) \
+        .group_by(group, start, attendance.c.status) \
+        .order_by(group, start)
+    if training_id:
+        stmt = stmt.where(Topic.training_id == training_id)
+    if phase == 'No Phase':
+        stmt = stmt.where(Topic.phase.is_(None))
+    elif phase:
+        stmt = stmt.where(Topic.phase == phase)
+    if date_from:
+        stmt = stmt.where(attendance.c.date >= date_from)
+    if date_to:
+        stmt = stmt.where(attendance.c.date <= date_to)
+
+    series = {}
+    for key, bucket_start, status, count in db.session.execute(stmt):
+        buckets = series.setdefault(key, {})
+        day = str(bucket_start)[:10]
+        counts = buckets.setdefault(day, {'start': day, 'present': 0, 'absent': 0, 'excused': 0, 'total': 0})
+        if status in STATUSES:
+            counts[status.lower()] += count
+        counts['total'] += count
+
+    if training_id:
+        return [{'phase': key or 'No Phase', 'buckets': list(buckets.values())} for key, buckets in series.items()]
+    trainings = reference().training_by_id
+    return [{'training_id': key, 'training': trainings[key].name if key in trainings else None,
+             'buckets': list(buckets.values())}
+            for key, buckets in series.items()]
+
+
+def get_attendance_trend(**params):
+    if tracker.is_stale():
+        trend_cache.clear()
+        tracker.mark_loaded(tracker.read_version())
+    key = tuple(sorted(params.items()))
+    series = trend_cache.get(key)
+    if series is None:
+        # Kept until the tracked version changes: read it where the version came from
+        with primary_reads():
+            series = attendance_trend(**params)
+        trend_cache.set(key, series)
+    return series
+
+
+@on_commit
+def invalidate_trends(changes):
+    """Drop cached trends when attendance, the archive, topics or trainings change."""
+    if any(change.model is None or issubclass(change.model, tracker.models) for change in changes):
+        trend_cache.clear()
+
+
+def attendance_trend_api():
+    try:
+        params = parse_trend_params(request.args)
+    except AnalyticsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'bucket': params['bucket'], 'series': get_attendance_trend(**params)})
+
+
+def init_analytics(app):
+    """Register the /api/analytics/* endpoints."""
+    app.add_url_rule('/api/analytics/attendance-trend', 'attendance_trend_api', attendance_trend_api)
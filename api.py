@@ -0,0 +1,116 @@
+"""
+JSON data for the roster and analytics pages: the attendance recorded for a
+session, and the attendance / progress matrix of one training.
+"""
+
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select, union_all
+
+from archive import has_archived
+from models import db, Student, Attendance, AttendanceArchiveRollup, Progress
+from reference import get_training_or_404
+
+bp = Blueprint('api', __name__)
+
+@bp.route('/api/topics/<int:topic_id>/attendance')
+def topic_attendance_api(topic_id):
+    """Attendance and versions recorded for one session, used to pre-fill the roster."""
+    try:
+        date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'error': 'date must be YYYY-MM-DD'}), 400
+    records = Attendance.query.filter_by(topic_id=topic_id, date=date).all()
+    return jsonify({
+        'success': True,
+        'date': date.isoformat(),
+        'records': {r.student_id: {'status': r.status, 'version': r.version} for r in records},
+    })
+
+ATTENDANCE_COUNTERS = {'Present': 'present', 'Absent': 'absent', 'Excused': 'excused'}
+
+PROGRESS_COUNTERS = {'Completed': 'completed', 'In Progress': 'in_progress'}
+
+def training_matrix(training, student_ids, statuses, value_key, count):
+    """Per-phase and per-topic statuses of one training, with each student's totals.
+
+    `statuses` maps (student_id, topic_id) to a status; `count(stats, status)`
+    adds one topic to a student's counters (creating them when stats is None).
+    """
+    training_stats = {
+        'name': training.name,
+        'id': training.id,
+        'phases': {},
+        'total_topics': len(training.topics),
+        'students': {}
+    }
+    for topic in training.topics:
+        phase = training_stats['phases'].setdefault(topic.phase or 'No Phase', {'topics': [], 'students': {}})
+        topic_statuses = {}
+        for student_id in student_ids:
+            status = statuses(student_id, topic.id)
+            topic_statuses[student_id] = status
+            phase['students'][student_id] = count(phase['students'].get(student_id), status)
+            training_stats['students'][student_id] = count(training_stats['students'].get(student_id), status)
+        phase['topics'].append({'id': topic.id, 'name': topic.name, value_key: topic_statuses})
+    return training_stats
+
+def count_attendance(stats, status):
+    stats = stats or {'present': 0, 'absent': 0, 'excused': 0, 'total': 0, 'percentage': 0}
+    stats['total'] += 1
+    if status in ATTENDANCE_COUNTERS:
+        stats[ATTENDANCE_COUNTERS[status]] += 1
+    stats['percentage'] = int((stats['present'] / stats['total']) * 100)
+    return stats
+
+def count_progress(stats, status):
+    stats = stats or {'completed': 0, 'in_progress': 0, 'not_started': 0, 'total': 0}
+    stats['total'] += 1
+    stats[PROGRESS_COUNTERS.get(status, 'not_started')] += 1
+    return stats
+
+def attendance_matrix(training, student_ids):
+    """Attendance matrix of one training: the most recent record per student and topic.
+
+    Archived attendance takes part through its rollup, whose latest record is
+    ordered among the attendance table's by (date, id).
+    """
+    latest = {}
+    topic_ids = [t.id for t in training.topics]
+    if topic_ids:
+        stmt = select(Attendance.student_id, Attendance.topic_id, Attendance.status, Attendance.date,
+                      Attendance.id).where(Attendance.topic_id.in_(topic_ids))
+        if has_archived(training.id):
+            stmt = union_all(stmt, select(
+                AttendanceArchiveRollup.student_id, AttendanceArchiveRollup.topic_id, AttendanceArchiveRollup.last_status,
+                AttendanceArchiveRollup.last_date, AttendanceArchiveRollup.last_id
+            ).where(AttendanceArchiveRollup.topic_id.in_(topic_ids)))
+        rows = db.session.execute(stmt.order_by(stmt.selected_columns.date, stmt.selected_columns.id))
+        for student_id, topic_id, status, _, _ in rows:
+            latest[(student_id, topic_id)] = status  # later dates overwrite earlier ones
+    return training_matrix(training, student_ids, lambda sid, tid: latest.get((sid, tid)),
+                           'attendance', count_attendance)
+
+def progress_matrix(training, student_ids):
+    """Progress matrix of one training; topics without a record are 'Not Started'."""
+    statuses = {}
+    topic_ids = [t.id for t in training.topics]
+    if topic_ids:
+        rows = db.session.query(Progress.student_id, Progress.topic_id, Progress.status).filter(
+            Progress.topic_id.in_(topic_ids)
+        ).order_by(Progress.id)
+        for student_id, topic_id, status in rows:
+            statuses.setdefault((student_id, topic_id), status)
+    return training_matrix(training, student_ids, lambda sid, tid: statuses.get((sid, tid), 'Not Started'),
+                           'progress', count_progress)
+
+@bp.route('/api/attendance/training/<int:training_id>')
+def training_attendance_api(training_id):
+    training = get_training_or_404(training_id)
+    return jsonify(attendance_matrix(training, [sid for sid, in db.session.query(Student.id)]))
+
+@bp.route('/api/progress/training/<int:training_id>')
+def training_progress_api(training_id):
+    training = get_training_or_404(training_id)
+    return jsonify(progress_matrix(training, [sid for sid, in db.session.query(Student.id)]))
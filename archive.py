@@ -0,0 +1,319 @@
+"""
+Attendance archive.
+
+The attendance table only grows, and the pages used every day (the roster,
+the attendance matrix, readiness, student profiles) read it by topic or in
+full. Sessions nobody edits any more can be moved out of it:
+
+    flask --app app archive-attendance                 # older than ATTENDANCE_ARCHIVE_DAYS
+    flask --app app archive-attendance --days 365
+    flask --app app archive-attendance --training 3    # every session of a finished training
+
+(also available as the archive_attendance job). Archived rows go to
+attendance_archive, and their counts per student and topic are folded into
+attendance_archive_rollup together with the latest archived record:
+
+- All-time figures (the attendance matrix, readiness, student profiles) read
+  the attendance table plus the rollup, one row per student and topic, and
+  never the archive itself.
+- Queries over a date range (the attendance trend, exports) read from
+  attendance_source(), which is the attendance table alone unless the range
+  and training overlap the archived dates, and hot UNION ALL archive
+  otherwise. The archived date range of each training is cached and dropped
+  whenever the archive or topics change.
+- The roster reads the attendance table only: archived sessions are history,
+  so choose a horizon past the point where corrections still come in.
+- Archived sessions are read-only. Attendance of a training dated on or before
+  its last archived date is refused by the roster forms, /api/sync and the
+  bulk loader (check_not_archived()): the record may already be in the
+  archive, and a second copy in the attendance table would be counted twice.
+
+Moving a row is not a change to it: the DELETE from the attendance table is
+not logged in the change history, so as-of reports (history.py) are
+unaffected. Each batch of rows is one transaction that checks the row
+versions it read, so a batch racing a live edit is retried, and an
+interrupted run leaves every row in exactly one table and can be run again.
+
+Until migrate_add_attendance_archive.py has created the tables, nothing can
+be archived and every report reads the attendance table alone.
+
+Configuration (app.config):
+    ATTENDANCE_ARCHIVE_DAYS  - default horizon of the command, in days
+"""
+
+import time
+from datetime import date, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import select, insert, update, delete, func, or_, union_all, inspect, bindparam
+from sqlalchemy.exc import IntegrityError
+
+from cache import LRUCache, VersionTracker, on_commit
+from models import db, Topic, Attendance, AttendanceArchive, AttendanceArchiveRollup, utcnow
+from reference import reference
+from replicas import primary_reads
+
+ARCHIVE_BATCH_SIZE = 1000
+MAX_ATTEMPTS = 3
+COUNTERS = {'Present': 'present', 'Absent': 'absent', 'Excused': 'excused'}
+ARCHIVED_COLUMNS = ('student_id', 'topic_id', 'date', 'status', 'updated_at', 'version')
+SOURCE_COLUMNS = ('student_id', 'topic_id', 'date', 'status')
+
+bounds_cache = LRUCache(1, ttl=600)
+tracker = VersionTracker('attendance_archive', [AttendanceArchive, Topic])
+
+
+class ArchiveError(ValueError):
+    """Attendance cannot be archived as requested."""
+
+
+def _archive_enabled(connection):
+    """True when this connection's database has the archive tables."""
+    enabled = connection.info.get('attendance_archive_enabled')
+    if enabled is None:
+        enabled = inspect(connection).has_table(AttendanceArchive.__tablename__)
+        connection.info['attendance_archive_enabled'] = enabled
+    return enabled
+
+
+def archive_enabled():
+    """True when the database has the archive tables."""
+    return _archive_enabled(db.session.connection())
+
+
+# ============================================
+# Reading
+# ============================================
+
+def load_bounds():
+    """{training_id: (first date, last date)} of the archived attendance."""
+    if not archive_enabled():
+        return {}
+    rows = db.session.execute(
+        select(Topic.training_id, func.min(AttendanceArchive.date), func.max(AttendanceArchive.date))
+        .join(Topic, Topic.id == AttendanceArchive.topic_id)
+        .group_by(Topic.training_id))
+    return {training_id: (first, last) for training_id, first, last in rows}
+
+
+def archive_bounds():
+    if tracker.is_stale():
+        bounds_cache.clear()
+        tracker.mark_loaded(tracker.read_version())
+    bounds = bounds_cache.get('bounds')
+    if bounds is None:
+        with primary_reads():  # the version the cache is checked against is the primary's
+            bounds = load_bounds()
+        bounds_cache.set('bounds', bounds)
+    return bounds
+
+
+@on_commit
+def invalidate_bounds(changes):
+    """Drop the archived date ranges when the archive or topics change."""
+    if any(change.model is None or issubclass(change.model, tracker.models) for change in changes):
+        bounds_cache.clear()
+
+
+def has_archived(training_id=None):
+    """True when some attendance (of this training) has been archived."""
+    bounds = archive_bounds()
+    return training_id in bounds if training_id else bool(bounds)
+
+
+def archive_overlaps(date_from=None, date_to=None, training_id=None):
+    """True when archived attendance (of this training) can fall in the date range."""
+    bounds = archive_bounds()
+    if training_id:
+        bounds = {training_id: bounds[training_id]} if training_id in bounds else {}
+    if not bounds or (date_from is None and date_to is None):
+        return bool(bounds)
+    return any(first is not None and (date_from is None or date_from <= last) and (date_to is None or date_to >= first)
+               for first, last in bounds.values())
+
+
+def check_not_archived(topic_id, record_date):
+    """Raise ArchiveError if attendance of this topic on this date falls in the archived range."""
+    topic = reference().topic_by_id.get(topic_id)
+    bounds = archive_bounds().get(topic.training_id) if topic else None
+    if bounds and bounds[1] is not None and record_date is not None and record_date <= bounds[1]:
+        raise ArchiveError(f'Attendance up to {bounds[1].isoformat()} of this training is archived '
+                           'and cannot be changed')
+
+
+def attendance_source(date_from=None, date_to=None, training_id=None):
+    """The attendance rows a date range query needs.
+
+    A table-like selectable with the columns id, student_id, topic_id, date
+    and status: the attendance table itself, or attendance UNION ALL
+    attendance_archive when archived rows can fall in the range. Archived
+    rows keep the id they had in attendance.
+    """
+    hot = Attendance.__table__
+    if not archive_overlaps(date_from, date_to, training_id):
+        return hot
+    archived = AttendanceArchive.__table__
+    return union_all(
+        select(hot.c.id, *(hot.c[name] for name in SOURCE_COLUMNS)),
+        select(archived.c.attendance_id.label('id'), *(archived.c[name] for name in SOURCE_COLUMNS)),
+    ).subquery('attendance')
+
+
+# ============================================
+# Archiving
+# ============================================
+
+def _condition(before, training_ids):
+    criteria = []
+    if before is not None:
+        criteria.append(Attendance.date < before)
+    if training_ids:
+        criteria.append(Attendance.topic_id.in_(select(Topic.id).where(Topic.training_id.in_(training_ids))))
+    if not criteria:
+        raise ArchiveError('Give a horizon date or at least one training to archive')
+    return or_(*criteria)
+
+
+def _latest_order(record_date, record_id):
+    """Sort key of ORDER BY date, id (NULL dates first, as SQLite and MySQL sort them)."""
+    return record_date is not None, record_date or date.min, record_id
+
+
+def _fold(rows):
+    """Add a batch of archived rows to the rollups of their student and topic."""
+    batch = {}
+    for row in rows:
+        key = (row['student_id'], row['topic_id'])
+        rollup = batch.setdefault(key, {'student_id': key[0], 'topic_id': key[1], 'present': 0, 'absent': 0,
+                                        'excused': 0, 'total': 0, 'last_id': row['id'], 'last_date': row['date'],
+                                        'last_status': row['status']})
+        rollup['total'] += 1
+        if row['status'] in COUNTERS:
+            rollup[COUNTERS[row['status']]] += 1
+        if _latest_order(row['date'], row['id']) > _latest_order(rollup['last_date'], rollup['last_id']):
+            rollup.update(last_id=row['id'], last_date=row['date'], last_status=row['status'])
+
+    rollups = AttendanceArchiveRollup.__table__
+    existing = {
+        (row.student_id, row.topic_id): row
+        for row in db.session.execute(select(rollups).where(
+            rollups.c.student_id.in_({student_id for student_id, _ in batch}),
+            rollups.c.topic_id.in_({topic_id for _, topic_id in batch})))
+    }
+    changed = []
+    for key, rollup in batch.items():
+        current = existing.get(key)
+        if current is None:
+            continue
+        for counter in ('present', 'absent', 'excused', 'total'):
+            rollup[counter] += getattr(current, counter)
+        if _latest_order(current.last_date, current.last_id) > _latest_order(rollup['last_date'], rollup['last_id']):
+            rollup.update(last_id=current.last_id, last_date=current.last_date, last_status=current.last_status)
+        changed.append(rollup)
+    added = [rollup for key, rollup in batch.items() if key not in existing]
+    if added:
+        db.session.execute(insert(AttendanceArchiveRollup), added)
+    if changed:
+        db.session.execute(update(AttendanceArchiveRollup), changed)
+
+
+def _archive_batch(condition, batch_size):
+    """Move up to batch_size rows in one transaction; returns how many moved."""
+    hot = Attendance.__table__
+    rows = db.session.execute(
+        select(hot.c.id, *(hot.c[name] for name in ARCHIVED_COLUMNS)).where(condition)
+        .order_by(hot.c.id).limit(batch_size)
+    ).mappings().all()
+    if not rows:
+        return 0
+
+    archived_at = utcnow()
+    db.session.execute(insert(AttendanceArchive), [
+        dict({name: row[name] for name in ARCHIVED_COLUMNS}, attendance_id=row['id'], archived_at=archived_at)
+        for row in rows
+    ])
+    _fold(rows)
+    # A Core DELETE on the table, not on the model: the rows move rather than
+    # disappear, so the change history must not record them as deleted
+    result = db.session.execute(
+        delete(hot).where(hot.c.id == bindparam('row_id'), hot.c.version == bindparam('row_version')),
+        [{'row_id': row['id'], 'row_version': row['version']} for row in rows])
+    if result.rowcount != len(rows):
+        raise ArchiveError('Attendance changed while it was being archived')
+    db.session.commit()
+    return len(rows)
+
+
+def archive_attendance(before=None, training_ids=(), batch_size=ARCHIVE_BATCH_SIZE, report=None):
+    """Move attendance dated before `before`, or of `training_ids`, to the archive.
+
+    Returns the number of rows moved; report(moved) is called after each
+    batch. A batch that races a live edit is retried up to MAX_ATTEMPTS times.
+    """
+    if not archive_enabled():
+        raise ArchiveError('The archive tables do not exist: run migrate_add_attendance_archive.py')
+    condition = _condition(before, training_ids)
+    moved = 0
+    while True:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                count = _archive_batch(condition, batch_size)
+                break
+            except (ArchiveError, IntegrityError):
+                db.session.rollback()
+                if attempt == MAX_ATTEMPTS:
+                    raise ArchiveError(f'Gave up after {MAX_ATTEMPTS} attempts: attendance keeps changing '
+                                       'while it is being archived')
+        if not count:
+            return moved
+        moved += count
+        if report:
+            report(moved)
+
+
+def count_archivable(before=None, training_ids=()):
+    """How many attendance rows archive_attendance() would move."""
+    return db.session.execute(select(func.count()).select_from(Attendance).where(_condition(before, training_ids))).scalar()
+
+
+def horizon(days):
+    """First date that stays in the attendance table when archiving `days` back."""
+    return date.today() - timedelta(days=days)
+
+
+def init_archive(app):
+    """Register the `flask archive-attendance` command."""
+
+    @app.cli.command('archive-attendance')
+    @click.option('--days', type=click.IntRange(0),
+                  help='Archive sessions older than this many days [default: ATTENDANCE_ARCHIVE_DAYS, '
+                       'or none when --training is given].')
+    @click.option('--training', 'training_ids', type=int, multiple=True,
+                  help='Archive every session of this training (repeatable).')
+    @click.option('--batch-size', default=ARCHIVE_BATCH_SIZE, show_default=True, type=click.IntRange(1),
+                  help='Rows per transaction.')
+    @click.option('--dry-run', is_flag=True, help='Only count the rows that would move.')
+    def archive_attendance_command(days, training_ids, batch_size, dry_run):
+        """Move old attendance out of the attendance table."""
+        if days is None and not training_ids:
+            days = current_app.config['ATTENDANCE_ARCHIVE_DAYS']
+        before = horizon(days) if days is not None else None
+
+        click.echo("=" * 60)
+        click.echo("Archive Attendance")
+        click.echo("=" * 60)
+        if before:
+            click.echo(f"Sessions before {before.isoformat()}")
+        if training_ids:
+            click.echo("Every session of training " + ', '.join(str(training_id) for training_id in training_ids))
+        try:
+            if dry_run:
+                click.echo(f"✓ {count_archivable(before, training_ids):,} rows would be archived")
+                return
+            started = time.perf_counter()
+            moved = archive_attendance(before, training_ids, batch_size,
+                                       lambda moved: click.echo(f"  {moved:>10,} rows", err=True))
+        except ArchiveError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"✓ {moved:,} rows archived in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,84 @@
+"""
+Fingerprinted static assets.
+
+`build_assets.py` writes content-hashed copies of the CSS bundles (plus
+pre-compressed .gz/.br variants) to statics/dist/ together with a
+manifest.json. This module resolves logical asset names through that manifest
+and serves the hashed files with far-future cache headers.
+
+When no manifest has been built (local development), `asset_url` falls back
+to the plain `static` URL so pages keep working without a build step.
+"""
+
+import json
+import os
+
+from flask import request, send_from_directory, url_for, abort
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+DIST_DIR = os.path.join(basedir, 'statics', 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Hashed filenames never change content, so browsers may cache them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Pre-compressed variants in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+_manifest = None
+
+
+def load_manifest():
+    """Load (and memoize) the logical name -> fingerprinted name mapping."""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH) as f:
+                _manifest = json.load(f)
+        except FileNotFoundError:
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(filename):
+    """url_for-style helper: resolve a logical asset path to its fingerprinted URL."""
+    fingerprinted = load_manifest().get(filename)
+    if fingerprinted:
+        return url_for('serve_asset', filename=fingerprinted)
+    return url_for('static', filename=filename)
+
+
+def serve_asset(filename):
+    """Serve a fingerprinted asset, preferring a pre-compressed variant the client accepts."""
+    if filename not in load_manifest().values():
+        abort(404)
+
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            response = send_from_directory(DIST_DIR, filename + suffix, mimetype=_mimetype(filename))
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Disposition', None)
+            break
+    else:
+        response = send_from_directory(DIST_DIR, filename)
+
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _mimetype(filename):
+    if filename.endswith('.css'):
+        return 'text/css'
+    if filename.endswith('.js'):
+        return 'application/javascript'
+    if filename.endswith('.svg'):
+        return 'image/svg+xml'
+    return None
+
+
+def init_assets(app):
+    """Register the /assets route and the asset_url template helper."""
+    app.add_url_rule('/assets/<path:filename>', 'serve_asset', serve_asset)
+    app.add_template_global(asset_url)
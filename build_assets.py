@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Static asset build step.
+
+1. Extracts inline <style> blocks from templates/ into stylesheets under
+   statics/css/pages/ and replaces them with asset_url() links, so the CSS is
+   downloaded once and cached instead of being sent with every page.
+   Templates that were already extracted are left untouched.
+2. Writes content-hashed copies of every stylesheet to statics/dist/,
+   pre-compressed with gzip (and brotli when the `brotli` package is
+   installed), plus the manifest.json that assets.asset_url() reads.
+
+Usage:
+    python build_assets.py [--no-extract]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import textwrap
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from assets import DIST_DIR, MANIFEST_PATH
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+TEMPLATES_DIR = os.path.join(basedir, 'templates')
+STATIC_DIR = os.path.join(basedir, 'statics')
+PAGES_CSS_DIR = os.path.join(STATIC_DIR, 'css', 'pages')
+
+# File types that are fingerprinted and copied to statics/dist/
+FINGERPRINTED_EXTENSIONS = ('.css', '.js', '.svg')
+
+STYLE_RE = re.compile(r'[ \t]*<style>\n(.*?)[ \t]*</style>\n', re.DOTALL)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Extract template CSS and build fingerprinted static assets')
+    parser.add_argument('--no-extract', action='store_true', help='Only fingerprint, do not touch templates')
+    return parser.parse_args()
+
+
+def link_tag(filename):
+    return f'<link rel="stylesheet" href="{{{{ asset_url(\'{filename}\') }}}}">'
+
+
+def extract_template_styles():
+    """Move inline <style> blocks out of the templates. Returns the number of templates changed."""
+    os.makedirs(PAGES_CSS_DIR, exist_ok=True)
+    changed = 0
+
+    for template in sorted(os.listdir(TEMPLATES_DIR)):
+        if not template.endswith('.html'):
+            continue
+        path = os.path.join(TEMPLATES_DIR, template)
+        with open(path) as f:
+            source = f.read()
+
+        match = STYLE_RE.search(source)
+        if not match:
+            continue
+        css = match.group(1)
+        if '{{' in css or '{%' in css:
+            print(f"  ⚠️  {template}: <style> contains Jinja expressions, left inline")
+            continue
+
+        css_name = f"css/pages/{template[:-len('.html')]}.css"
+        with open(os.path.join(STATIC_DIR, css_name), 'w') as f:
+            f.write(textwrap.dedent(css))
+
+        if template == 'base.html':
+            # The layout links its own stylesheet and offers a block for page stylesheets
+            indent = re.match(r'[ \t]*', match.group(0)).group(0)
+            replacement = f"{indent}{link_tag(css_name)}\n{indent}{{% block styles %}}{{% endblock %}}\n"
+            source = source[:match.start()] + replacement + source[match.end():]
+        else:
+            source = source[:match.start()] + source[match.end():]
+            styles_block = f"{{% block styles %}}\n{link_tag(css_name)}\n{{% endblock %}}\n\n"
+            source = source.replace('{% block content %}', styles_block + '{% block content %}', 1)
+
+        with open(path, 'w') as f:
+            f.write(source)
+        print(f"  ✓ {template} → statics/{css_name}")
+        changed += 1
+
+    return changed
+
+
+def iter_static_sources():
+    """Yield logical names (relative to statics/) of the files to fingerprint."""
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if os.path.abspath(root).startswith(DIST_DIR):
+            dirs[:] = []
+            continue
+        for name in sorted(files):
+            if name.endswith(FINGERPRINTED_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, '/')
+
+
+def fingerprint_assets():
+    """Write hashed + pre-compressed copies to statics/dist/ and the manifest."""
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    raw_total = gzip_total = brotli_total = 0
+
+    for logical in iter_static_sources():
+        with open(os.path.join(STATIC_DIR, logical), 'rb') as f:
+            content = f.read()
+
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(logical)
+        fingerprinted = f"{stem}.{digest}{ext}"
+        target = os.path.join(DIST_DIR, fingerprinted)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        with open(target, 'wb') as f:
+            f.write(content)
+        gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+        with open(target + '.gz', 'wb') as f:
+            f.write(gzipped)
+        raw_total += len(content)
+        gzip_total += len(gzipped)
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            with open(target + '.br', 'wb') as f:
+                f.write(compressed)
+            brotli_total += len(compressed)
+
+        manifest[logical] = fingerprinted
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"  ✓ {len(manifest)} assets fingerprinted into statics/dist/")
+    print(f"    raw {raw_total:,} bytes, gzip {gzip_total:,} bytes", end='')
+    print(f", brotli {brotli_total:,} bytes" if brotli is not None else " (brotli not installed)")
+    return manifest
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("Building static assets")
+    print("=" * 60)
+
+    if not args.no_extract:
+        print("\nExtracting inline template styles...")
+        changed = extract_template_styles()
+        if not changed:
+            print("  ✓ No inline styles left to extract")
+
+    print("\nFingerprinting assets...")
+    fingerprint_assets()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Create and populate the full-text search index used by /api/search.
+
+- SQLite: creates the `search_index` FTS5 table and fills it from the
+  trainings, topics, students and instructors tables
+- MySQL: adds FULLTEXT indexes to those tables (MySQL keeps them current)
+
+After this, ORM writes keep the SQLite index in sync automatically. Re-run
+it after importing data with raw SQL.
+
+Usage:
+    python build_search_index.py
+"""
+
+import time
+
+from config import create_db_app
+from search import create_search_index, rebuild_search_index
+
+app = create_db_app()
+
+
+def build_search_index():
+    """Create the search index and (re)populate it"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Full-Text Search Index")
+        print("=" * 60)
+        print()
+
+        created = create_search_index()
+        print(f"✓ {created} ready")
+
+        started = time.perf_counter()
+        counts = rebuild_search_index()
+        for kind, count in counts.items():
+            print(f"  ✓ Indexed {count} {kind}(s)")
+        if counts:
+            print(f"✓ Rebuilt in {time.perf_counter() - started:.2f}s")
+        print()
+        print("✅ Search index is up to date")
+
+
+if __name__ == '__main__':
+    build_search_index()
@@ -0,0 +1,367 @@
+"""
+Bulk loader for historical attendance and progress.
+
+    flask --app app bulk-load attendance attendance.csv
+    flask --app app bulk-load progress progress.csv --create-students
+
+The file is a CSV with a header row (column names are case-insensitive,
+unknown columns are ignored):
+
+- student or student_id: the student's name or id
+- topic or topic_id: the topic's name or id
+- training (optional): training name or id, needed when topics in
+  different trainings share a name
+- date (attendance only): YYYY-MM-DD, or see --date-format
+- status: one of the statuses the roster accepts (case-insensitive)
+
+The file is read as a stream and handled CHUNK_SIZE rows at a time, so
+memory stays flat however long it is:
+
+- Names are resolved through lookups loaded once (students) or taken from
+  the reference snapshot (topics, trainings).
+- Rows that cannot be loaded go to a rejects file (FILE.rejects.csv by
+  default) with their line number and the reason; fix them and load that
+  file again. Attendance dated inside a training's archived range is
+  rejected too (see archive.py): it may already be in the archive.
+- Each chunk is one transaction. Existing roster entries are read with one
+  query per chunk, then new ones go out in a single executemany INSERT and
+  changed ones in a bulk UPDATE by id. The roster has no unique key (see
+  sync.py), so this replaces a native upsert; when a file repeats an entry,
+  the last row wins.
+- The UPDATE checks row versions, so a chunk that races a live edit is
+  retried against fresh data.
+
+Bulk statements bypass the ORM flush, so the loader logs the change history
+itself; caches and live pages treat each chunk as a bulk change.
+"""
+
+import csv
+import functools
+import itertools
+import os
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+
+import click
+from sqlalchemy import select, insert, update, and_, or_, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from archive import ArchiveError, check_not_archived
+from history import log_bulk_writes
+from models import db, Student
+from reference import reference
+from sync import ENTITIES
+
+CHUNK_SIZE = 5000
+QUERY_CHUNK = 200  # keys per lookup query (SQLite limits expression depth)
+MAX_ATTEMPTS = 3
+PROGRESS_INTERVAL_SECONDS = 2.0
+DEFAULT_DATE_FORMAT = '%Y-%m-%d'
+
+LoadResult = namedtuple('LoadResult', ['counts', 'seconds', 'rejects_path'])
+
+
+class BulkLoadError(ValueError):
+    """A row (or the whole file) that cannot be loaded."""
+
+
+def _norm(value):
+    return ' '.join(value.split()).casefold()
+
+
+def _chunks(values, size):
+    iterator = iter(values)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Lookups:
+    """Name -> id lookups for students, topics and trainings."""
+
+    def __init__(self, create_students=False):
+        self.create_students = create_students
+        self.student_ids = set()
+        self.students = {}
+        for student_id, name in db.session.execute(select(Student.id, Student.name)):
+            self._add_student(student_id, name)
+
+        ref = reference()
+        self.trainings = {}
+        for training in ref.trainings:
+            self.trainings[str(training.id)] = training.id
+            self.trainings.setdefault(_norm(training.name), training.id)
+        self.topic_ids = set(ref.topic_by_id)
+        self.topics = {}  # name -> [TopicRef]
+        for topic in ref.topics:
+            self.topics.setdefault(_norm(topic.name), []).append(topic)
+
+    def _add_student(self, student_id, name):
+        self.student_ids.add(student_id)
+        key = _norm(name or '')
+        # None marks a name shared by several students
+        self.students[key] = None if key in self.students else student_id
+
+    def student(self, value, by_id):
+        """Student id, or (with create_students) the name of a student to create."""
+        if by_id:
+            if not value.isdigit() or int(value) not in self.student_ids:
+                raise BulkLoadError(f'Unknown student id {value!r}')
+            return int(value)
+        key = _norm(value)
+        if not key:
+            raise BulkLoadError('Student is required')
+        if key not in self.students:
+            if self.create_students:
+                return value.strip()
+            raise BulkLoadError(f'Unknown student {value!r} (use --create-students to add new ones)')
+        if self.students[key] is None:
+            raise BulkLoadError(f'Several students are named {value!r}; use student_id')
+        return self.students[key]
+
+    def topic(self, value, by_id, training):
+        if by_id:
+            if not value.isdigit() or int(value) not in self.topic_ids:
+                raise BulkLoadError(f'Unknown topic id {value!r}')
+            return int(value)
+        training_id = None
+        if training:
+            training_id = self.trainings.get(training.strip()) or self.trainings.get(_norm(training))
+            if training_id is None:
+                raise BulkLoadError(f'Unknown training {training!r}')
+        matches = [t.id for t in self.topics.get(_norm(value), ())
+                   if training_id is None or t.training_id == training_id]
+        if not matches:
+            raise BulkLoadError(f'Unknown topic {value!r}' + (f' in training {training!r}' if training else ''))
+        if len(matches) > 1:
+            raise BulkLoadError(f'Topic {value!r} exists in several trainings; add a training column')
+        return matches[0]
+
+    def create(self, names):
+        """Add the named students in one transaction; returns {name: id}."""
+        students = [Student(name=name) for name in names]
+        db.session.add_all(students)
+        db.session.commit()
+        for student in students:
+            self._add_student(student.id, student.name)
+        return {student.name: student.id for student in students}
+
+
+class Columns:
+    """Positions of the known columns in the header."""
+
+    def __init__(self, header, entity):
+        positions = {_norm(name): i for i, name in enumerate(header)}
+        self.student_by_id = 'student' not in positions and 'student_id' in positions
+        self.topic_by_id = 'topic' not in positions and 'topic_id' in positions
+        self.student = positions.get('student_id' if self.student_by_id else 'student')
+        self.topic = positions.get('topic_id' if self.topic_by_id else 'topic')
+        self.training = positions.get('training')
+        self.date = positions.get('date')
+        self.status = positions.get('status')
+        missing = [name for name, position in (('student', self.student), ('topic', self.topic),
+                                               ('status', self.status)) if position is None]
+        if 'date' in entity.keys and self.date is None:
+            missing.append('date')
+        if missing:
+            raise BulkLoadError('Missing column(s): ' + ', '.join(missing))
+
+
+def parse_row(fields, columns, entity, statuses, lookups, date_format):
+    """Roster values for one CSV row; student_id may still be a name to create."""
+    def field(position):
+        return fields[position].strip() if position is not None and position < len(fields) else ''
+
+    status = statuses.get(_norm(field(columns.status)))
+    if status is None:
+        raise BulkLoadError('Status must be one of: ' + ', '.join(entity.statuses))
+    row = {
+        'student_id': lookups.student(field(columns.student), columns.student_by_id),
+        'topic_id': lookups.topic(field(columns.topic), columns.topic_by_id, field(columns.training)),
+        'status': status,
+    }
+    if 'date' in entity.keys:
+        try:
+            row['date'] = datetime.strptime(field(columns.date), date_format).date()
+        except ValueError:
+            raise BulkLoadError(f'Date must match {date_format}')
+    return row
+
+
+@functools.lru_cache(maxsize=16)
+def _lookup_statement(name, size):
+    """SELECT of the roster entries matching `size` keys, bound as k<i>_<column>.
+
+    An OR of equalities rather than a row-value IN, which SQLite cannot
+    answer from an index. Built once per size so it is compiled once.
+    """
+    entity = ENTITIES[name]
+    model = entity.model
+    key_columns = [getattr(model, column) for column in entity.keys]
+    return select(model.id, model.status, model.version, *key_columns).where(or_(*(
+        and_(*(column == bindparam(f'k{i}_{column.key}') for column in key_columns)) for i in range(size)
+    ))).order_by(model.id)
+
+
+def _existing(name, keys):
+    """{key: (id, status, version)} for the roster entries with these keys, oldest row first."""
+    columns = ENTITIES[name].keys
+    found = {}
+    for part in _chunks(keys, QUERY_CHUNK):
+        params = {f'k{i}_{column}': value for i, key in enumerate(part) for column, value in zip(columns, key)}
+        for row in db.session.execute(_lookup_statement(name, len(part)), params):
+            found.setdefault(tuple(row[3:]), row[:3])  # the roster has no unique key; use the oldest row
+    return found
+
+
+def write_chunk(name, rows):
+    """Insert or update one chunk's rows in a single transaction; returns its counts."""
+    entity = ENTITIES[name]
+    latest = {}
+    for row in rows:
+        latest[tuple(row[k] for k in entity.keys)] = row  # last row in the file wins
+    counts = Counter(superseded=len(rows) - len(latest))
+
+    for attempt in range(MAX_ATTEMPTS):
+        existing = _existing(name, latest)
+        inserts, updates, changed = [], [], []
+        for key, row in latest.items():
+            current = existing.get(key)
+            if current is None:
+                inserts.append(row)
+            elif current[1] != row['status']:
+                # `version` is the expected one; the ORM increments it
+                updates.append({'id': current[0], 'status': row['status'], 'version': current[2]})
+            else:
+                continue
+            changed.append(row)
+        try:
+            if inserts:
+                db.session.execute(insert(entity.model), inserts)
+            if updates:
+                db.session.execute(update(entity.model), updates)
+            log_bulk_writes(db.session, name, changed)
+            db.session.commit()
+        except (StaleDataError, IntegrityError):
+            # Someone edited the roster meanwhile; start the chunk over with fresh data
+            db.session.rollback()
+            continue
+        counts.update(inserted=len(inserts), updated=len(updates),
+                      unchanged=len(latest) - len(inserts) - len(updates))
+        return counts
+    raise click.ClickException('The roster is busy; the load stopped part way (finished chunks are kept)')
+
+
+class Rejects:
+    """Rejected rows, written to a CSV next to the input as they come."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+        self.file = None
+        self.writer = None
+        self.count = 0
+
+    def add(self, line, fields, error):
+        if self.writer is None:
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(['line'] + self.header + ['error'])
+        self.writer.writerow([line] + fields + [error])
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def bulk_load(name, path, rejects_path=None, chunk_size=CHUNK_SIZE, create_students=False,
+              date_format=DEFAULT_DATE_FORMAT, report=None):
+    """Load a CSV file into the roster. `report(counts, seconds)` is called as it goes."""
+    entity = ENTITIES[name]
+    statuses = {_norm(status): status for status in entity.statuses}
+    lookups = Lookups(create_students)
+    counts = Counter()
+    started = last_report = time.perf_counter()
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise BulkLoadError('The file is empty')
+        columns = Columns(header, entity)
+        rejects = Rejects(rejects_path or os.path.splitext(path)[0] + '.rejects.csv', header)
+        try:
+            for chunk in _chunks(((reader.line_num, fields) for fields in reader if fields), chunk_size):
+                rows, new_students = [], {}
+                for line, fields in chunk:
+                    try:
+                        row = parse_row(fields, columns, entity, statuses, lookups, date_format)
+                        if 'date' in entity.keys:
+                            check_not_archived(row['topic_id'], row['date'])
+                    except (BulkLoadError, ArchiveError) as e:
+                        rejects.add(line, fields, str(e))
+                        continue
+                    if isinstance(row['student_id'], str):
+                        new_students.setdefault(_norm(row['student_id']), row['student_id'])
+                    rows.append(row)
+                if new_students:
+                    created = lookups.create(new_students.values())
+                    counts['students_created'] += len(created)
+                    for row in rows:
+                        if isinstance(row['student_id'], str):
+                            row['student_id'] = created[new_students[_norm(row['student_id'])]]
+                if rows:
+                    counts.update(write_chunk(name, rows))
+                counts['read'] += len(chunk)
+                counts['rejected'] = rejects.count
+                if report and time.perf_counter() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                    last_report = time.perf_counter()
+                    report(counts, last_report - started)
+        finally:
+            rejects.close()
+    counts['rejected'] = rejects.count
+    return LoadResult(counts, time.perf_counter() - started, rejects.path if rejects.count else None)
+
+
+def init_bulk_load(app):
+    """Register the `flask bulk-load` command."""
+
+    @app.cli.command('bulk-load')
+    @click.argument('entity', type=click.Choice(sorted(ENTITIES)))
+    @click.argument('file', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--rejects', 'rejects_path', type=click.Path(dir_okay=False),
+                  help='Where to write rejected rows [default: FILE.rejects.csv].')
+    @click.option('--chunk-size', default=CHUNK_SIZE, show_default=True, type=click.IntRange(1),
+                  help='Rows per transaction.')
+    @click.option('--create-students', is_flag=True, help='Add students that do not exist yet.')
+    @click.option('--date-format', default=DEFAULT_DATE_FORMAT, show_default=True,
+                  help='strptime format of the date column.')
+    def bulk_load_command(entity, file, rejects_path, chunk_size, create_students, date_format):
+        """Load historical attendance or progress from a CSV FILE."""
+        def report(counts, seconds):
+            click.echo(f"  {counts['read']:>10,} rows  {counts['read'] / seconds:>10,.0f} rows/s", err=True)
+
+        click.echo("=" * 60)
+        click.echo(f"Bulk Load: {entity} from {file}")
+        click.echo("=" * 60)
+        try:
+            counts, seconds, rejects_path = bulk_load(entity, file, rejects_path, chunk_size, create_students,
+                                                      date_format, report)
+        except BulkLoadError as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"✓ {counts['read']:,} rows in {seconds:.1f}s ({counts['read'] / max(seconds, 1e-9):,.0f} rows/s)")
+        click.echo(f"  ✓ Inserted: {counts['inserted']:,}")
+        click.echo(f"  ✓ Updated: {counts['updated']:,}")
+        click.echo(f"  ✓ Unchanged: {counts['unchanged']:,}")
+        if counts['superseded']:
+            click.echo(f"  ✓ Superseded by a later row: {counts['superseded']:,}")
+        if counts['students_created']:
+            click.echo(f"  ✓ Students created: {counts['students_created']:,}")
+        if counts['rejected']:
+            click.echo(f"  ❌ Rejected: {counts['rejected']:,} (see {rejects_path})")
@@ -0,0 +1,236 @@
+"""
+Process-local caching helpers.
+
+- LRUCache: a small thread-safe LRU with optional time-to-live, for computed
+  values that are expensive to rebuild.
+- Commit listeners: callbacks that receive the rows written by each committed
+  transaction, so caches can drop exactly the entries that went stale.
+- VersionTracker: a counter row in cache_version that is bumped in the same
+  transaction as writes to the models a cache depends on, so workers can
+  notice that another process changed the data. Processes that hold no
+  caches (scripts, see config.create_db_app) bump a shared '*' row instead,
+  which marks every cache stale.
+
+Change tracking hooks the SQLAlchemy Session class, so it covers every
+session (requests, scripts and jobs) without any per-route code. Each change
+is reported as a `Change(model, values, op)`:
+- `op` is 'insert', 'update', 'delete', or 'bulk' for `query.update()` /
+  `query.delete()` calls, where `values` is None because the rows are unknown.
+- `values` is a dict of the row's column values as of the flush.
+- `model` is the mapped class, or None for Core statements on plain tables
+  (e.g. training_instructors); treat those as "anything may have changed".
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from models import db, CacheVersion
+from replicas import primary_reads
+
+Change = namedtuple('Change', ['model', 'values', 'op'])
+
+ALL_CACHES = '*'  # cache_version row that counts towards every cache's version
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with an optional TTL in seconds."""
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or (self.ttl is not None and entry[1] < time.monotonic()):
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class VersionTracker:
+    """
+    Cross-process staleness check for one named cache.
+
+    Writes to any of `models` bump the cache_version row for `name` inside the
+    writing transaction. The owning cache calls `is_stale()` before serving;
+    it reads the row at most once per `check_interval` seconds and reports
+    whether another process committed changes this one has not applied.
+    """
+
+    def __init__(self, name, models, check_interval=5.0):
+        self.name = name
+        self.models = tuple(models)
+        self.check_interval = check_interval
+        self.local_version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        _trackers.append(self)
+
+    def read_version(self):
+        """Current version in the database, or None if the table is missing."""
+        if not _has_version_table(db.session.connection()):
+            return None
+        with primary_reads():  # a lagging replica would report an old version
+            version = db.session.query(db.func.sum(CacheVersion.version)).filter(
+                CacheVersion.name.in_((self.name, ALL_CACHES))).scalar()
+        return version or 0
+
+    def mark_loaded(self, version):
+        """Record the version the cache was (re)built from."""
+        with self._lock:
+            self.local_version = version
+            self._checked_at = time.monotonic()
+
+    def is_stale(self):
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = time.monotonic()
+        version = self.read_version()
+        return version is not None and version != self.local_version
+
+    def _committed(self, version):
+        # Our own write moved the row by one: the incremental update already
+        # covers it. A bigger jump means another process wrote too, so leave
+        # local_version behind and let the next check trigger a rebuild.
+        with self._lock:
+            if self.local_version is not None and version == self.local_version + 1:
+                self.local_version = version
+
+
+_commit_listeners = []
+_trackers = []
+_invalidate_all = False
+
+
+def on_commit(callback):
+    """Register callback(changes) to run after every successful commit."""
+    _commit_listeners.append(callback)
+    return callback
+
+
+def invalidate_all_on_write():
+    """Make every write from this process mark all caches stale, in every worker.
+
+    For processes that load none of the caches, and so cannot tell which
+    caches the rows they write belong to.
+    """
+    global _invalidate_all
+    _invalidate_all = True
+
+
+def _has_version_table(connection):
+    exists = connection.info.get('cache_version_table')
+    if exists is None:
+        exists = inspect(connection).has_table(CacheVersion.__tablename__)
+        connection.info['cache_version_table'] = exists
+    return exists
+
+
+def _bump_version(connection, name):
+    params = {'name': name}
+    updated = connection.execute(text("UPDATE cache_version SET version = version + 1 WHERE name = :name"), params)
+    if updated.rowcount == 0:
+        connection.execute(text("INSERT INTO cache_version (name, version) VALUES (:name, 1)"), params)
+    return connection.execute(text("SELECT SUM(version) FROM cache_version WHERE name IN (:name, :all)"),
+                              dict(params, all=ALL_CACHES)).scalar()
+
+
+def _snapshot(obj):
+    # Read the loaded state directly; deleted rows must not be lazy-loaded
+    state = inspect(obj).dict
+    return {attr.key: state.get(attr.key) for attr in obj.__mapper__.column_attrs}
+
+
+def _pending(session):
+    return session.info.setdefault('pending_changes', [])
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flush_changes(session, flush_context):
+    pending = _pending(session)
+    changes = [Change(type(obj), _snapshot(obj), 'insert') for obj in session.new]
+    changes += [Change(type(obj), _snapshot(obj), 'delete') for obj in session.deleted]
+    changes += [Change(type(obj), _snapshot(obj), 'update')
+                for obj in session.dirty if session.is_modified(obj)]
+    pending.extend(changes)
+    if changes and (_trackers or _invalidate_all):
+        _bump_trackers(session, {change.model for change in changes})
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        mapper = orm_execute_state.bind_mapper
+        model = mapper.class_ if mapper is not None else None
+        _pending(orm_execute_state.session).append(Change(model, None, 'bulk'))
+        if _trackers or _invalidate_all:
+            _bump_trackers(orm_execute_state.session, {model})
+
+
+def _bump_trackers(session, models):
+    connection = session.connection()
+    if not _has_version_table(connection):
+        return
+    versions = session.info.setdefault('pending_versions', {})
+    if _invalidate_all and not session.info.get('invalidated_all'):
+        _bump_version(connection, ALL_CACHES)
+        session.info['invalidated_all'] = True
+    for tracker in _trackers:
+        if tracker in versions:
+            continue  # one bump per transaction is enough
+        if None in models or any(issubclass(model, tracker.models) for model in models if model is not None):
+            versions[tracker] = _bump_version(connection, tracker.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_commit_listeners(session):
+    changes = session.info.pop('pending_changes', None)
+    versions = session.info.pop('pending_versions', {})
+    session.info.pop('invalidated_all', None)
+    if changes:
+        for callback in _commit_listeners:
+            callback(changes)
+    for tracker, version in versions.items():
+        tracker._committed(version)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('pending_changes', None)
+    session.info.pop('pending_versions', None)
+    session.info.pop('invalidated_all', None)
@@ -0,0 +1,175 @@
+"""
+Response compression for HTML and JSON.
+
+Compresses responses with brotli (when the `brotli` package is installed and
+the client accepts it) or gzip. Buffered responses are compressed in one go;
+streamed responses are compressed chunk by chunk as they are sent.
+
+Configuration (app.config):
+    COMPRESS_MIN_SIZE   - smallest buffered body worth compressing, in bytes
+    COMPRESS_MIMETYPES  - content types eligible for compression
+    COMPRESS_LEVEL      - gzip level (1-9)
+    COMPRESS_BR_LEVEL   - brotli quality (0-11)
+"""
+
+import threading
+import zlib
+
+from flask import current_app, request, jsonify
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIMETYPES = [
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+]
+
+
+class CompressionStats:
+    """Process-wide counters of how much compression saved."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.responses = {'gzip': 0, 'br': 0}
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, encoding, bytes_in, bytes_out):
+        with self.lock:
+            self.responses[encoding] += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def add_bytes(self, bytes_in, bytes_out):
+        with self.lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def record_skip(self):
+        with self.lock:
+            self.skipped += 1
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'responses': dict(self.responses),
+                'skipped': self.skipped,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'bytes_saved': self.bytes_in - self.bytes_out,
+                'ratio': round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            }
+
+
+stats = CompressionStats()
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding, config):
+    """Return (compress, flush) callables for an incremental encoder."""
+    if encoding == 'br':
+        c = brotli.Compressor(quality=config['COMPRESS_BR_LEVEL'])
+        # Compressor.process may buffer; flush() forces a chunk out per write
+        return (lambda data: c.process(data) + c.flush()), c.finish
+    c = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    return (lambda data: c.compress(data) + c.flush(zlib.Z_SYNC_FLUSH)), c.flush
+
+
+def _compress_stream(chunks, encoding, config):
+    compress, finish = _compressor(encoding, config)
+    bytes_in = bytes_out = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            out = compress(chunk)
+            bytes_in += len(chunk)
+            bytes_out += len(out)
+            if out:
+                yield out
+        out = finish()
+        bytes_out += len(out)
+        if out:
+            yield out
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+        stats.add_bytes(bytes_in, bytes_out)
+
+
+def compress_response(response):
+    """after_request hook that compresses eligible responses."""
+    config = current_app.config
+
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']
+            or request.method == 'HEAD'):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding, config)
+        response.headers.pop('Content-Length', None)
+        stats.record(encoding, 0, 0)  # bytes are added as the stream is consumed
+    else:
+        body = response.get_data()
+        if len(body) < config['COMPRESS_MIN_SIZE']:
+            stats.record_skip()
+            return response
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=config['COMPRESS_BR_LEVEL'])
+        else:
+            c = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+            compressed = c.compress(body) + c.flush()
+        response.set_data(compressed)
+        stats.record(encoding, len(body), len(compressed))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The representation changed, so a strong validator no longer applies
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def compression_metrics():
+    return jsonify(stats.as_dict())
+
+
+def init_compression(app):
+    """Install the compression hook and the /api/metrics/compression endpoint."""
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BR_LEVEL', 4)
+    app.after_request(compress_response)
+    app.add_url_rule('/api/metrics/compression', 'compression_metrics', compression_metrics)
@@ -0,0 +1,88 @@
+"""
+Optimistic concurrency for assessments, progress and attendance.
+
+KnowledgeAssessment, Progress and Attendance carry a `version` column that
+SQLAlchemy uses as their version_id_col: every UPDATE or DELETE it emits is
+`... WHERE id = :id AND version = :loaded` and bumps the version, so a row
+changed by someone else between load and flush raises StaleDataError rather
+than being overwritten silently.
+
+Clients send the version they last saw with each change:
+- a number: the record must still have that version,
+- 0: the client saw no record,
+- omitted: no check (last writer wins, as before).
+
+A mismatch is only a conflict when the stored value differs from the one
+being submitted; the API answers 409 with the current value so the client
+can show it and let the user decide.
+"""
+
+from flask import jsonify
+
+
+class VersionConflict(ValueError):
+    """The record changed since the client loaded it."""
+
+    def __init__(self, current):
+        super().__init__('This record was changed by someone else')
+        self.current = current
+
+
+def parse_version(value):
+    """Expected version from a request value; None when the client sent none."""
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_version(record, expected, value_of, submitted):
+    """Raise VersionConflict if `record` moved past `expected` to a different value."""
+    if expected is None:
+        return
+    current_version = record.version if record is not None else 0
+    if current_version == expected:
+        return
+    if record is not None and value_of(record) == submitted:
+        return  # someone already made the same change
+    raise VersionConflict(record)
+
+
+def conflict_response(current, serialize):
+    """409 response carrying the record's current state (None if it was deleted)."""
+    return jsonify({
+        'success': False,
+        'error': 'This record was changed by someone else',
+        'conflict': True,
+        'current': serialize(current) if current is not None else None,
+    }), 409
+
+
+def apply_roster(form, existing, value_of, set_value, create):
+    """
+    Apply `student_<id>` fields of a roster form with their `version_<id>` checks.
+
+    existing: {student_id: record} for the roster. Rows that conflict are left
+    unchanged and returned as {student_id: {'current': ..., 'submitted': ...}}.
+    """
+    conflicts = {}
+    for key, submitted in form.items():
+        if not key.startswith('student_'):
+            continue
+        student_id = int(key.split('_')[1])
+        record = existing.get(student_id)
+        try:
+            check_version(record, parse_version(form.get(f'version_{student_id}')), value_of, submitted)
+        except VersionConflict:
+            conflicts[student_id] = {
+                'current': value_of(record) if record is not None else None,
+                'submitted': submitted,
+            }
+            continue
+        if record is None:
+            existing[student_id] = create(student_id, submitted)
+        elif value_of(record) != submitted:
+            set_value(record, submitted)
+    return conflicts
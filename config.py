@@ -0,0 +1,70 @@
+"""
+Configuration from the environment, and the database-only app for scripts.
+
+- DATABASE_URL: primary database (default: SQLite in instance/trainings.db)
+- DATABASE_READ_URL, DATABASE_READ_STICKY_SECONDS: optional read replica
+  (see replicas.py)
+- LIVE_UPDATES_REDIS_URL: share live update events between workers (see
+  live.py)
+- ATTENDANCE_ARCHIVE_DAYS: default horizon of `flask archive-attendance`
+  (see archive.py)
+
+`create_app(config)` in app.py builds the web app from `load_config(config)`.
+Scripts (migrations, imports, checks) only need a session, so they use
+
+    from config import create_db_app
+    app = create_db_app()
+    with app.app_context():
+        ...
+
+which sets up the database and nothing else: no routes, templates or
+caches. The listeners that keep derived data consistent (change history,
+search index, cache versions) are still registered, so writes made by a
+script show up in the running app like any other.
+"""
+
+import os
+
+from flask import Flask
+
+import cache
+import history  # noqa: F401 -- importing registers the change history listeners
+import search  # noqa: F401 -- importing registers the search index listeners
+from models import db
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def load_config(config=None):
+    """Settings from the environment, with `config` (a dict) applied on top."""
+    settings = {'SQLALCHEMY_TRACK_MODIFICATIONS': False}
+
+    # Support both MySQL (via DATABASE_URL env var) and SQLite (for development)
+    settings['SQLALCHEMY_DATABASE_URI'] = (os.getenv('DATABASE_URL') or
+                                           'sqlite:///' + os.path.join(basedir, 'instance', 'trainings.db'))
+
+    # Optional read replica for GET traffic (see replicas.py)
+    database_read_url = os.getenv('DATABASE_READ_URL')
+    if database_read_url:
+        settings['SQLALCHEMY_BINDS'] = {'replica': database_read_url}
+        settings['REPLICA_STICKY_SECONDS'] = int(os.getenv('DATABASE_READ_STICKY_SECONDS', '10'))
+
+    # Share live update events between workers (see live.py)
+    settings['LIVE_UPDATES_REDIS_URL'] = os.getenv('LIVE_UPDATES_REDIS_URL')
+
+    # Attendance older than this is moved to the archive (see archive.py)
+    settings['ATTENDANCE_ARCHIVE_DAYS'] = int(os.getenv('ATTENDANCE_ARCHIVE_DAYS', '730'))
+
+    settings.update(config or {})
+    return settings
+
+
+def create_db_app(config=None):
+    """Minimal app for scripts: configuration and the database only."""
+    app = Flask(__name__)
+    app.config.update(load_config(config))
+    db.init_app(app)
+    # This process loads none of the caches, so it cannot tell which of
+    # them its writes affect: mark them all stale in the running app
+    cache.invalidate_all_on_write()
+    return app
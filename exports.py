@@ -0,0 +1,210 @@
+"""
+Streaming CSV / XLSX exports of the attendance and progress matrices.
+
+    /export/attendance.csv|xlsx  - one row per (topic, date), one column per student
+    /export/progress.csv|xlsx    - one row per topic, one column per student
+
+Query parameters:
+    training_id  - only this training
+    phase        - only this phase ('No Phase' selects topics without one)
+    date_from    - attendance only, inclusive (YYYY-MM-DD)
+    date_to      - attendance only, inclusive (YYYY-MM-DD)
+
+Archived attendance is included only when the date range reaches it (see
+archive.py). Records are read with a server-side cursor (yield_per) ordered so that the
+cells of one output row arrive together; each row is emitted as soon as it
+is complete. CSV is written straight into the response generator. XLSX is a
+zip archive that can only be finalized at the end, so openpyxl's write-only
+mode spills rows to a temporary file and the finished file is then streamed
+in chunks; memory stays flat either way.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+from flask import Response, request, jsonify, stream_with_context
+from sqlalchemy import select
+
+from archive import attendance_source
+from models import db, Training, Topic, Student, Progress
+
+CURSOR_BATCH_SIZE = 1000
+FILE_CHUNK_SIZE = 64 * 1024
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class ExportError(ValueError):
+    """Invalid export parameters."""
+
+
+def _parse_date(values, name):
+    value = values.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ExportError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def parse_filters(values, dates=True):
+    """Validate export filters from query args (or a job's params)."""
+    training_id = values.get('training_id')
+    try:
+        training_id = int(training_id) if training_id else None
+    except (TypeError, ValueError):
+        raise ExportError('training_id must be an integer')
+    filters = {'training_id': training_id, 'phase': values.get('phase') or None}
+    if dates:
+        filters['date_from'] = _parse_date(values, 'date_from')
+        filters['date_to'] = _parse_date(values, 'date_to')
+    return filters
+
+
+def _filter_topics(stmt, training_id, phase):
+    if training_id:
+        stmt = stmt.where(Topic.training_id == training_id)
+    if phase == 'No Phase':
+        stmt = stmt.where(Topic.phase.is_(None))
+    elif phase:
+        stmt = stmt.where(Topic.phase == phase)
+    return stmt
+
+
+def _students():
+    return db.session.execute(select(Student.id, Student.name).order_by(Student.id)).all()
+
+
+def _stream(stmt):
+    return db.session.execute(stmt.execution_options(yield_per=CURSOR_BATCH_SIZE))
+
+
+def attendance_rows(training_id=None, phase=None, date_from=None, date_to=None):
+    """Yield the header, then one row per (topic, date) in training order."""
+    students = _students()
+    columns = {student_id: index for index, (student_id, _) in enumerate(students)}
+
+    attendance = attendance_source(date_from, date_to, training_id)
+    stmt = select(
+        Training.name, Topic.phase, Topic.id, Topic.name, attendance.c.date,
+        attendance.c.student_id, attendance.c.status
+    ).join(Topic, Topic.id == attendance.c.topic_id) \
+     .join(Training, Training.id == Topic.training_id) \
+     .order_by(Training.id, Topic.order, Topic.id, attendance.c.date, attendance.c.id)
+    stmt = _filter_topics(stmt, training_id, phase)
+    if date_from:
+        stmt = stmt.where(attendance.c.date >= date_from)
+    if date_to:
+        stmt = stmt.where(attendance.c.date <= date_to)
+
+    def generate():
+        yield ['Training', 'Phase', 'Topic', 'Date'] + [name for _, name in students]
+        current_key, current_row = None, None
+        for training_name, phase, topic_id, topic_name, date, student_id, status in _stream(stmt):
+            if (topic_id, date) != current_key:
+                if current_row is not None:
+                    yield current_row
+                current_key = (topic_id, date)
+                current_row = [training_name, phase or '', topic_name, date.isoformat() if date else ''] + [''] * len(students)
+            if student_id in columns:
+                current_row[4 + columns[student_id]] = status or ''
+        if current_row is not None:
+            yield current_row
+
+    return generate()
+
+
+def progress_rows(training_id=None, phase=None):
+    """Yield the header, then one row per topic in training order."""
+    students = _students()
+    columns = {student_id: index for index, (student_id, _) in enumerate(students)}
+
+    stmt = select(
+        Training.name, Topic.phase, Topic.id, Topic.name, Progress.student_id, Progress.status
+    ).join(Training, Training.id == Topic.training_id) \
+     .outerjoin(Progress, Progress.topic_id == Topic.id) \
+     .order_by(Training.id, Topic.order, Topic.id, Progress.id.desc())
+    stmt = _filter_topics(stmt, training_id, phase)
+
+    def generate():
+        yield ['Training', 'Phase', 'Topic'] + [name for _, name in students]
+        current_topic, current_row = None, None
+        for training_name, phase, topic_id, topic_name, student_id, status in _stream(stmt):
+            if topic_id != current_topic:
+                if current_row is not None:
+                    yield current_row
+                current_topic = topic_id
+                current_row = [training_name, phase or '', topic_name] + ['Not Started'] * len(students)
+            if student_id in columns:
+                # Newest row first, so a duplicate's oldest row is written last and
+                # wins, as on the progress page
+                current_row[3 + columns[student_id]] = status or 'Not Started'
+        if current_row is not None:
+            yield current_row
+
+    return generate()
+
+
+def stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_xlsx(rows, title):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    for row in rows:
+        sheet.append(row)
+    with tempfile.TemporaryFile() as f:
+        workbook.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+EXPORTS = {
+    'attendance': (attendance_rows, True),
+    'progress': (progress_rows, False),
+}
+FORMATS = ('csv', 'xlsx')
+
+
+def export_body(report, fmt, filters):
+    """Return (chunk generator, mimetype) for a report in csv or xlsx."""
+    rows = EXPORTS[report][0](**filters)
+    if fmt == 'csv':
+        return stream_csv(rows), 'text/csv'
+    return stream_xlsx(rows, report.capitalize()), XLSX_MIMETYPE
+
+
+def export_report(report, fmt):
+    if report not in EXPORTS or fmt not in FORMATS:
+        return jsonify({'success': False, 'error': 'Unknown export'}), 404
+    try:
+        filters = parse_filters(request.args, dates=EXPORTS[report][1])
+    except ExportError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    body, mimetype = export_body(report, fmt, filters)
+    filename = f"{report}-{datetime.now().strftime('%Y%m%d')}.{fmt}"
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def init_exports(app):
+    """Register the /export/<report>.<fmt> endpoint."""
+    app.add_url_rule('/export/<report>.<fmt>', 'export_report', export_report)
@@ -0,0 +1,442 @@
+"""
+Append-only change log for attendance, progress and knowledge assessments,
+and reports that rebuild their state as of any point in time.
+
+Attendance.status, Progress.status and KnowledgeAssessment.proficiency_level
+are overwritten in place. Every change to them is also appended to
+`history_event` as (ts, kind, student_id, ref_id, date, value), where ref_id
+is the topic (or skill) and value is the new status, or NULL when the record
+was deleted. A Session `after_flush` hook writes the events on the flush's
+own connection, so they commit and roll back together with the data; bulk
+`query.delete()` calls log a deletion for every row they are about to remove.
+
+The state at time T is the latest event per entity with ts <= T. To avoid
+replaying the log from the beginning, `history_checkpoint` periodically
+materializes the full state up to a timestamp; a query starts from the
+newest checkpoint at or before T and replays only the events stamped after
+it, through the (kind, ts) or (kind, student_id, ref_id, ts) index.
+
+Event ids are not a safe watermark: with concurrent writers (MySQL) an event
+with a lower id can commit after one with a higher id. So a checkpoint only
+covers events stamped at least CHECKPOINT_MARGIN ago, by which time every
+transaction that stamped them has committed.
+
+    /api/history/completion  - completed topics per training (and student)
+    /api/history/attendance  - attendance rate per training (and student)
+
+Query parameters: as_of (YYYY-MM-DD or ISO datetime; a date means the end
+of that day), or from/to/interval (day, week, month) for a series, plus an
+optional training_id.
+
+Run migrate_add_history.py once per database to create and backfill the
+tables, and history_checkpoint.py (or the "history_checkpoint" job)
+periodically, e.g. nightly from cron.
+"""
+
+import calendar
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from flask import request, jsonify
+from sqlalchemy import event, inspect, select, func
+from sqlalchemy.orm import Session
+
+from models import (db, Training, Topic, Student, Attendance, Progress, KnowledgeAssessment,
+                    HistoryEvent, HistoryCheckpoint, HistoryCheckpointRow)
+
+EventSource = namedtuple('EventSource', ['model', 'ref', 'value'])
+
+SOURCES = {
+    'attendance': EventSource(Attendance, 'topic_id', 'status'),
+    'progress': EventSource(Progress, 'topic_id', 'status'),
+    'assessment': EventSource(KnowledgeAssessment, 'skill_id', 'proficiency_level'),
+}
+KINDS_BY_MODEL = {source.model: kind for kind, source in SOURCES.items()}
+
+INSERT_BATCH_SIZE = 1000
+MAX_POINTS = 120
+INTERVALS = {'day': timedelta(days=1), 'week': timedelta(weeks=1), 'month': None}
+CHECKPOINT_MARGIN = timedelta(minutes=10)  # longer than any transaction that writes events
+
+
+class HistoryError(ValueError):
+    """Invalid history query parameters."""
+
+
+# ============================================
+# Event log
+# ============================================
+
+def _history_enabled(connection):
+    """True when this connection's database has the history tables."""
+    enabled = connection.info.get('history_enabled')
+    if enabled is None:
+        enabled = inspect(connection).has_table(HistoryEvent.__tablename__)
+        connection.info['history_enabled'] = enabled
+    return enabled
+
+
+def _key(kind, values):
+    source = SOURCES[kind]
+    return values['student_id'], values[source.ref], values.get('date') if kind == 'attendance' else None
+
+
+def _event(ts, kind, key, value):
+    student_id, ref_id, date = key
+    return {'ts': ts, 'kind': kind, 'student_id': student_id, 'ref_id': ref_id, 'date': date, 'value': value}
+
+
+def _object_events(session, obj, ts):
+    kind = KINDS_BY_MODEL[type(obj)]
+    source = SOURCES[kind]
+    state = inspect(obj)
+    current = state.dict  # loaded state; deleted rows must not be lazy-loaded
+    if obj in session.deleted:
+        return [_event(ts, kind, _key(kind, current), None)]
+    if obj in session.new:
+        return [_event(ts, kind, _key(kind, current), current.get(source.value))]
+
+    # Updated: a changed key is a delete of the old entity plus an insert
+    previous = dict(current)
+    for name in ('student_id', source.ref) + (('date',) if kind == 'attendance' else ()):
+        history = state.attrs[name].history
+        if history.deleted:
+            previous[name] = history.deleted[0]
+    old_key, new_key = _key(kind, previous), _key(kind, current)
+    if old_key != new_key:
+        return [_event(ts, kind, old_key, None), _event(ts, kind, new_key, current.get(source.value))]
+    if state.attrs[source.value].history.has_changes():
+        return [_event(ts, kind, new_key, current.get(source.value))]
+    return []
+
+
+@event.listens_for(Session, 'after_flush')
+def _log_flush_events(session, flush_context):
+    logged = [obj for obj in session.new | session.dirty | session.deleted if type(obj) in KINDS_BY_MODEL]
+    if not logged:
+        return
+    connection = session.connection()
+    if not _history_enabled(connection):
+        return
+    ts = datetime.now()
+    rows = []
+    for obj in logged:
+        rows.extend(_object_events(session, obj, ts))
+    if rows:
+        connection.execute(HistoryEvent.__table__.insert(), rows)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _log_bulk_deletes(orm_execute_state):
+    if not orm_execute_state.is_delete:
+        return
+    mapper = orm_execute_state.bind_mapper
+    kind = KINDS_BY_MODEL.get(mapper.class_) if mapper is not None else None
+    if kind is None:
+        return
+    connection = orm_execute_state.session.connection()
+    if not _history_enabled(connection):
+        return
+
+    # Runs before the DELETE: read the keys of the rows it will remove
+    source = SOURCES[kind]
+    table = source.model.__table__
+    columns = [table.c.student_id, table.c[source.ref]] + ([table.c.date] if kind == 'attendance' else [])
+    stmt = select(*columns)
+    if orm_execute_state.statement.whereclause is not None:
+        stmt = stmt.where(orm_execute_state.statement.whereclause)
+    ts = datetime.now()
+    rows = [_event(ts, kind, (row[0], row[1], row[2] if len(row) > 2 else None), None)
+            for row in connection.execute(stmt)]
+    if rows:
+        connection.execute(HistoryEvent.__table__.insert(), rows)
+
+
+def log_bulk_writes(session, kind, rows):
+    """Log rows written with bulk INSERT / UPDATE statements, which the flush hook does not see.
+
+    Each row is a dict with student_id, the ref column (and date for
+    attendance) and the new value, e.g. as passed to the bulk statement.
+    """
+    connection = session.connection()
+    if not rows or not _history_enabled(connection):
+        return
+    source = SOURCES[kind]
+    ts = datetime.now()
+    events = [_event(ts, kind, _key(kind, row), row[source.value]) for row in rows]
+    for start in range(0, len(events), INSERT_BATCH_SIZE):
+        connection.execute(HistoryEvent.__table__.insert(), events[start:start + INSERT_BATCH_SIZE])
+
+
+# ============================================
+# Replay
+# ============================================
+
+def latest_checkpoint(as_of=None):
+    """The newest checkpoint whose events all happened at or before as_of."""
+    query = HistoryCheckpoint.query
+    if as_of is not None:
+        query = query.filter(HistoryCheckpoint.ts <= as_of)
+    return query.order_by(HistoryCheckpoint.ts.desc(), HistoryCheckpoint.id.desc()).first()
+
+
+def _filtered(stmt, model, student_id, ref_ids):
+    if student_id is not None:
+        stmt = stmt.where(model.student_id == student_id)
+    if ref_ids is not None:
+        stmt = stmt.where(model.ref_id.in_(ref_ids))
+    return stmt
+
+
+def _checkpoint_state(kind, checkpoint, student_id=None, ref_ids=None):
+    state = {}
+    if checkpoint is None:
+        return state
+    R = HistoryCheckpointRow
+    stmt = select(R.student_id, R.ref_id, R.date, R.value) \
+        .where(R.checkpoint_id == checkpoint.id, R.kind == kind)
+    for student, ref, date, value in db.session.execute(_filtered(stmt, R, student_id, ref_ids)):
+        state[(student, ref, date)] = value
+    return state
+
+
+def _events(kind, checkpoint, until=None, student_id=None, ref_ids=None):
+    E = HistoryEvent
+    stmt = select(E.ts, E.student_id, E.ref_id, E.date, E.value).where(E.kind == kind)
+    if checkpoint is not None:
+        stmt = stmt.where(E.ts > checkpoint.ts)
+    if until is not None:
+        stmt = stmt.where(E.ts <= until)
+    stmt = _filtered(stmt, E, student_id, ref_ids).order_by(E.ts, E.id)
+    return db.session.execute(stmt.execution_options(yield_per=INSERT_BATCH_SIZE))
+
+
+def _apply(state, key, value):
+    if value is None:
+        state.pop(key, None)
+    else:
+        state[key] = value
+
+
+def replay(kind, points, summarize, student_id=None, ref_ids=None):
+    """
+    Rebuild the state of `kind` at each timestamp in `points` (ascending) and
+    return [summarize(state) ...]. The state maps (student_id, ref_id, date)
+    to the value; date is None except for attendance. The log is read once,
+    starting from the newest checkpoint before the first point.
+    """
+    if not points:
+        return []
+    checkpoint = latest_checkpoint(points[0])
+    state = _checkpoint_state(kind, checkpoint, student_id, ref_ids)
+    results = []
+    remaining = iter(points)
+    point = next(remaining)
+    for ts, student, ref, date, value in _events(kind, checkpoint, points[-1], student_id, ref_ids):
+        while point is not None and ts > point:
+            results.append(summarize(state))
+            point = next(remaining, None)
+        _apply(state, (student, ref, date), value)
+    while point is not None:
+        results.append(summarize(state))
+        point = next(remaining, None)
+    return results
+
+
+def state_at(kind, as_of, student_id=None, ref_ids=None):
+    """The state of `kind` as of a timestamp: {(student_id, ref_id, date): value}."""
+    return replay(kind, [as_of], dict, student_id, ref_ids)[0]
+
+
+# ============================================
+# Checkpoints
+# ============================================
+
+def create_checkpoint():
+    """
+    Materialize the state as of CHECKPOINT_MARGIN ago, starting from the
+    previous checkpoint. Returns (checkpoint, {kind: rows}), or (None, {})
+    when no events were stamped between the last one and then.
+    """
+    cutoff = datetime.now() - CHECKPOINT_MARGIN
+    previous = latest_checkpoint()
+    stmt = select(func.max(HistoryEvent.id)).where(HistoryEvent.ts <= cutoff)
+    if previous is not None:
+        stmt = stmt.where(HistoryEvent.ts > previous.ts)
+    last_id = db.session.execute(stmt).scalar()
+    if last_id is None:
+        return None, {}
+
+    states = {}
+    for kind in SOURCES:
+        state = _checkpoint_state(kind, previous)
+        for ts, student, ref, date, value in _events(kind, previous, until=cutoff):
+            _apply(state, (student, ref, date), value)
+        states[kind] = state
+
+    # Core inserts: checkpoints are not data changes for the cache listeners
+    connection = db.session.connection()
+    checkpoint_id = connection.execute(HistoryCheckpoint.__table__.insert().values(
+        ts=cutoff, last_event_id=last_id, created_at=datetime.now()
+    )).inserted_primary_key[0]
+    counts = {}
+    for kind, state in states.items():
+        batch = []
+        for (student, ref, date), value in state.items():
+            batch.append({'checkpoint_id': checkpoint_id, 'kind': kind, 'student_id': student,
+                          'ref_id': ref, 'date': date, 'value': value})
+            if len(batch) >= INSERT_BATCH_SIZE:
+                connection.execute(HistoryCheckpointRow.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(HistoryCheckpointRow.__table__.insert(), batch)
+        counts[kind] = len(state)
+    db.session.commit()
+    return db.session.get(HistoryCheckpoint, checkpoint_id), counts
+
+
+# ============================================
+# Reports
+# ============================================
+
+def _scope(training_id):
+    query = Training.query.order_by(Training.id)
+    if training_id:
+        query = query.filter(Training.id == training_id)
+    trainings = query.all()
+    topics = {}
+    for topic_id, topic_training in db.session.query(Topic.id, Topic.training_id) \
+            .filter(Topic.training_id.in_([t.id for t in trainings])):
+        topics[topic_id] = topic_training
+    students = db.session.query(Student.id, Student.name).order_by(Student.name).all()
+    return trainings, topics, students
+
+
+def _rate(part, total):
+    return round(part / total * 100, 1) if total else 0
+
+
+def completion_report(points, training_id=None):
+    """Completed topics per training (and per student for one training)."""
+    trainings, topics, students = _scope(training_id)
+    student_ids = {student_id for student_id, _ in students}
+    topic_counts = {}
+    for topic_training in topics.values():
+        topic_counts[topic_training] = topic_counts.get(topic_training, 0) + 1
+
+    def summarize(state):
+        per_training, per_student = {}, {}
+        for (student, topic, _), status in state.items():
+            if status == 'Completed' and topic in topics and student in student_ids:
+                per_training[topics[topic]] = per_training.get(topics[topic], 0) + 1
+                per_student[student] = per_student.get(student, 0) + 1
+        result = {'trainings': []}
+        for training in trainings:
+            total = topic_counts.get(training.id, 0) * len(students)
+            completed = per_training.get(training.id, 0)
+            result['trainings'].append({'id': training.id, 'name': training.name, 'completed': completed,
+                                        'total': total, 'rate': _rate(completed, total)})
+        if training_id:
+            total = topic_counts.get(training_id, 0)
+            result['students'] = [
+                {'id': student_id, 'name': name, 'completed': per_student.get(student_id, 0),
+                 'total': total, 'rate': _rate(per_student.get(student_id, 0), total)}
+                for student_id, name in students
+            ]
+        return result
+
+    return replay('progress', points, summarize, ref_ids=list(topics) if training_id else None)
+
+
+def attendance_report(points, training_id=None):
+    """Present / recorded sessions per training (and per student for one training)."""
+    trainings, topics, students = _scope(training_id)
+    names = dict(students)
+
+    def summarize(state):
+        per_training, per_student = {}, {}
+        for (student, topic, _), status in state.items():
+            if topic not in topics or student not in names:
+                continue
+            for counts, key in ((per_training, topics[topic]), (per_student, student)):
+                present, total = counts.get(key, (0, 0))
+                counts[key] = (present + (status == 'Present'), total + 1)
+        result = {'trainings': []}
+        for training in trainings:
+            present, total = per_training.get(training.id, (0, 0))
+            result['trainings'].append({'id': training.id, 'name': training.name, 'present': present,
+                                        'total': total, 'rate': _rate(present, total)})
+        if training_id:
+            result['students'] = []
+            for student_id, name in students:
+                present, total = per_student.get(student_id, (0, 0))
+                result['students'].append({'id': student_id, 'name': name, 'present': present,
+                                           'total': total, 'rate': _rate(present, total)})
+        return result
+
+    return replay('attendance', points, summarize, ref_ids=list(topics) if training_id else None)
+
+
+REPORTS = {
+    'completion': completion_report,
+    'attendance': attendance_report,
+}
+
+
+def _parse_timestamp(value, name):
+    try:
+        if len(value) == 10:
+            return datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), time.max)
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HistoryError(f'{name} must be a date (YYYY-MM-DD) or an ISO datetime')
+
+
+def _add_months(ts, months):
+    month = ts.month - 1 + months
+    year, month = ts.year + month // 12, month % 12 + 1
+    return ts.replace(year=year, month=month, day=min(ts.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_points(values):
+    """Timestamps to report on: as_of, or from/to stepped by interval."""
+    if values.get('as_of'):
+        return [_parse_timestamp(values['as_of'], 'as_of')]
+    if not values.get('from'):
+        return [datetime.now()]
+    start = _parse_timestamp(values['from'], 'from')
+    end = _parse_timestamp(values['to'], 'to') if values.get('to') else datetime.now()
+    interval = values.get('interval', 'week')
+    if interval not in INTERVALS:
+        raise HistoryError('interval must be one of: ' + ', '.join(INTERVALS))
+    if end < start:
+        raise HistoryError('to must not be before from')
+    points, ts = [], start
+    while ts <= end:
+        points.append(ts)
+        if len(points) > MAX_POINTS:
+            raise HistoryError(f'At most {MAX_POINTS} points per request')
+        ts = _add_months(start, len(points)) if interval == 'month' else ts + INTERVALS[interval]
+    return points
+
+
+def history_report(report):
+    if report not in REPORTS:
+        return jsonify({'success': False, 'error': 'Unknown report'}), 404
+    try:
+        points = parse_points(request.args)
+        training_id = request.args.get('training_id', type=int)
+    except HistoryError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    results = REPORTS[report](points, training_id)
+    return jsonify({
+        'success': True,
+        'report': report,
+        'points': [dict(result, as_of=point.isoformat()) for point, result in zip(points, results)],
+    })
+
+
+def init_history(app):
+    """Register the /api/history/<report> endpoint."""
+    app.add_url_rule('/api/history/<report>', 'history_report', history_report)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Write a checkpoint of the attendance / progress / assessment history.
+
+Historical reports start from the newest checkpoint before the requested
+time and replay only the events logged after it, so run this periodically
+(e.g. nightly from cron). A checkpoint covers the events stamped up to
+CHECKPOINT_MARGIN (see history.py) ago, so that transactions still in
+flight are never skipped; it does nothing when there are no such events
+since the previous checkpoint.
+
+Usage:
+    python history_checkpoint.py
+"""
+
+import time
+
+from config import create_db_app
+from history import create_checkpoint
+
+app = create_db_app()
+
+
+def history_checkpoint():
+    """Materialize the current history state"""
+
+    with app.app_context():
+        started = time.perf_counter()
+        checkpoint, counts = create_checkpoint()
+        if checkpoint is None:
+            print("✅ No new events to checkpoint")
+            return
+        for kind, count in counts.items():
+            print(f"  ✓ {count} {kind} row(s)")
+        print(f"✅ Checkpoint #{checkpoint.id} up to {checkpoint.ts:%Y-%m-%d %H:%M:%S} "
+              f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    history_checkpoint()
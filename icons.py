@@ -0,0 +1,44 @@
+"""
+Self-hosted icons.
+
+The feather and Font Awesome icons the templates use are vendored as one
+subset SVG sprite (statics/icons/sprite.svg, built by vendor_icons.py). The
+`icon()` template helper renders each icon server-side as a small inline
+<svg> that references a symbol in the sprite, so pages need neither the CDN
+nor a client-side `feather.replace()` pass over the DOM.
+
+The sprite is fingerprinted by build_assets.py and served with immutable
+cache headers like the stylesheets.
+"""
+
+from markupsafe import Markup, escape
+
+from assets import asset_url
+
+SPRITE = 'icons/sprite.svg'
+
+# Presentation attributes matching what feather.replace() used to emit
+FEATHER_ATTRS = ('width="24" height="24" fill="none" stroke="currentColor" stroke-width="2" '
+                 'stroke-linecap="round" stroke-linejoin="round"')
+
+
+def icon(name, set='feather', style=None, class_=None):
+    """Render an icon from the vendored sprite as an inline <svg>."""
+    if set == 'fa':
+        classes = f'fa-icon fa-{name}'
+        attrs = 'fill="currentColor"'
+    else:
+        classes = f'feather feather-{name}'
+        attrs = FEATHER_ATTRS
+    if class_:
+        classes += f' {class_}'
+
+    style_attr = f' style="{escape(style)}"' if style else ''
+    href = f'{asset_url(SPRITE)}#{set}-{name}'
+    return Markup(f'<svg class="{escape(classes)}" {attrs}{style_attr} aria-hidden="true">'
+                  f'<use href="{escape(href)}"></use></svg>')
+
+
+def init_icons(app):
+    """Register the icon() template helper."""
+    app.add_template_global(icon)
@@ -0,0 +1,209 @@
+"""
+Idempotency keys for mutating requests.
+
+A POST/PUT/PATCH/DELETE that carries an `Idempotency-Key` header (HTML forms
+send an `idempotency_key` field instead, see `idempotency_field()`) runs at
+most once per key and path. Its response is recorded, and a retry from a
+proxy or a double-click gets the recorded response back, marked
+`Idempotent-Replayed: true`, without the view running or the data tables
+being touched.
+
+- The first request claims the key by inserting a pending row. A duplicate
+  that arrives while the first one is still running gets 409; a claim left
+  by a crashed worker is taken over after PENDING_TIMEOUT_SECONDS.
+- Reusing a key for a different request (other body or form values) is
+  rejected with 422.
+- Responses with status < 500 are recorded. On a 5xx or an exception the
+  claim is released so the client can retry.
+- Records live in the idempotency_key table for IDEMPOTENCY_TTL_SECONDS
+  (default 24h) and are purged hourly; completed ones are also kept in a
+  bounded in-memory LRU so replays in the same worker skip the database.
+
+Bookkeeping uses its own short transactions on the engine, so it never
+commits or rolls back the view's session.
+"""
+
+import hashlib
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from flask import request, g, Response, jsonify
+from markupsafe import Markup
+from sqlalchemy import inspect, select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+
+from cache import LRUCache
+from models import db, IdempotencyKey, utcnow
+
+HEADER = 'Idempotency-Key'
+FORM_FIELD = 'idempotency_key'
+MUTATING_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+DEFAULT_TTL_SECONDS = 24 * 3600
+PENDING_TIMEOUT_SECONDS = 60
+PURGE_INTERVAL_SECONDS = 3600
+MAX_KEY_LENGTH = 255
+MAX_BODY_BYTES = 60000  # fits a MySQL BLOB
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+responses = LRUCache(512, ttl=600)
+_last_purge = 0.0
+_table_exists = None
+
+table = IdempotencyKey.__table__
+
+
+def _enabled():
+    """False until migrate_add_idempotency.py has created the table."""
+    global _table_exists
+    if _table_exists is None:
+        _table_exists = inspect(db.engine).has_table(table.name)
+    return _table_exists
+
+
+def idempotency_field():
+    """Hidden form field with a fresh key, so a double-submitted form is only processed once."""
+    return Markup(f'<input type="hidden" name="{FORM_FIELD}" value="{uuid.uuid4()}">')
+
+
+def request_key():
+    key = request.headers.get(HEADER)
+    if key is None and request.mimetype in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        key = request.form.get(FORM_FIELD)
+    return key or None
+
+
+def fingerprint():
+    """Hash of everything that makes two requests the same request."""
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.full_path}\n{request.mimetype}\n'.encode())
+    if request.mimetype in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        fields = sorted((k, v) for k, v in request.form.items(multi=True) if k != FORM_FIELD)
+        files = sorted((k, f.filename or '') for k, f in request.files.items(multi=True))
+        digest.update(json.dumps([fields, files]).encode())
+    else:
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _replay(stored):
+    status_code, headers, body = stored
+    response = Response(body, status=status_code)
+    for name, value in headers.items():
+        response.headers[name] = value
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(key, scope, digest, ttl):
+    """Insert a pending row. Returns None when claimed, else the response to send instead."""
+    now = utcnow()
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(insert(table).values(
+                key=key, scope=scope, fingerprint=digest, created_at=now,
+                expires_at=now + timedelta(seconds=ttl)))
+        return None
+    except IntegrityError:
+        pass
+    with db.engine.begin() as connection:
+        row = connection.execute(select(table).where(table.c.key == key, table.c.scope == scope)).first()
+        if row is None:
+            return _claim_conflict()  # released between our insert and select; let the client retry
+        expired = row.expires_at < now
+        abandoned = row.status_code is None and row.created_at < now - timedelta(seconds=PENDING_TIMEOUT_SECONDS)
+        if expired or abandoned:
+            taken = connection.execute(update(table).where(
+                table.c.id == row.id, table.c.created_at == row.created_at
+            ).values(fingerprint=digest, status_code=None, headers=None, body=None, created_at=now,
+                     expires_at=now + timedelta(seconds=ttl)))
+            return None if taken.rowcount == 1 else _claim_conflict()
+    if row.fingerprint != digest:
+        return jsonify({'success': False,
+                        'error': f'{HEADER} was already used for a different request'}), 422
+    if row.status_code is None:
+        return _claim_conflict()
+    stored = (row.status_code, json.loads(row.headers or '{}'), row.body or b'')
+    responses.set((key, scope), (digest, stored))
+    return _replay(stored)
+
+
+def _claim_conflict():
+    return jsonify({'success': False,
+                    'error': f'A request with this {HEADER} is still being processed'}), 409
+
+
+def _release(key, scope):
+    with db.engine.begin() as connection:
+        connection.execute(delete(table).where(
+            table.c.key == key, table.c.scope == scope, table.c.status_code.is_(None)))
+
+
+def _purge(now):
+    """Drop expired records, at most once per PURGE_INTERVAL_SECONDS."""
+    global _last_purge
+    if time.monotonic() - _last_purge < PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge = time.monotonic()
+    with db.engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.expires_at < now))
+
+
+def init_idempotency(app):
+    """Honour Idempotency-Key on mutating requests."""
+    ttl = app.config.get('IDEMPOTENCY_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+    app.add_template_global(idempotency_field)
+
+    @app.before_request
+    def replay_or_claim():
+        if request.method not in MUTATING_METHODS:
+            return None
+        key = request_key()
+        if key is None or not _enabled():
+            return None
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'success': False, 'error': f'{HEADER} is longer than {MAX_KEY_LENGTH} characters'}), 400
+        scope = f'{request.method} {request.path}'[:255]
+        digest = fingerprint()
+
+        cached = responses.get((key, scope))
+        if cached is not None:
+            if cached[0] != digest:
+                return jsonify({'success': False,
+                                'error': f'{HEADER} was already used for a different request'}), 422
+            return _replay(cached[1])
+
+        blocked = _claim(key, scope, digest, ttl)
+        if blocked is not None:
+            return blocked
+        g.idempotency = (key, scope, digest)
+        return None
+
+    @app.after_request
+    def record_response(response):
+        claim = g.pop('idempotency', None)
+        if claim is None:
+            return response
+        key, scope, digest = claim
+        if response.status_code >= 500 or response.is_streamed or response.direct_passthrough:
+            _release(key, scope)
+            return response
+        body = response.get_data()
+        if len(body) > MAX_BODY_BYTES:
+            _release(key, scope)
+            return response
+        headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+        with db.engine.begin() as connection:
+            connection.execute(update(table).where(table.c.key == key, table.c.scope == scope).values(
+                status_code=response.status_code, headers=json.dumps(headers), body=body))
+        responses.set((key, scope), (digest, (response.status_code, headers, body)))
+        _purge(utcnow())
+        return response
+
+    @app.teardown_request
+    def release_on_error(exc):
+        # after_request does not run when the view raised
+        claim = g.pop('idempotency', None)
+        if claim is not None:
+            _release(claim[0], claim[1])
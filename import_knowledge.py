@@ -1,12 +1,16 @@
 import pandas as pd
-from app import app
-from models import db, Student, KnowledgeAssessment
+from config import create_db_app
+from models import db, Student, KnowledgeAssessment, KnowledgeSkill
 
-def import_knowledge_assessments():
-    """Import knowledge assessments from QA Training Roadmap.xlsx"""
+def import_knowledge_assessments(file_path='QA Training Roadmap.xlsx'):
+    """Import knowledge assessments from QA Training Roadmap.xlsx
+
+    Runs in the current app context: the import_knowledge job calls it inside
+    the web app, and the script below inside a database-only app.
+    """
     
     # Read the Excel file
-    df = pd.read_excel('QA Training Roadmap.xlsx', sheet_name='Sheet1')
+    df = pd.read_excel(file_path, sheet_name='Sheet1')
     
     # Column mapping for each category and topic (0-indexed)
     # Structure: Category -> Topic -> [Beginner_col, Intermediate_col, Advance_col, Expert_col]
@@ -30,77 +34,90 @@ def import_knowledge_assessments():
     
     level_names = ['Beginner', 'Intermediate', 'Advance', 'Expert']
     
-    with app.app_context():
-        # Clear existing assessments
-        KnowledgeAssessment.query.delete()
-        db.session.commit()
-        
-        print("Importing knowledge assessments from Excel...")
-        print(f"Total rows in Excel: {len(df)}")
-        
-        # Skip header rows (first 2 rows)
-        imported_count = 0
-        for idx, row in df.iterrows():
-            if idx < 2:  # Skip header rows
-                continue
-                
-            student_name = row.iloc[0]  # First column is Team Member
-            
-            if pd.isna(student_name) or str(student_name).strip() == '':
-                continue
-            
-            # Find or create student
-            student = Student.query.filter_by(name=student_name).first()
-            if not student:
-                print(f"\nCreating student: {student_name}")
-                student = Student(name=student_name)
-                db.session.add(student)
-                db.session.flush()  # Get the ID
-            else:
-                print(f"\nProcessing student: {student_name}")
+    # Skill ids by name ("<Category> - <Topic>"), created on first use
+    skill_ids = {s.topic: s.id for s in KnowledgeSkill.query.all()}
+    
+    def get_skill_id(name):
+        if name not in skill_ids:
+            max_order = db.session.query(db.func.max(KnowledgeSkill.order)).scalar() or 0
+            skill = KnowledgeSkill(topic=name, order=max_order + 1)
+            db.session.add(skill)
+            db.session.flush()  # Get the ID
+            print(f"  + Created skill: {name}")
+            skill_ids[name] = skill.id
+        return skill_ids[name]
+    
+    # Clear existing assessments
+    KnowledgeAssessment.query.delete()
+    db.session.commit()
+    
+    print("Importing knowledge assessments from Excel...")
+    print(f"Total rows in Excel: {len(df)}")
+    
+    # Skip header rows (first 2 rows)
+    imported_count = 0
+    for idx, row in df.iterrows():
+        if idx < 2:  # Skip header rows
+            continue
             
-            # Process each category and topic
-            for category, topics in column_mapping.items():
-                for topic, col_indices in topics.items():
-                    # Check which level is True for this student/topic
-                    for level_idx, col_idx in enumerate(col_indices):
-                        try:
-                            value = row.iloc[col_idx]
-                            
-                            # Check if this level is marked as True
-                            if value == True or str(value).lower() == 'true':
-                                # Handle case where Database might only have 3 levels
-                                if level_idx < len(level_names):
-                                    proficiency_level = level_names[level_idx]
-                                    
-                                    # Create assessment
-                                    assessment = KnowledgeAssessment(
-                                        student_id=student.id,
-                                        category=category,
-                                        topic=topic,
-                                        proficiency_level=proficiency_level
-                                    )
-                                    db.session.add(assessment)
-                                    print(f"  ✓ {category}/{topic}: {proficiency_level}")
-                                    imported_count += 1
-                                    break  # Only one level should be True per topic
-                        except IndexError:
-                            # Column doesn't exist, skip
-                            continue
+        student_name = row.iloc[0]  # First column is Team Member
         
-        db.session.commit()
-        print("\n" + "="*50)
-        print("✅ Import completed successfully!")
-        print("="*50)
+        if pd.isna(student_name) or str(student_name).strip() == '':
+            continue
         
-        # Print summary
-        total_assessments = KnowledgeAssessment.query.count()
-        total_students = Student.query.count()
-        print(f"\nSummary:")
-        print(f"  Total students: {total_students}")
-        print(f"  Total assessments imported: {imported_count}")
-        print(f"  Total assessments in DB: {total_assessments}")
+        # Find or create student
+        student = Student.query.filter_by(name=student_name).first()
+        if not student:
+            print(f"\nCreating student: {student_name}")
+            student = Student(name=student_name)
+            db.session.add(student)
+            db.session.flush()  # Get the ID
+        else:
+            print(f"\nProcessing student: {student_name}")
+        
+        # Process each category and topic
+        for category, topics in column_mapping.items():
+            for topic, col_indices in topics.items():
+                # Check which level is True for this student/topic
+                for level_idx, col_idx in enumerate(col_indices):
+                    try:
+                        value = row.iloc[col_idx]
+                        
+                        # Check if this level is marked as True
+                        if value == True or str(value).lower() == 'true':
+                            # Handle case where Database might only have 3 levels
+                            if level_idx < len(level_names):
+                                proficiency_level = level_names[level_idx]
+                                
+                                # Create assessment
+                                assessment = KnowledgeAssessment(
+                                    student_id=student.id,
+                                    skill_id=get_skill_id(f"{category} - {topic}"),
+                                    proficiency_level=proficiency_level
+                                )
+                                db.session.add(assessment)
+                                print(f"  ✓ {category}/{topic}: {proficiency_level}")
+                                imported_count += 1
+                                break  # Only one level should be True per topic
+                    except IndexError:
+                        # Column doesn't exist, skip
+                        continue
+    
+    db.session.commit()
+    print("\n" + "="*50)
+    print("✅ Import completed successfully!")
+    print("="*50)
+    
+    # Print summary
+    total_assessments = KnowledgeAssessment.query.count()
+    total_students = Student.query.count()
+    print(f"\nSummary:")
+    print(f"  Total students: {total_students}")
+    print(f"  Total assessments imported: {imported_count}")
+    print(f"  Total assessments in DB: {total_assessments}")
+    
+    return {'students': total_students, 'imported': imported_count, 'total_assessments': total_assessments}
 
 if __name__ == '__main__':
-    import_knowledge_assessments()
-
+    with create_db_app().app_context():
+        import_knowledge_assessments()
@@ -0,0 +1,453 @@
+"""
+In-app background jobs.
+
+Long operations (imports, exports, bulk certificate issuing, index rebuilds,
+archiving)
+run on a small thread pool instead of inside a request. Each run is a row in
+the `job` table:
+
+    queued -> running -> succeeded | failed | cancelled
+
+- POST /api/jobs                  submit {type, <params>} as JSON, or as a form with files
+- GET  /api/jobs/<id>             status, progress, message and result
+- POST /api/jobs/<id>/cancel      request cancellation
+- GET  /api/jobs/<id>/artifact    download the file a job produced
+- GET  /admin/jobs                admin page to start and watch jobs
+
+Job functions are registered with @job_type and called as func(ctx, **params)
+inside an app context. They report through ctx.progress(), call
+ctx.check_cancelled() between units of work, and write files to
+ctx.artifact(filename). Whatever they return is stored as the job's result.
+
+Progress is kept in memory and written to the database at most once per
+PROGRESS_WRITE_INTERVAL seconds on a separate connection; with SQLite a
+write can find the job's own transaction holding the lock, in which case
+the update is skipped and the next one carries the latest value.
+
+While a process has jobs running it stamps their heartbeat_at every
+HEARTBEAT_INTERVAL seconds. A job whose worker crashed or was restarted
+stops getting stamped; when a process starts, and on every heartbeat, jobs
+still `running` with a heartbeat older than JOBS_STALE_SECONDS are marked
+failed so they can be started again.
+
+Configuration (app.config):
+    JOBS_MAX_WORKERS   - concurrent jobs per process
+    JOBS_DIR           - where uploads and artifacts are stored
+    JOBS_STALE_SECONDS - heartbeat age after which a running job is failed
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app, request, jsonify, render_template, send_file, url_for
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from models import db, Job, Training, Topic, Student, Progress, Certificate
+from replicas import use_primary, replica_reads
+from reference import reference
+
+JobType = namedtuple('JobType', ['name', 'title', 'func', 'params'])
+JobParam = namedtuple('JobParam', ['name', 'label', 'input', 'options'])
+
+JOB_TYPES = {}
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+PROGRESS_WRITE_INTERVAL = 1.0
+CANCEL_CHECK_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 30.0
+
+
+def job_type(name, title, params=()):
+    """Register a function as a job type."""
+    def register(func):
+        JOB_TYPES[name] = JobType(name, title, func, tuple(params))
+        return func
+    return register
+
+
+def param(name, label, input='text', options=None):
+    return JobParam(name, label, input, options)
+
+
+class JobCancelled(Exception):
+    """Raised by JobContext.check_cancelled() to stop a job."""
+
+
+class JobContext:
+    """Handle passed to job functions for progress, cancellation and files."""
+
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.job_id = job_id
+        self.artifact_path = None
+        self._written_at = 0.0
+        self._checked_at = 0.0
+
+    def progress(self, percent=None, message=None):
+        live = self.runner.live.setdefault(self.job_id, {})
+        if percent is not None:
+            live['progress'] = max(0, min(100, int(percent)))
+        if message is not None:
+            live['message'] = message[:500]
+        if time.monotonic() - self._written_at >= PROGRESS_WRITE_INTERVAL:
+            self._written_at = time.monotonic()
+            self.runner.update_job(self.job_id, best_effort=True, **live)
+
+    def check_cancelled(self):
+        if self.job_id in self.runner.cancelled:
+            raise JobCancelled()
+        if time.monotonic() - self._checked_at >= CANCEL_CHECK_INTERVAL:
+            self._checked_at = time.monotonic()
+            # Cancellation may have been requested through another worker
+            with db.engine.connect() as connection:
+                requested = connection.execute(
+                    select(Job.cancel_requested).where(Job.id == self.job_id)
+                ).scalar()
+            if requested:
+                raise JobCancelled()
+
+    def artifact(self, filename):
+        """Path to write the job's downloadable file to."""
+        directory = os.path.join(self.runner.jobs_dir, 'job_artifacts', str(self.job_id))
+        os.makedirs(directory, exist_ok=True)
+        self.artifact_path = os.path.join(directory, os.path.basename(filename))
+        return self.artifact_path
+
+
+class JobRunner:
+    """Thread pool that executes queued jobs for one process."""
+
+    def __init__(self, app):
+        self.app = app
+        self.jobs_dir = app.config['JOBS_DIR']
+        self.executor = ThreadPoolExecutor(max_workers=app.config['JOBS_MAX_WORKERS'],
+                                           thread_name_prefix='job')
+        self.stale_after = timedelta(seconds=app.config['JOBS_STALE_SECONDS'])
+        self.live = {}  # job id -> {'progress', 'message'} for running jobs
+        self.cancelled = set()
+        self.running = set()
+        self._heartbeat = None
+        self._heartbeat_lock = threading.Lock()
+
+    def submit(self, kind, params):
+        job = Job(kind=kind, status='queued', params=json.dumps(params), progress=0)
+        db.session.add(job)
+        db.session.commit()
+        self._start_heartbeat()
+        self.executor.submit(self._run, job.id)
+        return job
+
+    def fail_stale_jobs(self):
+        """Mark failed the running jobs whose worker stopped sending heartbeats; returns how many."""
+        cutoff = datetime.now() - self.stale_after
+        stmt = update(Job).where(
+            Job.status == 'running', func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff
+        ).values(status='failed', message='Interrupted: the worker running it stopped', finished_at=datetime.now())
+        with db.engine.begin() as connection:
+            return connection.execute(stmt).rowcount
+
+    def _start_heartbeat(self):
+        with self._heartbeat_lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name='job-heartbeat', daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self.app.app_context():
+                try:
+                    if self.running:
+                        self.update_job(list(self.running), only_status='running', heartbeat_at=datetime.now())
+                    self.fail_stale_jobs()
+                except SQLAlchemyError:
+                    self.app.logger.exception('Job heartbeat failed')
+
+    def cancel(self, job):
+        if job.status in FINISHED_STATUSES:
+            return False
+        self.cancelled.add(job.id)
+        # Jobs still waiting in the queue are cancelled outright
+        updated = self.update_job(job.id, only_status='queued', status='cancelled',
+                                  message='Cancelled before start', finished_at=datetime.now())
+        if not updated:
+            self.update_job(job.id, cancel_requested=True)
+        return True
+
+    def update_job(self, job_id, only_status=None, best_effort=False, **values):
+        """Write job columns (of one job, or a list of them) on a connection of their own; returns True if a row changed."""
+        ids = job_id if isinstance(job_id, list) else [job_id]
+        stmt = update(Job).where(Job.id.in_(ids)).values(**values)
+        if only_status:
+            stmt = stmt.where(Job.status == only_status)
+        try:
+            with db.engine.begin() as connection:
+                return connection.execute(stmt).rowcount > 0
+        except OperationalError:
+            if not best_effort:
+                raise
+            return False
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            now = datetime.now()
+            started = self.update_job(job_id, only_status='queued', status='running',
+                                      started_at=now, heartbeat_at=now, message='Running')
+            if not started:
+                return  # cancelled while queued
+            self.running.add(job_id)
+
+            job = Job.query.get(job_id)
+            kind, params = job.kind, json.loads(job.params or '{}')
+            db.session.rollback()
+            ctx = JobContext(self, job_id)
+
+            try:
+                result = JOB_TYPES[kind].func(ctx, **params)
+                db.session.commit()
+                final = {'status': 'succeeded', 'progress': 100, 'message': 'Completed',
+                         'result': json.dumps(result) if result is not None else None}
+            except JobCancelled:
+                db.session.rollback()
+                final = {'status': 'cancelled', 'message': 'Cancelled'}
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.exception('Job %s (%s) failed', job_id, kind)
+                final = {'status': 'failed', 'message': f'{type(e).__name__}: {e}'[:500]}
+            finally:
+                db.session.remove()
+
+            artifact_path = ctx.artifact_path if final['status'] == 'succeeded' else None
+            self.update_job(job_id, artifact_path=artifact_path, finished_at=datetime.now(), **final)
+            self.running.discard(job_id)
+            self.live.pop(job_id, None)
+            self.cancelled.discard(job_id)
+
+
+def get_runner():
+    return current_app.extensions['jobs']
+
+
+def job_to_dict(job):
+    live = get_runner().live.get(job.id, {}) if job.status == 'running' else {}
+    return {
+        'id': job.id,
+        'type': job.kind,
+        'title': JOB_TYPES[job.kind].title if job.kind in JOB_TYPES else job.kind,
+        'status': job.status,
+        'params': json.loads(job.params or '{}'),
+        'progress': live.get('progress', job.progress),
+        'message': live.get('message', job.message),
+        'result': json.loads(job.result) if job.result else None,
+        'artifact_url': url_for('job_artifact', job_id=job.id) if job.artifact_path else None,
+        'cancel_requested': bool(job.cancel_requested),
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+# ============================================
+# Routes
+# ============================================
+
+@use_primary
+def admin_jobs():
+    jobs = Job.query.order_by(Job.created_at.desc(), Job.id.desc()).limit(50).all()
+    trainings = sorted(reference().trainings, key=lambda t: t.name)
+    return render_template('admin_jobs.html',
+                         jobs=[job_to_dict(job) for job in jobs],
+                         job_types=JOB_TYPES.values(),
+                         trainings=trainings)
+
+
+def submit_job():
+    data = request.form if request.form or request.files else (request.json or {})
+    kind = data.get('type')
+    if kind not in JOB_TYPES:
+        return jsonify({'success': False, 'error': 'Unknown job type'}), 400
+
+    params = {}
+    for spec in JOB_TYPES[kind].params:
+        if spec.input == 'file':
+            upload = request.files.get(spec.name)
+            if not upload or not upload.filename:
+                return jsonify({'success': False, 'error': f'{spec.label} is required'}), 400
+            directory = os.path.join(get_runner().jobs_dir, 'job_uploads')
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{uuid.uuid4().hex}{os.path.splitext(upload.filename)[1]}")
+            upload.save(path)
+            params[spec.name] = path
+        elif data.get(spec.name) not in (None, ''):
+            params[spec.name] = data.get(spec.name)
+
+    job = get_runner().submit(kind, params)
+    return jsonify({'success': True, 'job': job_to_dict(job)}), 202
+
+
+@use_primary
+def job_status(job_id):
+    job = Job.query.get_or_404(job_id)
+    return jsonify(job_to_dict(job))
+
+
+def cancel_job(job_id):
+    job = Job.query.get_or_404(job_id)
+    if not get_runner().cancel(job):
+        return jsonify({'success': False, 'error': f'Job already {job.status}'}), 400
+    db.session.refresh(job)
+    return jsonify({'success': True, 'job': job_to_dict(job)})
+
+
+def job_artifact(job_id):
+    job = Job.query.get_or_404(job_id)
+    if not job.artifact_path or not os.path.exists(job.artifact_path):
+        return jsonify({'success': False, 'error': 'No artifact for this job'}), 404
+    return send_file(job.artifact_path, as_attachment=True)
+
+
+def init_jobs(app):
+    """Start the job runner and register the job routes."""
+    app.config.setdefault('JOBS_MAX_WORKERS', 2)
+    app.config.setdefault('JOBS_DIR', os.path.join(app.root_path, 'instance'))
+    app.config.setdefault('JOBS_STALE_SECONDS', 4 * HEARTBEAT_INTERVAL)
+    runner = app.extensions['jobs'] = JobRunner(app)
+
+    # Jobs left running by a worker that crashed or was restarted
+    with app.app_context():
+        try:
+            failed = runner.fail_stale_jobs()
+        except SQLAlchemyError as e:
+            app.logger.warning('Stale jobs not checked at startup: %s', e)
+        else:
+            if failed:
+                app.logger.warning('Marked %d interrupted job(s) as failed', failed)
+
+    app.add_url_rule('/admin/jobs', 'admin_jobs', admin_jobs)
+    app.add_url_rule('/api/jobs', 'submit_job', submit_job, methods=['POST'])
+    app.add_url_rule('/api/jobs/<int:job_id>', 'job_status', job_status)
+    app.add_url_rule('/api/jobs/<int:job_id>/cancel', 'cancel_job', cancel_job, methods=['POST'])
+    app.add_url_rule('/api/jobs/<int:job_id>/artifact', 'job_artifact', job_artifact)
+
+
+# ============================================
+# Job types
+# ============================================
+
+EXPORT_PARAMS = (
+    param('report', 'Report', 'select', [('attendance', 'Attendance'), ('progress', 'Progress')]),
+    param('format', 'Format', 'select', [('xlsx', 'Excel'), ('csv', 'CSV')]),
+    param('training_id', 'Training', 'training'),
+    param('phase', 'Phase'),
+    param('date_from', 'From (attendance)', 'date'),
+    param('date_to', 'To (attendance)', 'date'),
+)
+
+
+@job_type('export', 'Export attendance / progress', EXPORT_PARAMS)
+def export_job(ctx, report='attendance', format='xlsx', **filters):
+    from exports import EXPORTS, FORMATS, export_body, parse_filters
+
+    if report not in EXPORTS or format not in FORMATS:
+        raise ValueError('Unknown export')
+    filters = parse_filters(filters, dates=EXPORTS[report][1])
+
+    size = 0
+    with replica_reads(), open(ctx.artifact(f"{report}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}"), 'wb') as f:
+        for chunk in export_body(report, format, filters)[0]:
+            ctx.check_cancelled()
+            f.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            size += len(chunk)
+            ctx.progress(message=f'{size:,} bytes written')
+    return {'bytes': size}
+
+
+@job_type('import_knowledge', 'Import knowledge assessments (Excel)',
+          [param('file', 'QA Training Roadmap workbook', 'file')])
+def import_knowledge_job(ctx, file):
+    try:
+        from import_knowledge import import_knowledge_assessments
+
+        ctx.progress(10, 'Reading workbook')
+        return import_knowledge_assessments(file)
+    finally:
+        os.remove(file)
+
+
+@job_type('issue_certificates', 'Issue certificates for completed trainings',
+          [param('training_id', 'Training', 'training'),
+           param('completion_date', 'Completion date', 'date')])
+def issue_certificates_job(ctx, training_id, completion_date=None):
+    training = Training.query.get(int(training_id))
+    if training is None:
+        raise ValueError(f'Training {training_id} not found')
+    completion = datetime.strptime(completion_date, '%Y-%m-%d').date() if completion_date else datetime.now().date()
+    topic_count = Topic.query.filter_by(training_id=training.id).count()
+
+    # Students who completed every topic of the training
+    completed = db.session.query(Progress.student_id).join(Topic, Topic.id == Progress.topic_id) \
+        .filter(Topic.training_id == training.id, Progress.status == 'Completed') \
+        .group_by(Progress.student_id) \
+        .having(db.func.count(db.distinct(Progress.topic_id)) == topic_count)
+    already = {student_id for (student_id,) in db.session.query(Certificate.student_id).filter_by(training_id=training.id)}
+    eligible = {student_id for (student_id,) in completed} - already if topic_count else set()
+    students = Student.query.filter(Student.id.in_(eligible)).order_by(Student.name).all()
+
+    for index, student in enumerate(students, start=1):
+        ctx.check_cancelled()
+        db.session.add(Certificate(
+            student_id=student.id,
+            training_id=training.id,
+            student_name=student.name,
+            course_name=training.name,
+            completion_date=completion,
+            unique_code=str(uuid.uuid4())[:8].upper(),
+            is_issued=True
+        ))
+        ctx.progress(index * 100 // len(students), f'Issued {index} of {len(students)}')
+    return {'issued': len(students), 'already_had_certificate': len(already)}
+
+
+@job_type('rebuild_search_index', 'Rebuild the search index')
+def rebuild_search_index_job(ctx):
+    from search import create_search_index, rebuild_search_index
+
+    ctx.progress(5, 'Creating index')
+    create_search_index()
+    ctx.progress(20, 'Indexing')
+    return rebuild_search_index()
+
+
+@job_type('history_checkpoint', 'Checkpoint attendance / progress history')
+def history_checkpoint_job(ctx):
+    from history import create_checkpoint
+
+    ctx.progress(10, 'Replaying events since the last checkpoint')
+    checkpoint, counts = create_checkpoint()
+    if checkpoint is None:
+        return {'checkpoint': 'none (no new events)'}
+    return dict(counts, checkpoint=checkpoint.id)
+
+
+@job_type('archive_attendance', 'Archive old attendance',
+          [param('days', 'Older than (days)'),
+           param('training_id', 'Whole training', 'training')])
+def archive_attendance_job(ctx, days=None, training_id=None):
+    from archive import archive_attendance, horizon
+
+    if not days and not training_id:
+        days = current_app.config['ATTENDANCE_ARCHIVE_DAYS']
+    before = horizon(int(days)) if days else None
+
+    def report(moved):
+        ctx.check_cancelled()
+        ctx.progress(message=f'{moved:,} rows archived')
+
+    moved = archive_attendance(before, [int(training_id)] if training_id else (), report=report)
+    return {'archived': moved, 'before': before.isoformat() if before else None}
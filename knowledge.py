@@ -0,0 +1,273 @@
+"""
+Knowledge assessment page, and the assessment and skill APIs behind its grid.
+"""
+
+from flask import Blueprint, render_template, request, jsonify, abort
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from models import db, Student, KnowledgeAssessment, KnowledgeSkill, PROFICIENCY_LEVELS, DEFAULT_TARGET_LEVEL
+from reference import reference
+from concurrency import VersionConflict, parse_version, check_version, conflict_response
+
+bp = Blueprint('knowledge', __name__)
+
+@bp.route('/knowledge-assessment')
+def knowledge_assessment():
+    # The grid itself is loaded page by page from /api/knowledge-assessment/matrix;
+    # only the student filter is rendered server-side
+    students = db.session.query(Student.id, Student.name).order_by(Student.name).all()
+    
+    return render_template('knowledge_assessment.html', students=students,
+                           levels=PROFICIENCY_LEVELS, default_target=DEFAULT_TARGET_LEVEL)
+
+# API endpoint returning a page of the student x skill matrix in columnar form
+@bp.route('/api/knowledge-assessment/matrix')
+def knowledge_assessment_matrix():
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    student_id = request.args.get('student_id', type=int)
+    
+    skills = reference().active_skills
+    skill_index = {s.id: i for i, s in enumerate(skills)}
+    level_index = {level: i for i, level in enumerate(PROFICIENCY_LEVELS)}
+    
+    students_query = db.session.query(Student.id, Student.name).order_by(Student.id)
+    if student_id:
+        students_query = students_query.filter(Student.id == student_id)
+    total = students_query.count()
+    page = students_query.offset(offset).limit(limit).all()
+    row_index = {s.id: i for i, s in enumerate(page)}
+    
+    # levels[row][col] is an index into PROFICIENCY_LEVELS, None when not assessed
+    levels = [[None] * len(skills) for _ in page]
+    assessment_ids = [[None] * len(skills) for _ in page]
+    versions = [[None] * len(skills) for _ in page]
+    if page:
+        rows = db.session.query(
+            KnowledgeAssessment.id,
+            KnowledgeAssessment.student_id,
+            KnowledgeAssessment.skill_id,
+            KnowledgeAssessment.proficiency_level,
+            KnowledgeAssessment.version
+        ).filter(KnowledgeAssessment.student_id.in_(row_index))
+        for assessment_id, sid, skill_id, level, version in rows:
+            col = skill_index.get(skill_id)
+            if col is None:
+                continue  # Assessment for an inactive skill
+            levels[row_index[sid]][col] = level_index.get(level)
+            assessment_ids[row_index[sid]][col] = assessment_id
+            versions[row_index[sid]][col] = version
+    
+    return jsonify({
+        'levels': PROFICIENCY_LEVELS,
+        'skills': [s.topic for s in skills],
+        'skill_ids': [s.id for s in skills],
+        'total': total,
+        'offset': offset,
+        'student_ids': [s.id for s in page],
+        'student_names': [s.name for s in page],
+        'matrix': levels,
+        'assessment_ids': assessment_ids,
+        'versions': versions
+    })
+
+# API endpoint to get assessments for a student
+@bp.route('/api/knowledge-assessment/student/<int:student_id>')
+def get_student_assessments(student_id):
+    assessments = KnowledgeAssessment.query.filter_by(student_id=student_id).all()
+    return jsonify([{
+        'id': a.id,
+        'skill_id': a.skill_id,
+        'topic': a.topic,
+        'proficiency_level': a.proficiency_level,
+        'version': a.version,
+        'last_updated': a.last_updated.isoformat() if a.last_updated else None
+    } for a in assessments])
+
+# API endpoint to update/create assessment
+@bp.route('/api/knowledge-assessment', methods=['POST'])
+def update_assessment():
+    data = request.json
+    student_id = data.get('student_id')
+    proficiency_level = data.get('proficiency_level')
+    
+    if proficiency_level not in PROFICIENCY_LEVELS:
+        return jsonify({'success': False, 'error': 'Invalid proficiency level'}), 400
+    if not str(student_id).isdigit() or db.session.get(Student, int(student_id)) is None:
+        return jsonify({'success': False, 'error': 'Unknown student'}), 400
+    student_id = int(student_id)
+    
+    # Identify the skill by id; older callers still send its name as 'topic'
+    if data.get('skill_id'):
+        skill_id = str(data.get('skill_id'))
+        skill = reference().skill_by_id.get(int(skill_id)) if skill_id.isdigit() else None
+    else:
+        skill = reference().skill_by_topic.get(data.get('topic'))
+    if not skill:
+        return jsonify({'success': False, 'error': 'Unknown skill'}), 400
+    
+    # Compare-and-set against the version the client last saw (see concurrency.py)
+    expected = parse_version(data.get('version'))
+    assessment = KnowledgeAssessment.query.filter_by(
+        student_id=student_id,
+        skill_id=skill.id
+    ).first()
+    created = assessment is None
+    
+    try:
+        check_version(assessment, expected, lambda a: a.proficiency_level, proficiency_level)
+        if assessment:
+            assessment.proficiency_level = proficiency_level
+        else:
+            assessment = KnowledgeAssessment(
+                student_id=student_id,
+                skill_id=skill.id,
+                proficiency_level=proficiency_level
+            )
+            db.session.add(assessment)
+        db.session.commit()
+    except (VersionConflict, StaleDataError, IntegrityError) as e:
+        db.session.rollback()
+        # With the input checked, an insert can only fail on the unique
+        # (student_id, skill_id) index: someone else created it first
+        if isinstance(e, IntegrityError) and not created:
+            raise
+        # Changed, created or deleted by someone else since the client loaded it
+        current = KnowledgeAssessment.query.filter_by(student_id=student_id, skill_id=skill.id).first()
+        return conflict_response(current, assessment_state)
+    
+    return jsonify(dict(assessment_state(assessment), success=True))
+
+def assessment_state(assessment):
+    return {
+        'id': assessment.id,
+        'skill_id': assessment.skill_id,
+        'proficiency_level': assessment.proficiency_level,
+        'version': assessment.version,
+        'last_updated': assessment.last_updated.isoformat() if assessment.last_updated else None
+    }
+
+# API endpoint to delete assessment; ?version= makes it conditional
+@bp.route('/api/knowledge-assessment/<int:assessment_id>', methods=['DELETE'])
+def delete_assessment(assessment_id):
+    expected = parse_version(request.args.get('version'))
+    assessment = KnowledgeAssessment.query.get(assessment_id)
+    if assessment is None:
+        if expected:
+            return conflict_response(None, assessment_state)
+        abort(404)
+    
+    try:
+        check_version(assessment, expected, lambda a: a.proficiency_level, None)
+        db.session.delete(assessment)
+        db.session.commit()
+    except (VersionConflict, StaleDataError):
+        db.session.rollback()
+        return conflict_response(KnowledgeAssessment.query.get(assessment_id), assessment_state)
+    
+    return jsonify({'success': True})
+
+# Get all skills
+@bp.route('/api/skills')
+def get_all_skills():
+    skills = reference().skills
+    return jsonify([{
+        'id': s.id,
+        'topic': s.topic,
+        'order': s.order,
+        'is_active': s.is_active,
+        'target_level': s.target_level
+    } for s in skills])
+
+# Add new skill
+@bp.route('/api/skills', methods=['POST'])
+def add_skill():
+    data = request.json
+    topic = data.get('topic')
+    
+    if not topic:
+        return jsonify({'success': False, 'error': 'Topic is required'}), 400
+    
+    target_level = data.get('target_level') or None
+    if target_level and target_level not in PROFICIENCY_LEVELS:
+        return jsonify({'success': False, 'error': 'Invalid target level'}), 400
+    
+    # Check if skill already exists
+    existing = KnowledgeSkill.query.filter_by(topic=topic).first()
+    if existing:
+        if not existing.is_active:
+            # Reactivate if it was deactivated
+            existing.is_active = True
+            db.session.commit()
+            return jsonify({'success': True, 'id': existing.id, 'reactivated': True})
+        return jsonify({'success': False, 'error': 'Skill already exists'}), 400
+    
+    # Get max order
+    max_order = db.session.query(db.func.max(KnowledgeSkill.order)).scalar() or 0
+    
+    skill = KnowledgeSkill(
+        topic=topic,
+        order=max_order + 1,
+        target_level=target_level
+    )
+    db.session.add(skill)
+    db.session.commit()
+    
+    return jsonify({'success': True, 'id': skill.id})
+
+# Update skill
+@bp.route('/api/skills/<int:skill_id>', methods=['PUT'])
+def update_skill(skill_id):
+    try:
+        skill = KnowledgeSkill.query.get_or_404(skill_id)
+        data = request.json
+        
+        old_topic = skill.topic
+        new_topic = data.get('topic', skill.topic)
+        target_level = data.get('target_level', skill.target_level) or None
+        
+        # Validate input
+        if not new_topic:
+            return jsonify({'success': False, 'error': 'Topic is required'}), 400
+        if target_level and target_level not in PROFICIENCY_LEVELS:
+            return jsonify({'success': False, 'error': 'Invalid target level'}), 400
+        
+        # Check if another skill with the new topic already exists
+        if old_topic != new_topic:
+            existing = KnowledgeSkill.query.filter_by(
+                topic=new_topic
+            ).filter(KnowledgeSkill.id != skill_id).first()
+            
+            if existing:
+                return jsonify({'success': False, 'error': 'A skill with this topic already exists'}), 400
+        
+        # Update skill - assessments reference it by id, so nothing else changes
+        skill.topic = new_topic
+        skill.target_level = target_level
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'total_assessments': skill.assessments.count()
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating skill: {str(e)}")
+        return jsonify({'success': False, 'error': f'Failed to update skill: {str(e)}'}), 500
+
+# Delete skill (soft delete)
+@bp.route('/api/skills/<int:skill_id>', methods=['DELETE'])
+def delete_skill(skill_id):
+    skill = KnowledgeSkill.query.get_or_404(skill_id)
+    
+    # Soft delete - just mark as inactive
+    skill.is_active = False
+    db.session.commit()
+    
+    # Optionally, also delete related assessments
+    # KnowledgeAssessment.query.filter_by(category=skill.category, topic=skill.topic).delete()
+    # db.session.commit()
+    
+    return jsonify({'success': True})
@@ -0,0 +1,249 @@
+"""
+Live change events over Server-Sent Events.
+
+Every committed change to attendance, progress or an assessment is turned
+into a compact event and pushed to open pages, which patch the affected cell
+instead of reloading:
+
+    {"entity": "attendance", "op": "update", "id": 12, "student_id": 3,
+     "topic_id": 7, "date": "2026-10-19", "status": "Present", "version": 2}
+
+`op` is insert, update or delete (status is null for a delete), or 'bulk'
+when a `query.update()` / `query.delete()` touched unknown rows; clients
+re-fetch what they show in that case.
+
+    /api/live?entities=attendance,progress&topic_id=7
+
+streams `change` events (all entities and topics by default), a comment
+every HEARTBEAT_SECONDS to keep proxies from closing the connection, and a
+`reset` event when a slow client missed events and should re-fetch.
+
+Events reach subscribers through a backend:
+- LocalBackend (default) delivers in-process and synchronously. It is all a
+  single worker needs and doubles as the stand-in for tests: subscribe(),
+  commit, then read the subscription.
+- RedisBackend (LIVE_UPDATES_REDIS_URL, needs the `redis` package) publishes
+  to a pub/sub channel that every worker listens on, so a change committed in
+  one worker reaches pages connected to another.
+Each open stream holds a worker thread, so run the app threaded (the default
+for `flask run`) or with a threaded/async server.
+"""
+
+import json
+import queue
+import threading
+
+from flask import Response, request, jsonify
+
+from cache import on_commit
+from models import Attendance, Progress, KnowledgeAssessment
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 256
+REDIS_CHANNEL = 'qa-trainings:live'
+
+# model -> (entity name, value column, columns that locate the row on a page)
+ENTITIES = {
+    Attendance: ('attendance', 'status', ('topic_id', 'date')),
+    Progress: ('progress', 'status', ('topic_id',)),
+    KnowledgeAssessment: ('assessment', 'proficiency_level', ('skill_id',)),
+}
+ENTITY_NAMES = tuple(name for name, _, _ in ENTITIES.values())
+
+
+class LocalBackend:
+    """Delivers events to subscribers in this process only."""
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def close(self):
+        pass
+
+
+class RedisBackend:
+    """Fans events out to every worker through a Redis pub/sub channel."""
+
+    def __init__(self, url, channel=REDIS_CHANNEL):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('LIVE_UPDATES_REDIS_URL is set but the redis package is not installed')
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self.pubsub = None
+
+    def start(self, deliver):
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(**{self.channel: lambda message: deliver(json.loads(message['data']))})
+        self.thread = self.pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def close(self):
+        if self.pubsub is not None:
+            self.thread.stop()
+            self.pubsub.close()
+
+
+class Subscription:
+    """One open stream: a bounded queue of the events it asked for."""
+
+    def __init__(self, broadcaster, matches):
+        self.broadcaster = broadcaster
+        self.matches = matches
+        self.events = queue.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event):
+        if self.matches is not None and not self.matches(event):
+            return
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True  # the client fell behind; it will be told to re-fetch
+
+    def get(self, timeout=None):
+        """Next event, or None after `timeout` seconds without one."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def reset(self):
+        """Drop queued events after an overflow."""
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                break
+        self.overflowed = False
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broadcaster:
+    """Publishes events through a backend and hands delivered ones to subscribers."""
+
+    def __init__(self, backend=None):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.backend = None
+        self.use(backend or LocalBackend())
+
+    def use(self, backend):
+        """Switch backends (e.g. to Redis at startup)."""
+        if self.backend is not None:
+            self.backend.close()
+        backend.start(self._deliver)
+        self.backend = backend
+
+    def publish(self, event):
+        try:
+            self.backend.publish(event)
+        except Exception as e:
+            # The write is committed already; a lost event only delays a page
+            print(f"Live update not published: {e}")
+
+    def subscribe(self, matches=None):
+        subscription = Subscription(self, matches)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+
+
+broadcaster = Broadcaster()
+
+
+def change_event(change):
+    """Compact event for a cache.Change to a live entity, else None."""
+    if change.model not in ENTITIES:
+        return None
+    name, value_column, keys = ENTITIES[change.model]
+    if change.op == 'bulk':
+        return {'entity': name, 'op': 'bulk'}
+    values = change.values
+    event = {
+        'entity': name,
+        'op': change.op,
+        'id': values['id'],
+        'student_id': values['student_id'],
+        'status': None if change.op == 'delete' else values[value_column],
+        'version': values.get('version'),
+    }
+    for key in keys:
+        value = values.get(key)
+        event[key] = value.isoformat() if hasattr(value, 'isoformat') else value
+    return event
+
+
+@on_commit
+def publish_changes(changes):
+    for change in changes:
+        event = change_event(change)
+        if event is not None:
+            broadcaster.publish(event)
+
+
+def format_event(event, name='change'):
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+
+def live_stream():
+    entities = {e for e in request.args.get('entities', '').split(',') if e} or set(ENTITY_NAMES)
+    unknown = entities - set(ENTITY_NAMES)
+    if unknown:
+        return jsonify({'success': False, 'error': 'Unknown entities: ' + ', '.join(sorted(unknown))}), 400
+    topic_id = request.args.get('topic_id', type=int)
+
+    def matches(event):
+        if event['entity'] not in entities:
+            return False
+        return topic_id is None or event.get('topic_id', topic_id) == topic_id
+
+    subscription = broadcaster.subscribe(matches)
+
+    def stream():
+        with subscription:
+            yield "retry: 3000\n\n"
+            while True:
+                event = subscription.get(timeout=HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    subscription.reset()
+                    yield format_event({}, 'reset')
+                elif event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield format_event(event)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def init_live(app):
+    """Register /api/live and pick the event backend."""
+    redis_url = app.config.get('LIVE_UPDATES_REDIS_URL')
+    if redis_url:
+        broadcaster.use(RedisBackend(redis_url))
+    app.add_url_rule('/api/live', 'live_stream', live_stream)
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for QA Trainings.
+
+Starts a real local server (threaded `flask run`) against the chosen database
+backend and replays a configurable mix of traffic from a pool of client threads:
+- roster: attendance/progress submissions to /topic/<id> (topic_detail)
+- assessment: proficiency edits via POST /api/knowledge-assessment
+- page: page views of the public and report pages
+
+Reports throughput, latency percentiles, error rates and lock/timeout errors
+per operation.
+
+Usage:
+    python load_test.py [--backend sqlite|mysql] [--clients N] [--duration SECONDS] [--mix roster=3,assessment=2,page=5]
+
+Example (SQLite, runs against a migrated throwaway copy of instance/trainings.db):
+    python load_test.py --clients 30 --duration 60
+
+Example with Docker MySQL:
+    python load_test.py --backend mysql --mysql-host localhost --mysql-port 3307
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, text
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+SQLITE_DB_PATH = os.path.join(basedir, 'instance', 'trainings.db')
+
+# Brings the copy of the development database up to the current schema
+# (same order as in MYSQL_SETUP.md)
+MIGRATION_SCRIPTS = [
+    'migrate_add_skill_id.py',
+    'migrate_add_attendance_index.py',
+    'migrate_add_history.py',
+    'migrate_add_versions.py',
+    'migrate_add_skill_targets.py',
+    'migrate_add_cache_version.py',
+    'migrate_add_sync.py',
+    'migrate_add_idempotency.py',
+    'migrate_add_attendance_archive.py',
+    'migrate_add_job_heartbeat.py',
+    'build_search_index.py',
+]
+
+# Server-side error messages that indicate lock contention rather than a bug
+LOCK_ERROR_MARKERS = (
+    'database is locked',
+    'Lock wait timeout exceeded',
+    'Deadlock found',
+)
+
+PAGE_URLS = [
+    '/',
+    '/trainings',
+    '/training/{training_id}',
+    '/topic/{topic_id}',
+    '/student/{student_id}',
+    '/students',
+    '/knowledge-assessment',
+    '/attendance',
+    '/progress',
+]
+
+ATTENDANCE_STATUSES = ['Present', 'Absent', 'Excused']
+PROGRESS_STATUSES = ['Not Started', 'In Progress', 'Completed']
+PROFICIENCY_LEVELS = ['Beginner', 'Intermediate', 'Advance', 'Expert']
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Run a mixed read/write load test against a local server')
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite', help='Database backend (default: sqlite)')
+    parser.add_argument('--database-url', help='Explicit SQLAlchemy URL (overrides --backend; the database is written to!)')
+    parser.add_argument('--mysql-host', default='localhost', help='MySQL host (default: localhost)')
+    parser.add_argument('--mysql-port', type=int, default=3307, help='MySQL port (default: 3307)')
+    parser.add_argument('--mysql-user', default='qa_user', help='MySQL user (default: qa_user)')
+    parser.add_argument('--mysql-password', default='qa_password', help='MySQL password (default: qa_password)')
+    parser.add_argument('--mysql-db', default='qa_trainings', help='MySQL database (default: qa_trainings)')
+    parser.add_argument('--port', type=int, default=0, help='Server port (default: a free port)')
+    parser.add_argument('--clients', type=int, default=30, help='Concurrent client threads (default: 30)')
+    parser.add_argument('--duration', type=float, default=30, help='Test duration in seconds (default: 30)')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds (default: 30)')
+    parser.add_argument('--mix', default='roster=3,assessment=2,page=5',
+                        help='Operation weights (default: roster=3,assessment=2,page=5)')
+    parser.add_argument('--seed', type=int, help='Random seed for a reproducible request sequence')
+    return parser.parse_args()
+
+
+def parse_mix(mix):
+    """Parse 'roster=3,assessment=2,page=5' into a {operation: weight} dict."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('roster', 'assessment', 'page'):
+            raise ValueError(f"Unknown operation in --mix: {name}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("--mix must give at least one operation a positive weight")
+    return weights
+
+
+def resolve_database_url(args, workdir):
+    """Return the database URL the server should use."""
+    if args.database_url:
+        return args.database_url
+    if args.backend == 'mysql':
+        return (f'mysql+pymysql://{args.mysql_user}:{args.mysql_password}'
+                f'@{args.mysql_host}:{args.mysql_port}/{args.mysql_db}')
+    # Never write load-test data into the real development database
+    db_copy = os.path.join(workdir, 'trainings.db')
+    shutil.copyfile(SQLITE_DB_PATH, db_copy)
+    database_url = 'sqlite:///' + db_copy
+    migrate(database_url)
+    return database_url
+
+
+def migrate(database_url):
+    """Run the migration scripts on the database; they are safe to run twice."""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    for script in MIGRATION_SCRIPTS:
+        result = subprocess.run([sys.executable, script], cwd=basedir, env=env, input='yes\n',
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{script} failed:\n{result.stdout}{result.stderr}")
+
+
+def load_fixtures(database_url):
+    """Read the ids the workload needs straight from the database."""
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            fixtures = {
+                'student_ids': [r[0] for r in conn.execute(text("SELECT id FROM student"))],
+                'topic_ids': [r[0] for r in conn.execute(text("SELECT id FROM topic"))],
+                'training_ids': [r[0] for r in conn.execute(text("SELECT id FROM training"))],
+                'skills': [r[0] for r in conn.execute(text("SELECT topic FROM knowledge_skill WHERE is_active = 1"))],
+            }
+    finally:
+        engine.dispose()
+
+    for key, values in fixtures.items():
+        if not values:
+            raise RuntimeError(f"Database has no rows for '{key}' - seed it before load testing")
+    return fixtures
+
+
+def free_port():
+    """Ask the OS for an unused TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url, port, log_file):
+    """Start a threaded Flask server in a subprocess and wait until it accepts connections."""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'run',
+         '--port', str(port), '--with-threads', '--no-reload', '--no-debugger'],
+        cwd=basedir, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Server exited during startup - see the server log")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return server
+        except OSError:
+            time.sleep(0.1)
+
+    server.terminate()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report form redirects as-is instead of following them with a GET."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class LoadClient:
+    """Issues one randomly chosen operation at a time and records the outcome."""
+
+    def __init__(self, base_url, fixtures, weights, timeout, stats, rng):
+        self.base_url = base_url
+        self.fixtures = fixtures
+        self.operations = list(weights)
+        self.weights = [weights[op] for op in self.operations]
+        self.timeout = timeout
+        self.stats = stats
+        self.rng = rng
+        self.opener = urllib.request.build_opener(NoRedirect)
+
+    def run_until(self, deadline):
+        while time.time() < deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            getattr(self, f'do_{operation}')()
+
+    def do_roster(self):
+        topic_id = self.rng.choice(self.fixtures['topic_ids'])
+        if self.rng.random() < 0.5:
+            form = {
+                'action': 'attendance',
+                'date': (date.today() - timedelta(days=self.rng.randrange(90))).isoformat(),
+            }
+            statuses = ATTENDANCE_STATUSES
+        else:
+            form = {'action': 'progress'}
+            statuses = PROGRESS_STATUSES
+        for student_id in self.fixtures['student_ids']:
+            form[f'student_{student_id}'] = self.rng.choice(statuses)
+        self.request('roster', f'/topic/{topic_id}', urllib.parse.urlencode(form).encode(),
+                     'application/x-www-form-urlencoded')
+
+    def do_assessment(self):
+        payload = {
+            'student_id': self.rng.choice(self.fixtures['student_ids']),
+            'topic': self.rng.choice(self.fixtures['skills']),
+            'proficiency_level': self.rng.choice(PROFICIENCY_LEVELS),
+        }
+        self.request('assessment', '/api/knowledge-assessment', json.dumps(payload).encode(), 'application/json')
+
+    def do_page(self):
+        url = self.rng.choice(PAGE_URLS).format(
+            training_id=self.rng.choice(self.fixtures['training_ids']),
+            topic_id=self.rng.choice(self.fixtures['topic_ids']),
+            student_id=self.rng.choice(self.fixtures['student_ids']),
+        )
+        self.request('page', url)
+
+    def request(self, operation, path, body=None, content_type=None):
+        req = urllib.request.Request(self.base_url + path, data=body)
+        if content_type:
+            req.add_header('Content-Type', content_type)
+
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            if not 300 <= e.code < 400:
+                outcome = f'http_{e.code}'
+        except (socket.timeout, TimeoutError):
+            outcome = 'timeout'
+        except urllib.error.URLError as e:
+            outcome = 'timeout' if isinstance(e.reason, (socket.timeout, TimeoutError)) else 'connection'
+        self.stats.record(operation, time.perf_counter() - start, outcome)
+
+
+class Stats:
+    """Thread-safe per-operation latency and outcome counters."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+
+    def record(self, operation, seconds, outcome):
+        with self.lock:
+            self.latencies[operation].append(seconds)
+            self.outcomes[operation][outcome] += 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def count_lock_errors(log_path):
+    """Count lock-contention errors the server logged while handling requests."""
+    counts = defaultdict(int)
+    with open(log_path, errors='replace') as log:
+        for line in log:
+            for marker in LOCK_ERROR_MARKERS:
+                if marker in line:
+                    counts[marker] += 1
+    return counts
+
+
+def print_report(stats, elapsed, lock_errors, database_url, clients):
+    backend = database_url.split(':', 1)[0]
+    total = sum(len(v) for v in stats.latencies.values())
+
+    print("\n" + "=" * 70)
+    print(f"Load Test Results ({backend}, {clients} clients, {elapsed:.1f}s)")
+    print("=" * 70)
+    print(f"{'operation':<12}{'requests':>9}{'req/s':>8}{'errors':>8}{'timeouts':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+
+    for operation in sorted(stats.latencies):
+        latencies = sorted(stats.latencies[operation])
+        outcomes = stats.outcomes[operation]
+        errors = sum(n for outcome, n in outcomes.items() if outcome != 'ok')
+        print(f"{operation:<12}{len(latencies):>9}{len(latencies) / elapsed:>8.1f}"
+              f"{errors / len(latencies):>8.1%}{outcomes.get('timeout', 0):>9}"
+              f"{percentile(latencies, 50) * 1000:>9.1f}{percentile(latencies, 95) * 1000:>9.1f}"
+              f"{percentile(latencies, 99) * 1000:>9.1f}{latencies[-1] * 1000:>9.1f}")
+
+    print(f"\nTotal: {total} requests, {total / elapsed:.1f} req/s")
+
+    error_kinds = defaultdict(int)
+    for outcomes in stats.outcomes.values():
+        for outcome, n in outcomes.items():
+            if outcome != 'ok':
+                error_kinds[outcome] += n
+    if error_kinds:
+        print("Errors: " + ", ".join(f"{kind}={n}" for kind, n in sorted(error_kinds.items())))
+
+    if lock_errors:
+        print("Lock errors (server log): " + ", ".join(f"'{m}'={n}" for m, n in lock_errors.items()))
+    else:
+        print("Lock errors (server log): none")
+
+
+def main():
+    args = parse_args()
+    weights = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix='qa-load-') as workdir:
+        database_url = resolve_database_url(args, workdir)
+        fixtures = load_fixtures(database_url)
+        port = args.port or free_port()
+        log_path = os.path.join(workdir, 'server.log')
+
+        print(f"Starting server on port {port} ({database_url.split(':', 1)[0]})...")
+        with open(log_path, 'w') as log_file:
+            server = start_server(database_url, port, log_file)
+            try:
+                stats = Stats()
+                base_url = f'http://127.0.0.1:{port}'
+                deadline = time.time() + args.duration
+                print(f"Running {args.clients} clients for {args.duration:.0f}s with mix {weights}...")
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=args.clients) as pool:
+                    clients = [LoadClient(base_url, fixtures, weights, args.timeout, stats,
+                                          random.Random(rng.random()))
+                               for _ in range(args.clients)]
+                    for future in [pool.submit(c.run_until, deadline) for c in clients]:
+                        future.result()
+                elapsed = time.perf_counter() - start
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+        print_report(stats, elapsed, count_lock_errors(log_path), database_url, args.clients)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
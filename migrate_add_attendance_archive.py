@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the attendance archive tables.
+
+`flask archive-attendance` moves old attendance into attendance_archive and
+keeps per student / topic totals of it in attendance_archive_rollup (see
+archive.py). Until the tables exist nothing is archived and reports read
+the attendance table alone.
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from config import create_db_app
+from models import db, AttendanceArchive, AttendanceArchiveRollup
+
+app = create_db_app()
+
+
+def migrate_add_attendance_archive():
+    """Create the attendance_archive and attendance_archive_rollup tables"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Attendance Archive")
+        print("=" * 60)
+        print()
+
+        AttendanceArchive.__table__.create(db.engine, checkfirst=True)
+        print("✓ attendance_archive table ready")
+        AttendanceArchiveRollup.__table__.create(db.engine, checkfirst=True)
+        print("✓ attendance_archive_rollup table ready")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_attendance_archive()
+    else:
+        print("Migration cancelled.")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the (topic_id, date, status) index on attendance.
+
+/api/analytics/attendance-trend groups attendance by topic and date; this
+index lets the database answer it without reading the table rows.
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from sqlalchemy import inspect
+
+from config import create_db_app
+from models import db, Attendance
+
+app = create_db_app()
+
+INDEX_NAME = 'ix_attendance_topic_date'
+
+
+def migrate_add_attendance_index():
+    """Create the attendance trend index if it is missing"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Attendance (topic_id, date) Index")
+        print("=" * 60)
+        print()
+
+        existing = {ix['name'] for ix in inspect(db.engine).get_indexes('attendance')}
+        if INDEX_NAME in existing:
+            print(f"✅ {INDEX_NAME} already exists - nothing to do")
+            return
+
+        index = next(ix for ix in Attendance.__table__.indexes if ix.name == INDEX_NAME)
+        index.create(db.engine)
+        print(f"✓ Created {INDEX_NAME}")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_attendance_index()
+    else:
+        print("Migration cancelled.")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the cache_version table.
+
+Every write to a cached model bumps a counter row in cache_version in the
+same transaction, so the other workers notice and reload their copy (see
+VersionTracker in cache.py). Until the table exists each worker only sees
+its own writes.
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from config import create_db_app
+from models import db, CacheVersion
+
+app = create_db_app()
+
+
+def migrate_add_cache_version():
+    """Create the cache_version table"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Cache Version")
+        print("=" * 60)
+        print()
+
+        CacheVersion.__table__.create(db.engine, checkfirst=True)
+        print("✓ cache_version table ready")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_cache_version()
+    else:
+        print("Migration cancelled.")
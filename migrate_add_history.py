@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the attendance / progress / assessment change log.
+
+This script:
+1. Creates the history_event, history_checkpoint and history_checkpoint_row
+   tables
+2. Seeds one event per existing Attendance, Progress and KnowledgeAssessment
+   row, so the log starts from the current state. Attendance is stamped with
+   its session date and assessments with last_updated; progress has no
+   timestamp and is stamped with the time of the migration
+3. Writes a first checkpoint
+
+From then on, ORM writes append events automatically (see history.py).
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from datetime import datetime, time
+
+from config import create_db_app
+from history import create_checkpoint
+from models import db, Attendance, Progress, KnowledgeAssessment, HistoryEvent, HistoryCheckpoint, HistoryCheckpointRow
+
+app = create_db_app()
+
+BATCH_SIZE = 1000
+
+
+def _seed_events(now):
+    events = []
+    for attendance in db.session.query(Attendance.student_id, Attendance.topic_id, Attendance.date, Attendance.status):
+        ts = min(datetime.combine(attendance.date, time.min), now) if attendance.date else now
+        events.append({'ts': ts, 'kind': 'attendance', 'student_id': attendance.student_id,
+                       'ref_id': attendance.topic_id, 'date': attendance.date, 'value': attendance.status})
+    for progress in db.session.query(Progress.student_id, Progress.topic_id, Progress.status):
+        events.append({'ts': now, 'kind': 'progress', 'student_id': progress.student_id,
+                       'ref_id': progress.topic_id, 'date': None, 'value': progress.status})
+    for assessment in db.session.query(KnowledgeAssessment.student_id, KnowledgeAssessment.skill_id,
+                                       KnowledgeAssessment.proficiency_level, KnowledgeAssessment.last_updated):
+        events.append({'ts': min(assessment.last_updated or now, now), 'kind': 'assessment',
+                       'student_id': assessment.student_id, 'ref_id': assessment.skill_id,
+                       'date': None, 'value': assessment.proficiency_level})
+    # Ids must follow timestamps for checkpoint replay
+    events.sort(key=lambda e: e['ts'])
+    return events
+
+
+def migrate_add_history():
+    """Create the history tables, seed them and write the first checkpoint"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Attendance / Progress Change Log")
+        print("=" * 60)
+        print()
+
+        for model in (HistoryEvent, HistoryCheckpoint, HistoryCheckpointRow):
+            model.__table__.create(db.engine, checkfirst=True)
+        print("✓ History tables ready")
+
+        if HistoryEvent.query.first() is not None:
+            print("✅ history_event already has events - nothing to seed")
+            return
+
+        events = _seed_events(datetime.now())
+        connection = db.session.connection()
+        for start in range(0, len(events), BATCH_SIZE):
+            connection.execute(HistoryEvent.__table__.insert(), events[start:start + BATCH_SIZE])
+        db.session.commit()
+        for kind in ('attendance', 'progress', 'assessment'):
+            print(f"  ✓ Seeded {sum(1 for e in events if e['kind'] == kind)} {kind} event(s)")
+
+        checkpoint, counts = create_checkpoint()
+        if checkpoint:
+            print(f"✓ Checkpoint #{checkpoint.id} with {sum(counts.values())} row(s)")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_history()
+    else:
+        print("Migration cancelled.")
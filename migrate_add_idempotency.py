@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the idempotency_key table.
+
+Mutating requests that carry an Idempotency-Key header (or the
+idempotency_key field of the admin forms) record their response there, and
+retries get the recorded response instead of running again (see
+idempotency.py). Until the table exists keys are ignored.
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from config import create_db_app
+from models import db, IdempotencyKey
+
+app = create_db_app()
+
+
+def migrate_add_idempotency():
+    """Create the idempotency_key table"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Idempotency Keys")
+        print("=" * 60)
+        print()
+
+        IdempotencyKey.__table__.create(db.engine, checkfirst=True)
+        print("✓ idempotency_key table ready")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_idempotency()
+    else:
+        print("Migration cancelled.")
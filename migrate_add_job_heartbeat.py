@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the job heartbeat.
+
+Running jobs get their heartbeat_at refreshed by the process executing
+them; jobs whose heartbeat goes stale (the worker crashed or was
+restarted) are marked failed instead of showing `running` forever (see
+jobs.py).
+
+This script:
+1. Creates the job table if it does not exist yet
+2. Adds the nullable `heartbeat_at` column to an existing job table
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from sqlalchemy import inspect, text
+
+from config import create_db_app
+from models import db, Job
+
+app = create_db_app()
+
+
+def migrate_add_job_heartbeat():
+    """Add job.heartbeat_at"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Job Heartbeat")
+        print("=" * 60)
+        print()
+
+        Job.__table__.create(db.engine, checkfirst=True)
+        print("✓ job table ready")
+
+        columns = {c['name'] for c in inspect(db.engine).get_columns('job')}
+        if 'heartbeat_at' in columns:
+            print("✅ job already has heartbeat_at - nothing to do")
+        else:
+            db.session.execute(text("ALTER TABLE job ADD COLUMN heartbeat_at DATETIME"))
+            db.session.commit()
+            print("✓ Added job.heartbeat_at")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_job_heartbeat()
+    else:
+        print("Migration cancelled.")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Migration script to link knowledge assessments to skills by id.
+
+KnowledgeAssessment used to store the skill name in a free-text `topic`
+column. This script:
+1. Creates an inactive KnowledgeSkill for every assessment topic that has no
+   matching skill, so no assessment is lost
+2. Rebuilds knowledge_assessment with a `skill_id` foreign key and a unique
+   (student_id, skill_id) index, backfilled by joining on the skill name
+3. Keeps only the most recently updated assessment when a student has
+   several for the same skill
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from sqlalchemy import inspect, text
+
+from config import create_db_app
+from models import db, KnowledgeAssessment, KnowledgeSkill
+
+app = create_db_app()
+
+
+def migrate_add_skill_id():
+    """Replace KnowledgeAssessment.topic with a skill_id foreign key"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Link Knowledge Assessments to Skills by ID")
+        print("=" * 60)
+        print()
+
+        columns = {c['name'] for c in inspect(db.engine).get_columns('knowledge_assessment')}
+        if 'skill_id' in columns:
+            print("✅ knowledge_assessment already has skill_id - nothing to do")
+            return
+
+        total_before = db.session.execute(text("SELECT COUNT(*) FROM knowledge_assessment")).scalar()
+        print(f"📊 Assessments before migration: {total_before}")
+        print()
+
+        # Step 1: Make sure every assessment topic has a skill row
+        print("Step 1: Creating skills for orphaned assessment topics...")
+        orphan_topics = [row[0] for row in db.session.execute(text("""
+            SELECT DISTINCT a.topic FROM knowledge_assessment a
+            LEFT JOIN knowledge_skill s ON s.topic = a.topic
+            WHERE s.id IS NULL
+        """))]
+        max_order = db.session.query(db.func.max(KnowledgeSkill.order)).scalar() or 0
+        for offset, topic in enumerate(orphan_topics, start=1):
+            db.session.add(KnowledgeSkill(topic=topic, order=max_order + offset, is_active=False))
+            print(f"  + {topic} (inactive)")
+        db.session.commit()
+        print(f"  ✓ Created {len(orphan_topics)} inactive skill(s)")
+        print()
+
+        # Step 2: Rebuild the table with the new schema
+        print("Step 2: Rebuilding knowledge_assessment with skill_id...")
+        db.session.execute(text("ALTER TABLE knowledge_assessment RENAME TO knowledge_assessment_old"))
+        db.session.commit()
+        KnowledgeAssessment.__table__.create(db.engine)
+        print("  ✓ Created new table with (student_id, skill_id) unique index")
+        print()
+
+        # Step 3: Backfill, keeping the latest assessment per (student, skill)
+        print("Step 3: Backfilling skill_id and removing duplicates...")
+        db.session.execute(text("""
+            INSERT INTO knowledge_assessment (id, student_id, skill_id, proficiency_level, last_updated)
+            SELECT a.id, a.student_id, s.id, a.proficiency_level, a.last_updated
+            FROM knowledge_assessment_old a
+            JOIN knowledge_skill s ON s.topic = a.topic
+            WHERE a.id = (
+                SELECT b.id FROM knowledge_assessment_old b
+                WHERE b.student_id = a.student_id AND b.topic = a.topic
+                ORDER BY b.last_updated DESC, b.id DESC
+                LIMIT 1
+            )
+        """))
+        db.session.execute(text("DROP TABLE knowledge_assessment_old"))
+        db.session.commit()
+
+        total_after = db.session.execute(text("SELECT COUNT(*) FROM knowledge_assessment")).scalar()
+        print(f"  ✓ Migrated {total_after} assessment(s)")
+        print(f"  ✓ Removed {total_before - total_after} duplicate(s)")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_skill_id()
+    else:
+        print("Migration cancelled.")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Migration script to add per-skill target levels.
+
+Adds a nullable `target_level` column to knowledge_skill. Skills without a
+target use DEFAULT_TARGET_LEVEL in the skill-gap analysis (/api/skill-gaps);
+targets can be set from the Manage Skills dialog on the Knowledge page.
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from sqlalchemy import inspect, text
+
+from config import create_db_app
+from models import db
+
+app = create_db_app()
+
+
+def migrate_add_skill_targets():
+    """Add knowledge_skill.target_level"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Skill Target Levels")
+        print("=" * 60)
+        print()
+
+        columns = {c['name'] for c in inspect(db.engine).get_columns('knowledge_skill')}
+        if 'target_level' in columns:
+            print("✅ knowledge_skill already has target_level - nothing to do")
+            return
+
+        db.session.execute(text("ALTER TABLE knowledge_skill ADD COLUMN target_level VARCHAR(50)"))
+        db.session.commit()
+        print("✓ Added knowledge_skill.target_level")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_skill_targets()
+    else:
+        print("Migration cancelled.")
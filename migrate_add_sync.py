@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Migration script for offline roster sync (/api/sync).
+
+This script:
+1. Adds a nullable `updated_at` column (UTC) to attendance and progress. Sync
+   uses it for last-writer-wins; existing rows have no timestamp, so the
+   first synced change to them always applies
+2. Creates the sync_receipt table that remembers idempotency keys
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from sqlalchemy import inspect, text
+
+from config import create_db_app
+from models import db, SyncReceipt
+
+app = create_db_app()
+
+TIMESTAMPED_TABLES = ('attendance', 'progress')
+
+
+def migrate_add_sync():
+    """Add updated_at columns and the sync_receipt table"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Offline Roster Sync")
+        print("=" * 60)
+        print()
+
+        inspector = inspect(db.engine)
+        for table in TIMESTAMPED_TABLES:
+            columns = {c['name'] for c in inspector.get_columns(table)}
+            if 'updated_at' in columns:
+                print(f"✅ {table} already has updated_at - nothing to do")
+                continue
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME"))
+            db.session.commit()
+            print(f"✓ Added {table}.updated_at")
+
+        SyncReceipt.__table__.create(db.engine, checkfirst=True)
+        print("✓ sync_receipt table ready")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_sync()
+    else:
+        print("Migration cancelled.")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Migration script to add row versions for optimistic concurrency.
+
+Adds a `version` column (INTEGER NOT NULL DEFAULT 1) to knowledge_assessment,
+progress and attendance. SQLAlchemy bumps it on every update and refuses to
+overwrite a row that changed since it was read; the APIs and forms use it to
+answer 409 instead of silently losing an edit (see concurrency.py).
+
+Works on both SQLite and MySQL and is safe to run twice.
+"""
+
+from sqlalchemy import inspect, text
+
+from config import create_db_app
+from models import db
+
+app = create_db_app()
+
+VERSIONED_TABLES = ('knowledge_assessment', 'progress', 'attendance')
+
+
+def migrate_add_versions():
+    """Add a version column to the versioned tables"""
+
+    with app.app_context():
+        print("=" * 60)
+        print("Migration: Row Versions")
+        print("=" * 60)
+        print()
+
+        inspector = inspect(db.engine)
+        for table in VERSIONED_TABLES:
+            columns = {c['name'] for c in inspector.get_columns(table)}
+            if 'version' in columns:
+                print(f"✅ {table} already has version - nothing to do")
+                continue
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+            db.session.commit()
+            print(f"✓ Added {table}.version")
+        print()
+
+        print("=" * 60)
+        print("Migration Complete!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    response = input("This will modify the database structure. Continue? (yes/no): ")
+    if response.lower() == 'yes':
+        migrate_add_versions()
+    else:
+        print("Migration cancelled.")
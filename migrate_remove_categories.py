@@ -8,10 +8,12 @@ This script:
 3. Updates the unique constraint
 """
 
-from app import app, db
-from models import KnowledgeSkill, KnowledgeAssessment
+from config import create_db_app
+from models import db, KnowledgeSkill, KnowledgeAssessment
 from sqlalchemy import text
 
+app = create_db_app()
+
 def migrate_remove_categories():
     """Remove categories from knowledge assessment system"""
     
@@ -1,6 +1,21 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Proficiency levels for knowledge assessments, lowest first
+PROFICIENCY_LEVELS = ['Beginner', 'Intermediate', 'Advance', 'Expert']
+
+# Level students are expected to reach in a skill unless it sets its own target
+DEFAULT_TARGET_LEVEL = 'Advance'
+
+
+def utcnow():
+    """Naive UTC timestamp, comparable with client timestamps sent to /api/sync"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 # Association table for many-to-many relationship between Training and Instructor
 training_instructors = db.Table('training_instructors',
@@ -48,20 +63,75 @@ class Attendance(db.Model):
     topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), nullable=False)
     date = db.Column(db.Date)
     status = db.Column(db.String(20))  # Present, Absent, Excused
+    updated_at = db.Column(db.DateTime, default=utcnow, onupdate=utcnow)  # UTC; last-writer-wins order (sync.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # see concurrency.py
+
+    __table_args__ = (
+        # Covers the attendance trend GROUP BY (see analytics.py)
+        db.Index('ix_attendance_topic_date', 'topic_id', 'date', 'status'),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
+class AttendanceArchive(db.Model):
+    """Attendance moved out of the hot table by archive.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    attendance_id = db.Column(db.Integer, nullable=False)  # id the row had in attendance
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), nullable=False)
+    date = db.Column(db.Date)
+    status = db.Column(db.String(20))
+    updated_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_attendance_archive_topic_date', 'topic_id', 'date', 'status'),
+        db.Index('ix_attendance_archive_student', 'student_id'),
+    )
+
+class AttendanceArchiveRollup(db.Model):
+    """Per student and topic totals of the archived attendance, and its latest record"""
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), primary_key=True)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    excused = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    last_id = db.Column(db.Integer, nullable=False)  # attendance id of the latest record, by (date, id)
+    last_date = db.Column(db.Date)
+    last_status = db.Column(db.String(20))
 
 class Progress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), nullable=False)
     status = db.Column(db.String(20))  # Not Started, In Progress, Completed
+    updated_at = db.Column(db.DateTime, default=utcnow, onupdate=utcnow)  # UTC; last-writer-wins order (sync.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # see concurrency.py
+
+    __mapper_args__ = {'version_id_col': version}
 
 class KnowledgeAssessment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
-    topic = db.Column(db.String(200), nullable=False)  # e.g., "Automation - Python - Testing level", "Performance - K6"
+    skill_id = db.Column(db.Integer, db.ForeignKey('knowledge_skill.id'), nullable=False)
     proficiency_level = db.Column(db.String(50), nullable=False)  # Beginner, Intermediate, Advance, Expert
     last_updated = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # see concurrency.py
     student = db.relationship('Student', backref='knowledge_assessments', lazy=True)
+    # Joined so that .topic never costs an extra query per assessment
+    skill = db.relationship('KnowledgeSkill', backref=db.backref('assessments', lazy='dynamic'), lazy='joined')
+
+    # One assessment per student and skill
+    __table_args__ = (
+        db.Index('ix_knowledge_assessment_student_skill', 'student_id', 'skill_id', unique=True),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
+    @property
+    def topic(self):
+        """Skill name, kept for callers written against the old free-text column"""
+        return self.skill.topic if self.skill else None
 
 class KnowledgeSkill(db.Model):
     """Defines available skills/topics that can be assessed"""
@@ -69,6 +139,7 @@ class KnowledgeSkill(db.Model):
     topic = db.Column(db.String(200), nullable=False, unique=True)
     order = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
+    target_level = db.Column(db.String(50))  # One of PROFICIENCY_LEVELS; NULL means DEFAULT_TARGET_LEVEL
     created_at = db.Column(db.DateTime, default=db.func.now())
 
 class Certificate(db.Model):
@@ -108,3 +179,90 @@ class Certificate(db.Model):
     student = db.relationship('Student', backref='certificates', lazy=True)
     training = db.relationship('Training', backref='certificates', lazy=True)
 
+
+class CacheVersion(db.Model):
+    """Version counter per process-local cache, so other workers can spot stale copies"""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class Job(db.Model):
+    """Background job run by the in-app job runner (see jobs.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, cancelled
+    params = db.Column(db.Text)  # JSON
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    message = db.Column(db.String(500))
+    result = db.Column(db.Text)  # JSON summary returned by the job
+    artifact_path = db.Column(db.String(500))
+    cancel_requested = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # refreshed while running; a stale one means the worker died
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_job_created_at', 'created_at'),
+    )
+
+class HistoryEvent(db.Model):
+    """Append-only log of attendance, progress and assessment changes (see history.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    ts = db.Column(db.DateTime, nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # attendance, progress, assessment
+    student_id = db.Column(db.Integer, nullable=False)
+    ref_id = db.Column(db.Integer, nullable=False)  # topic_id, or skill_id for assessments
+    date = db.Column(db.Date)  # attendance date; part of the attendance key
+    value = db.Column(db.String(50))  # new status / level, NULL when the record was deleted
+
+    __table_args__ = (
+        db.Index('ix_history_event_entity_ts', 'kind', 'student_id', 'ref_id', 'ts'),
+        db.Index('ix_history_event_kind_ts', 'kind', 'ts'),
+    )
+
+class HistoryCheckpoint(db.Model):
+    """Materialized state of every entity from the events stamped up to (and including) ts"""
+    id = db.Column(db.Integer, primary_key=True)
+    ts = db.Column(db.DateTime, nullable=False)  # replay continues with events stamped after this
+    last_event_id = db.Column(db.Integer, nullable=False)  # newest event id included, for reference
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+class HistoryCheckpointRow(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    checkpoint_id = db.Column(db.Integer, db.ForeignKey('history_checkpoint.id'), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    ref_id = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.Date)
+    value = db.Column(db.String(50), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_history_checkpoint_row_entity', 'checkpoint_id', 'kind', 'student_id', 'ref_id'),
+    )
+
+class SyncReceipt(db.Model):
+    """Idempotency key of a change already received by /api/sync (see sync.py)"""
+    key = db.Column(db.String(64), primary_key=True)
+    result = db.Column(db.String(20), nullable=False)  # applied, stale, invalid
+    received_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    __table_args__ = (
+        db.Index('ix_sync_receipt_received_at', 'received_at'),
+    )
+
+class IdempotencyKey(db.Model):
+    """Response recorded for an Idempotency-Key, replayed on retries (see idempotency.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False)
+    scope = db.Column(db.String(255), nullable=False)  # "METHOD /path" the key was used on
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the request
+    status_code = db.Column(db.Integer)  # NULL while the first request is still running
+    headers = db.Column(db.Text)  # JSON: Content-Type, Location
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_idempotency_key_scope', 'key', 'scope', unique=True),
+        db.Index('ix_idempotency_key_expires_at', 'expires_at'),
+    )
@@ -0,0 +1,230 @@
+"""
+Public pages: home, trainings and topics, the topic roster, attendance and
+progress analytics, and student profiles.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, redirect, url_for, abort
+from sqlalchemy.orm.exc import StaleDataError
+
+from archive import ArchiveError, check_not_archived
+from models import db, Training, Student, Attendance, Progress, Instructor, Certificate
+from reference import reference, get_training_or_404, get_topic_or_404
+from student_profiles import get_student_profile
+from concurrency import apply_roster
+from api import attendance_matrix, progress_matrix
+
+bp = Blueprint('public', __name__)
+
+MAX_ROSTER_ATTEMPTS = 2
+
+@bp.route('/')
+def index():
+    trainings = reference().trainings
+    instructors = Instructor.query.filter_by(is_active=True).limit(3).all()
+    
+    # Get students for the partners slider (latest 8 students)
+    students = Student.query.order_by(Student.id.desc()).limit(8).all()
+
+    # Get real statistics from database
+    total_students = Student.query.count()
+    total_trainings = len(trainings)
+    total_certificates = Certificate.query.filter_by(is_issued=True).count()
+
+    # Calculate completion rate
+    total_progress = Progress.query.count()
+    completed_progress = Progress.query.filter_by(status='Completed').count()
+    completion_rate = int((completed_progress / total_progress * 100)) if total_progress > 0 else 0
+
+    return render_template('index_new.html',
+                         trainings=trainings,
+                         instructors=instructors,
+                         students=students,
+                         total_students=total_students,
+                         total_trainings=total_trainings,
+                         completion_rate=completion_rate,
+                         total_certificates=total_certificates)
+
+@bp.route('/trainings')
+def trainings():
+    trainings_list = reference().trainings
+    return render_template('trainings.html', trainings=trainings_list)
+
+@bp.route('/training/<int:training_id>')
+def training_detail(training_id):
+    training = Training.query.get_or_404(training_id)  # ORM object: the page lists its instructors
+    topics = sorted(get_training_or_404(training_id).topics, key=lambda t: t.order or 0)
+    
+    # Group topics by phase
+    phases = OrderedDict()
+    for topic in topics:
+        phase = topic.phase if topic.phase else 'Other'
+        if phase not in phases:
+            phases[phase] = []
+        phases[phase].append(topic)
+    
+    return render_template('training.html', training=training, phases=phases)
+
+@bp.route('/topic/<int:topic_id>', methods=['GET', 'POST'])
+def topic_detail(topic_id):
+    topic = get_topic_or_404(topic_id)
+    
+    if request.method == 'POST':
+        action = request.form.get('action')
+
+        if action == 'attendance':
+            date = datetime.strptime(request.form.get('date'), '%Y-%m-%d').date()
+            conflicts = save_attendance(request.form, topic_id, date)
+            if conflicts:
+                return render_topic(topic, attendance_date=date, attendance_conflicts=conflicts)
+
+        elif action == 'progress':
+            conflicts = save_roster(
+                request.form,
+                lambda: Progress.query.filter_by(topic_id=topic_id),
+                lambda student_id, status: Progress(student_id=student_id, topic_id=topic_id, status=status),
+            )
+            if conflicts:
+                return render_topic(topic, progress_conflicts=conflicts)
+
+        return redirect(url_for('public.topic_detail', topic_id=topic_id))
+
+    return render_topic(topic)
+
+def render_topic(topic, attendance_date=None, attendance_conflicts=None, progress_conflicts=None):
+    """The topic page; with conflicts, the rejected form is shown again with a 409."""
+    attendance_conflicts, progress_conflicts = attendance_conflicts or {}, progress_conflicts or {}
+    attendance_map, attendance_versions = {}, {}
+    if attendance_conflicts:
+        records = Attendance.query.filter_by(topic_id=topic.id, date=attendance_date).all()
+        attendance_map = {r.student_id: r.status for r in records}
+        attendance_versions = {r.student_id: r.version for r in records}
+        # Keep the user's choice so saving again overwrites
+        attendance_map.update({sid: c['submitted'] for sid, c in attendance_conflicts.items()})
+
+    students = Student.query.all()
+    
+    # Get progress for this topic to pre-fill form
+    progress_map, progress_versions = {}, {}
+    progress_records = Progress.query.filter_by(topic_id=topic.id).all()
+    for record in progress_records:
+        progress_map[record.student_id] = record.status
+        progress_versions[record.student_id] = record.version
+    progress_map.update({sid: c['submitted'] for sid, c in progress_conflicts.items()})
+
+    status = 409 if attendance_conflicts or progress_conflicts else 200
+    return render_template('topic.html', topic=topic, students=students,
+                           progress_map=progress_map, progress_versions=progress_versions,
+                           progress_conflicts=progress_conflicts,
+                           attendance_date=attendance_date, attendance_map=attendance_map,
+                           attendance_versions=attendance_versions,
+                           attendance_conflicts=attendance_conflicts), status
+
+def save_attendance(form, topic_id, date):
+    """Save an attendance roster for one topic and date; returns the conflicting rows."""
+    try:
+        check_not_archived(topic_id, date)
+    except ArchiveError as e:
+        abort(400, description=str(e))
+    return save_roster(
+        form,
+        lambda: Attendance.query.filter_by(topic_id=topic_id, date=date),
+        lambda student_id, status: Attendance(student_id=student_id, topic_id=topic_id, date=date, status=status),
+    )
+
+def save_roster(form, roster_query, create):
+    """Save a roster form with version checks; returns the conflicting rows (see concurrency.py).
+
+    Nothing is saved when conflicts are returned for a form that kept racing
+    other writers, so the caller must show them rather than report success.
+    """
+    def get_status(record):
+        return record.status
+
+    def set_status(record, status):
+        record.status = status
+
+    def add(student_id, status):
+        record = create(student_id, status)
+        db.session.add(record)
+        return record
+
+    for attempt in range(MAX_ROSTER_ATTEMPTS):
+        existing = {r.student_id: r for r in roster_query().all()}
+        conflicts = apply_roster(form, existing, get_status, set_status, add)
+        try:
+            db.session.commit()
+            return conflicts
+        except StaleDataError:
+            # A row changed between our read and the UPDATE; re-check the form against fresh data
+            db.session.rollback()
+
+    # Still racing: nothing was saved, so every row that differs is shown again
+    existing = {r.student_id: r.status for r in roster_query().all()}
+    submitted = ((int(key.split('_')[1]), value) for key, value in form.items() if key.startswith('student_'))
+    return {student_id: {'current': existing.get(student_id), 'submitted': value}
+            for student_id, value in submitted if existing.get(student_id) != value}
+
+@bp.route('/attendance', methods=['GET', 'POST'])
+def attendance():
+    if request.method == 'POST':
+        topic = get_topic_or_404(request.form.get('topic_id', type=int))
+        date = datetime.strptime(request.form.get('date'), '%Y-%m-%d').date()
+        
+        # Updates existing records and adds the missing ones, like the topic page
+        conflicts = save_attendance(request.form, topic.id, date)
+        if conflicts:
+            return render_topic(topic, attendance_date=date, attendance_conflicts=conflicts)
+        return redirect(url_for('public.attendance'))
+
+    students = db.session.query(Student.id, Student.name).all()
+    trainings = reference().trainings
+    
+    # Only the training asked for in ?training_id= is embedded; the page
+    # fetches the others from /api/attendance/training/<id> when picked
+    selected = reference().training_by_id.get(request.args.get('training_id', type=int))
+    attendance_data = {}
+    if selected is not None:
+        attendance_data[selected.id] = attendance_matrix(selected, [s.id for s in students])
+    
+    return render_template('attendance.html', 
+                         trainings=trainings, 
+                         selected_id=selected.id if selected else None,
+                         attendance_data=attendance_data,
+                         students_json=[{'id': s.id, 'name': s.name} for s in students])
+
+@bp.route('/progress')
+def progress():
+    trainings = reference().trainings
+    students = db.session.query(Student.id, Student.name).all()
+    
+    # Like attendance(): only the ?training_id= one is embedded, the rest are fetched on demand
+    selected = reference().training_by_id.get(request.args.get('training_id', type=int))
+    progress_data = {}
+    if selected is not None:
+        progress_data[selected.id] = progress_matrix(selected, [s.id for s in students])
+    
+    return render_template('progress.html', 
+                         trainings=trainings,
+                         selected_id=selected.id if selected else None,
+                         students=[{'id': s.id, 'name': s.name} for s in students],
+                         progress_data=progress_data)
+
+@bp.route('/student/<int:student_id>')
+def student_profile(student_id):
+    profile = get_student_profile(student_id)
+    if profile is None:
+        abort(404)
+
+    return render_template('student_profile.html', 
+                         student=profile['student'], 
+                         trainings=profile['trainings'],
+                         stats=profile['stats'],
+                         assessments_list=profile['assessments'])
+
+@bp.route('/students')
+def students_list():
+    students = Student.query.order_by(Student.name).all()
+    return render_template('students.html', students=students)
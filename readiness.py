@@ -0,0 +1,237 @@
+"""
+Staffing readiness scores combining progress, attendance and knowledge.
+
+Three matrices are loaded with one query each and kept as NumPy arrays:
+    progress   - student x topic, 1 Completed, 0.5 In Progress, else 0
+    attendance - student x topic, present and recorded session counts
+    knowledge  - student x skill, (level index + 1) / len(PROFICIENCY_LEVELS),
+                 0 when not assessed
+Each component becomes a 0-100 score per student, the readiness score is
+their weighted mean and the percentile is its rank among all students, all
+computed for every student at once with array operations.
+
+    /readiness      - sortable table with weight and filter controls
+    /api/readiness  - the scores as JSON
+
+Query parameters:
+    training_id                             - only this training's topics
+    skills                                  - comma-separated skill ids to
+                                              score knowledge on (default all)
+    w_progress, w_attendance, w_knowledge   - weights (default 40/20/40)
+    sort, order, limit                      - ordering of the result
+
+Attendance counts add the archived totals from attendance_archive_rollup to
+the attendance table (see archive.py). Loaded matrices are cached per training and dropped when progress,
+attendance, assessments, students, topics or skills change.
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from flask import render_template, request, jsonify
+from sqlalchemy import select, func, case
+
+from archive import has_archived
+from cache import LRUCache, VersionTracker, on_commit
+from models import (db, Topic, Student, Attendance, AttendanceArchiveRollup, Progress, KnowledgeAssessment,
+                    KnowledgeSkill, PROFICIENCY_LEVELS)
+from reference import reference
+from replicas import primary_reads
+
+PROGRESS_VALUES = {'Completed': 1.0, 'In Progress': 0.5}
+COMPONENTS = ('progress', 'attendance', 'knowledge')
+DEFAULT_WEIGHTS = {'progress': 40.0, 'attendance': 20.0, 'knowledge': 40.0}
+SORT_COLUMNS = COMPONENTS + ('readiness', 'percentile', 'name')
+
+Matrices = namedtuple('Matrices', ['student_ids', 'names', 'topic_ids', 'skill_ids',
+                                   'progress', 'present', 'recorded', 'knowledge'])
+
+matrix_cache = LRUCache(16, ttl=300)
+tracker = VersionTracker('readiness', [Student, Topic, Attendance, AttendanceArchiveRollup, Progress,
+                                      KnowledgeAssessment, KnowledgeSkill])
+
+
+class ReadinessError(ValueError):
+    """Invalid readiness parameters."""
+
+
+def _positions(index, values):
+    """Row/column positions of ids in `index`, -1 where absent."""
+    return index.get_indexer(np.asarray(values, dtype=np.int64)) if len(values) else np.empty(0, dtype=np.int64)
+
+
+def load_matrices(training_id=None):
+    """Read the student x topic and student x skill matrices."""
+    students = db.session.execute(select(Student.id, Student.name).order_by(Student.id)).all()
+    student_ids = pd.Index([s.id for s in students], dtype=np.int64)
+
+    topic_stmt = select(Topic.id).order_by(Topic.id)
+    if training_id:
+        topic_stmt = topic_stmt.where(Topic.training_id == training_id)
+    topic_ids = pd.Index(db.session.execute(topic_stmt).scalars().all(), dtype=np.int64)
+    skill_ids = pd.Index(db.session.execute(
+        select(KnowledgeSkill.id).where(KnowledgeSkill.is_active.is_(True)).order_by(KnowledgeSkill.order, KnowledgeSkill.id)
+    ).scalars().all(), dtype=np.int64)
+
+    shape = (len(student_ids), len(topic_ids))
+    progress = np.zeros(shape, dtype=np.float32)
+    present = np.zeros(shape, dtype=np.int32)
+    recorded = np.zeros(shape, dtype=np.int32)
+    knowledge = np.zeros((len(student_ids), len(skill_ids)), dtype=np.float32)
+
+    def scoped(stmt, topic_column):
+        return stmt.where(topic_column.in_(select(Topic.id).where(Topic.training_id == training_id))) \
+            if training_id else stmt
+
+    rows = pd.DataFrame(db.session.execute(scoped(
+        select(Progress.student_id, Progress.topic_id, Progress.status), Progress.topic_id
+    )).all(), columns=['student_id', 'topic_id', 'status'])
+    rows_idx, cols_idx = _positions(student_ids, rows.student_id), _positions(topic_ids, rows.topic_id)
+    keep = (rows_idx >= 0) & (cols_idx >= 0)
+    values = rows.status.map(PROGRESS_VALUES).fillna(0).to_numpy(dtype=np.float32)
+    np.maximum.at(progress, (rows_idx[keep], cols_idx[keep]), values[keep])
+
+    rows = pd.DataFrame(db.session.execute(scoped(
+        select(Attendance.student_id, Attendance.topic_id,
+               func.sum(case((Attendance.status == 'Present', 1), else_=0)), func.count())
+        .group_by(Attendance.student_id, Attendance.topic_id), Attendance.topic_id
+    )).all(), columns=['student_id', 'topic_id', 'present', 'recorded'])
+    if has_archived(training_id):
+        archived = pd.DataFrame(db.session.execute(scoped(
+            select(AttendanceArchiveRollup.student_id, AttendanceArchiveRollup.topic_id,
+                   AttendanceArchiveRollup.present, AttendanceArchiveRollup.total), AttendanceArchiveRollup.topic_id
+        )).all(), columns=rows.columns)
+        rows = pd.concat([rows, archived]).groupby(['student_id', 'topic_id'], as_index=False).sum()
+    rows_idx, cols_idx = _positions(student_ids, rows.student_id), _positions(topic_ids, rows.topic_id)
+    keep = (rows_idx >= 0) & (cols_idx >= 0)
+    present[rows_idx[keep], cols_idx[keep]] = rows.present.to_numpy()[keep]
+    recorded[rows_idx[keep], cols_idx[keep]] = rows.recorded.to_numpy()[keep]
+
+    level_scores = {level: (i + 1) / len(PROFICIENCY_LEVELS) for i, level in enumerate(PROFICIENCY_LEVELS)}
+    rows = pd.DataFrame(db.session.execute(
+        select(KnowledgeAssessment.student_id, KnowledgeAssessment.skill_id, KnowledgeAssessment.proficiency_level)
+    ).all(), columns=['student_id', 'skill_id', 'level'])
+    rows_idx, cols_idx = _positions(student_ids, rows.student_id), _positions(skill_ids, rows.skill_id)
+    keep = (rows_idx >= 0) & (cols_idx >= 0)
+    knowledge[rows_idx[keep], cols_idx[keep]] = rows.level.map(level_scores).fillna(0).to_numpy(dtype=np.float32)[keep]
+
+    return Matrices(student_ids, [s.name for s in students], topic_ids, skill_ids,
+                    progress, present, recorded, knowledge)
+
+
+def get_matrices(training_id=None):
+    if tracker.is_stale():
+        matrix_cache.clear()
+        tracker.mark_loaded(tracker.read_version())
+    matrices = matrix_cache.get(training_id)
+    if matrices is None:
+        # Cached until the primary's version moves, so load from the primary
+        with primary_reads():
+            matrices = load_matrices(training_id)
+        matrix_cache.set(training_id, matrices)
+    return matrices
+
+
+@on_commit
+def invalidate_matrices(changes):
+    """Drop cached matrices when any scored data changes."""
+    if any(change.model is None or issubclass(change.model, tracker.models) for change in changes):
+        matrix_cache.clear()
+
+
+def score(matrices, weights=None, skill_ids=None):
+    """DataFrame of component scores, readiness and percentile (0-100) per student."""
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    n = len(matrices.student_ids)
+
+    progress = matrices.progress.mean(axis=1) if matrices.progress.shape[1] else np.zeros(n)
+    recorded = matrices.recorded.sum(axis=1)
+    attendance = np.divide(matrices.present.sum(axis=1), recorded,
+                           out=np.zeros(n), where=recorded > 0)
+    knowledge = matrices.knowledge
+    if skill_ids:
+        knowledge = knowledge[:, matrices.skill_ids.isin(skill_ids)]
+    knowledge = knowledge.mean(axis=1) if knowledge.shape[1] else np.zeros(n)
+
+    components = np.vstack([progress, attendance, knowledge]) * 100
+    w = np.array([weights[name] for name in COMPONENTS], dtype=np.float64)
+    readiness = w @ components / w.sum() if w.sum() > 0 else np.zeros(n)
+
+    frame = pd.DataFrame({
+        'id': matrices.student_ids.to_numpy(),
+        'name': matrices.names,
+        'progress': components[0],
+        'attendance': components[1],
+        'knowledge': components[2],
+        'readiness': readiness,
+    })
+    frame['percentile'] = frame.readiness.rank(method='max', pct=True) * 100
+    return frame.round({name: 1 for name in COMPONENTS + ('readiness', 'percentile')})
+
+
+def parse_readiness_params(values):
+    def number(name, cast=float):
+        value = values.get(name)
+        try:
+            return cast(value) if value not in (None, '') else None
+        except ValueError:
+            raise ReadinessError(f'{name} must be a number')
+
+    weights = {}
+    for name in COMPONENTS:
+        weight = number(f'w_{name}')
+        if weight is not None:
+            if not math.isfinite(weight) or weight < 0:
+                raise ReadinessError('Weights must be non-negative numbers')
+            weights[name] = weight
+    if not any(dict(DEFAULT_WEIGHTS, **weights).values()):
+        raise ReadinessError('At least one weight must be above zero')
+    limit = number('limit', int)
+    if limit is not None and limit < 1:
+        raise ReadinessError('limit must be a positive integer')
+    try:
+        skill_ids = [int(s) for s in values.get('skills', '').split(',') if s.strip()]
+    except ValueError:
+        raise ReadinessError('skills must be a comma-separated list of ids')
+    sort = values.get('sort', 'readiness')
+    if sort not in SORT_COLUMNS:
+        raise ReadinessError('sort must be one of: ' + ', '.join(SORT_COLUMNS))
+    return {
+        'training_id': number('training_id', int),
+        'skill_ids': skill_ids,
+        'weights': weights,
+        'sort': sort,
+        'ascending': values.get('order', 'asc' if sort == 'name' else 'desc') == 'asc',
+        'limit': limit,
+    }
+
+
+def readiness_api():
+    try:
+        params = parse_readiness_params(request.args)
+    except ReadinessError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    frame = score(get_matrices(params['training_id']), params['weights'], params['skill_ids'])
+    frame = frame.sort_values([params['sort'], 'name'], ascending=[params['ascending'], True], kind='stable')
+    if params['limit']:
+        frame = frame.head(params['limit'])
+    return jsonify({
+        'success': True,
+        'weights': dict(DEFAULT_WEIGHTS, **params['weights']),
+        'students': frame.to_dict('records'),
+    })
+
+
+def readiness_page():
+    trainings = sorted(reference().trainings, key=lambda t: t.name)
+    skills = reference().active_skills
+    return render_template('readiness.html', trainings=trainings, skills=skills, weights=DEFAULT_WEIGHTS)
+
+
+def init_readiness(app):
+    """Register the /readiness page and /api/readiness endpoint."""
+    app.add_url_rule('/readiness', 'readiness', readiness_page)
+    app.add_url_rule('/api/readiness', 'readiness_api', readiness_api)
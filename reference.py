@@ -0,0 +1,142 @@
+"""
+Read-through cache of the reference tables: trainings, topics and skills.
+
+These rows change rarely but are listed by almost every page. `reference()`
+returns an immutable snapshot of all three tables as namedtuples (never
+session-bound ORM objects, so they are safe to share between threads and
+requests):
+
+    ref = reference()
+    ref.trainings               # TrainingRef tuples by id, each with .topics
+    ref.topic_by_id[topic_id]   # TopicRef
+    ref.active_skills           # SkillRef tuples in display order
+
+- The snapshot is loaded from the primary with one query per table on first
+  use, and warmed when the worker starts.
+- Commits in this worker that touch a Training, Topic or KnowledgeSkill drop
+  it through a commit listener.
+- A VersionTracker row catches writes from other workers; it is read at most
+  once per request.
+
+Writes and anything that needs relationships (e.g. Training.instructors)
+still go through the ORM.
+"""
+
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from flask import abort, g, has_request_context
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import VersionTracker, on_commit
+from models import db, Training, Topic, KnowledgeSkill
+from replicas import primary_reads
+
+TrainingRef = namedtuple('TrainingRef', ['id', 'name', 'slug', 'description', 'topics'])
+TopicRef = namedtuple('TopicRef', ['id', 'training_id', 'name', 'phase', 'instructor', 'video_url',
+                                   'description', 'order'])
+SkillRef = namedtuple('SkillRef', ['id', 'topic', 'order', 'is_active', 'target_level'])
+
+
+class ReferenceData:
+    """Immutable snapshot of trainings, topics and skills with id lookups."""
+
+    def __init__(self, trainings, topics, skills):
+        self.trainings = trainings
+        self.topics = topics
+        self.skills = skills
+        self.active_skills = tuple(s for s in skills if s.is_active)
+        self.training_by_id = MappingProxyType({t.id: t for t in trainings})
+        self.topic_by_id = MappingProxyType({t.id: t for t in topics})
+        self.skill_by_id = MappingProxyType({s.id: s for s in skills})
+        self.skill_by_topic = MappingProxyType({s.topic: s for s in skills})
+
+
+tracker = VersionTracker('reference', [Training, Topic, KnowledgeSkill], check_interval=0)
+_snapshot = None
+_generation = 0  # bumped by every invalidation
+_lock = threading.Lock()
+
+
+def load_reference():
+    """Read the three tables into a new snapshot."""
+    topics = tuple(TopicRef(*row) for row in db.session.execute(select(
+        Topic.id, Topic.training_id, Topic.name, Topic.phase, Topic.instructor, Topic.video_url,
+        Topic.description, Topic.order
+    ).order_by(Topic.id)))
+    by_training = {}
+    for topic in topics:
+        by_training.setdefault(topic.training_id, []).append(topic)
+    trainings = tuple(
+        TrainingRef(row.id, row.name, row.slug, row.description, tuple(by_training.get(row.id, ())))
+        for row in db.session.execute(select(Training.id, Training.name, Training.slug, Training.description)
+                                      .order_by(Training.id))
+    )
+    skills = tuple(SkillRef(*row) for row in db.session.execute(select(
+        KnowledgeSkill.id, KnowledgeSkill.topic, KnowledgeSkill.order, KnowledgeSkill.is_active,
+        KnowledgeSkill.target_level
+    ).order_by(KnowledgeSkill.order, KnowledgeSkill.id)))
+    return ReferenceData(trainings, topics, skills)
+
+
+def reference():
+    """The current snapshot, reloaded if this or another worker changed the tables."""
+    global _snapshot
+    if has_request_context():
+        check = not g.get('reference_checked')
+        g.reference_checked = True
+    else:
+        check = True
+    if check and tracker.is_stale():
+        _snapshot = None
+    snapshot = _snapshot
+    if snapshot is None:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None:
+                generation = _generation
+                # From the primary, like the version: a lagging replica's
+                # tables must not be stamped with a newer version
+                with primary_reads():
+                    version = tracker.read_version()
+                    snapshot = load_reference()
+                # A commit that invalidated the snapshot while it loaded may not
+                # be in it: hand it to this caller only, the next one reloads
+                if generation == _generation:
+                    _snapshot = snapshot
+                    tracker.mark_loaded(version)
+    return snapshot
+
+
+def get_training_or_404(training_id):
+    training = reference().training_by_id.get(training_id)
+    if training is None:
+        abort(404)
+    return training
+
+
+def get_topic_or_404(topic_id):
+    topic = reference().topic_by_id.get(topic_id)
+    if topic is None:
+        abort(404)
+    return topic
+
+
+@on_commit
+def invalidate_reference(changes):
+    global _snapshot, _generation
+    if any(change.model is None or issubclass(change.model, tracker.models) for change in changes):
+        _generation += 1
+        _snapshot = None
+
+
+def init_reference(app):
+    """Warm the snapshot when the worker starts."""
+    with app.app_context():
+        try:
+            reference()
+        except SQLAlchemyError:
+            # Tables not created (or migrated) yet; load on first use instead
+            db.session.rollback()
@@ -0,0 +1,169 @@
+"""
+Optional read-replica routing.
+
+Set DATABASE_READ_URL to a replica of the primary database and SELECTs are
+sent to it when
+- the request is a GET/HEAD and the client has not written recently, or
+- the code runs inside `replica_reads()` (report queries outside a request,
+  e.g. export jobs).
+
+Everything else uses the primary: writes and flushes, raw SQL, anything
+after the session has flushed, `primary_reads()` blocks and `@use_primary`
+views, and all
+reads while the replica is unreachable (it is retried every
+REPLICA_RETRY_SECONDS).
+
+Read-your-writes: a request that commits sets a short-lived cookie, and that
+client's GETs read from the primary until it expires
+(DATABASE_READ_STICKY_SECONDS, default 10), long enough for the replica to
+catch up.
+
+Local testing with SQLite: point DATABASE_READ_URL at a second file and keep
+it in sync with sync_replica.py.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql import Select
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'db_primary_until'
+DEFAULT_STICKY_SECONDS = 10
+REPLICA_RETRY_SECONDS = 30
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_route = ContextVar('db_route', default=None)  # 'replica', 'primary' or None (primary)
+
+
+class _ReplicaHealth:
+    """Remembers a failed replica so reads fall back to the primary for a while."""
+
+    def __init__(self):
+        self.down_until = 0.0
+        self.checked = set()
+        self._lock = threading.Lock()
+
+    def available(self, engine):
+        if time.monotonic() < self.down_until:
+            return False
+        if engine in self.checked:
+            return True
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except Exception as e:
+            self.mark_down(e)
+            return False
+        with self._lock:
+            self.checked.add(engine)
+        return True
+
+    def mark_down(self, error):
+        with self._lock:
+            if time.monotonic() < self.down_until:
+                return  # already reported
+            self.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+            self.checked.clear()
+        print(f"Read replica unavailable, using the primary: {error}")
+
+
+health = _ReplicaHealth()
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends eligible SELECTs to the replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and _route.get() == 'replica' and isinstance(clause, Select)
+                and not self._flushing and not self.info.get('wrote')):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None and health.available(replica):
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _stick_to_primary(session, flush_context, instances):
+    # Later reads in this session must see its own writes
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_commit(session):
+    if has_request_context():
+        g.db_committed = True
+
+
+@contextmanager
+def _routed(route):
+    token = _route.set(route)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def replica_reads():
+    """Context manager: run the enclosed report queries on the replica (if configured)."""
+    return _routed('replica')
+
+
+def primary_reads():
+    """Context manager: read from the primary even inside a GET request."""
+    return _routed('primary')
+
+
+def use_primary(view):
+    """View decorator for GET endpoints that must not see replica lag."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with primary_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def _sticky():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def init_replicas(app):
+    """Route GET requests to the DATABASE_READ_URL bind when it is configured."""
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+
+    @app.before_request
+    def route_reads():
+        if request.method in SAFE_METHODS and not _sticky():
+            g.db_route_token = _route.set('replica')
+
+    @app.after_request
+    def set_sticky_cookie(response):
+        if g.get('db_committed') and request.method not in SAFE_METHODS:
+            response.set_cookie(STICKY_COOKIE, str(time.time() + sticky_seconds),
+                                max_age=sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+    @app.teardown_request
+    def reset_route(exc):
+        token = g.pop('db_route_token', None)
+        if token is not None:
+            _route.reset(token)
+
+    with app.app_context():
+        from models import db
+
+        @event.listens_for(db.engines[REPLICA_BIND], 'handle_error')
+        def replica_failed(context):
+            if context.is_disconnect or context.connection is None:
+                health.mark_down(context.original_exception)
@@ -0,0 +1,268 @@
+"""
+Full-text search over trainings, topics, students and instructors.
+
+SQLite: one FTS5 table, `search_index`, holds a (title, body) document per
+searchable row. Its rowid encodes the source row (ref_id * 8 + kind code),
+so keeping it in sync is a primary-key upsert/delete. A Session
+`after_flush` hook rewrites the documents of every indexed object the flush
+inserted, changed or deleted, on the same connection, so the index commits
+and rolls back together with the data.
+
+MySQL: each source table gets a FULLTEXT index which InnoDB maintains
+itself; searches run one MATCH ... AGAINST query per kind and merge scores.
+
+Run build_search_index.py once per database to create the index, and it or
+the rebuild_search_index job after bulk imports that bypass the ORM. Until
+the index exists /api/search answers 503. With SEARCH_INDEX_CHECK_ON_START
+set, each app logs a warning at startup when the index is missing or its
+row count no longer matches its source tables; nothing is built then.
+"""
+
+import re
+from collections import namedtuple
+
+from flask import request, jsonify, url_for
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models import db, Training, Topic, Student, Instructor
+
+SearchSource = namedtuple('SearchSource', ['code', 'model', 'title', 'body', 'endpoint', 'url_arg'])
+
+SOURCES = {
+    'training': SearchSource(1, Training, 'name', ('description',), 'public.training_detail', 'training_id'),
+    'topic': SearchSource(2, Topic, 'name', ('description',), 'public.topic_detail', 'topic_id'),
+    'student': SearchSource(3, Student, 'name', (), 'public.student_profile', 'student_id'),
+    'instructor': SearchSource(4, Instructor, 'name', ('bio', 'expertise'), 'instructors.instructor_profile', 'instructor_id'),
+}
+KINDS_BY_MODEL = {source.model: kind for kind, source in SOURCES.items()}
+KINDS_BY_CODE = {source.code: kind for kind, source in SOURCES.items()}
+
+FTS_TABLE = 'search_index'
+MYSQL_INDEX_PREFIX = 'ft_search_'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _rowid(kind, ref_id):
+    return ref_id * 8 + SOURCES[kind].code
+
+
+def _document(kind, obj):
+    source = SOURCES[kind]
+    title = getattr(obj, source.title) or ''
+    body = ' '.join(getattr(obj, column) or '' for column in source.body)
+    return title, body
+
+
+# ============================================
+# Index maintenance
+# ============================================
+
+def _fts_enabled(connection):
+    """True when this connection's database has the SQLite FTS table."""
+    if connection.dialect.name != 'sqlite':
+        return False
+    # Only a positive answer is remembered, so the index is picked up as
+    # soon as build_search_index.py creates it
+    if not connection.info.get('search_index_enabled'):
+        connection.info['search_index_enabled'] = inspect(connection).has_table(FTS_TABLE)
+    return connection.info['search_index_enabled']
+
+
+def _fulltext_enabled(connection):
+    """True when this connection's MySQL database has every FULLTEXT index."""
+    if not connection.info.get('search_fulltext_enabled'):
+        inspector = inspect(connection)
+        connection.info['search_fulltext_enabled'] = all(
+            MYSQL_INDEX_PREFIX + source.model.__table__.name
+            in {ix['name'] for ix in inspector.get_indexes(source.model.__table__.name)}
+            for source in SOURCES.values())
+    return connection.info['search_fulltext_enabled']
+
+
+def search_index_ready(connection):
+    """True when the backend's search structures exist (see build_search_index.py)."""
+    if connection.dialect.name == 'mysql':
+        return _fulltext_enabled(connection)
+    return _fts_enabled(connection)
+
+
+def index_document(connection, kind, obj):
+    title, body = _document(kind, obj)
+    connection.execute(
+        text(f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, body) VALUES (:rowid, :title, :body)"),
+        {'rowid': _rowid(kind, obj.id), 'title': title, 'body': body}
+    )
+
+
+def remove_document(connection, kind, ref_id):
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"), {'rowid': _rowid(kind, ref_id)})
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    indexed = [obj for obj in session.new | session.dirty | session.deleted if type(obj) in KINDS_BY_MODEL]
+    if not indexed:
+        return
+    connection = session.connection()
+    if not _fts_enabled(connection):
+        return
+    for obj in indexed:
+        kind = KINDS_BY_MODEL[type(obj)]
+        if obj in session.deleted:
+            remove_document(connection, kind, obj.id)
+        elif obj in session.new or session.is_modified(obj):
+            index_document(connection, kind, obj)
+
+
+def create_search_index():
+    """Create the backend's search structures. Returns a description."""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+        db.session.commit()
+        return f"FTS5 table {FTS_TABLE}"
+    if dialect == 'mysql':
+        for kind, source in SOURCES.items():
+            table = source.model.__table__.name
+            index_name = MYSQL_INDEX_PREFIX + table
+            existing = {ix['name'] for ix in inspect(db.engine).get_indexes(table)}
+            if index_name not in existing:
+                columns = ', '.join((source.title,) + source.body)
+                db.session.execute(text(f"ALTER TABLE {table} ADD FULLTEXT INDEX {index_name} ({columns})"))
+        db.session.commit()
+        return "FULLTEXT indexes"
+    raise RuntimeError(f"Full-text search is not supported on {dialect}")
+
+
+def rebuild_search_index():
+    """Repopulate the SQLite FTS table from the source tables. Returns row counts."""
+    counts = {}
+    if db.engine.dialect.name != 'sqlite':
+        return counts  # FULLTEXT indexes are maintained by MySQL
+    connection = db.session.connection()
+    connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    for kind, source in SOURCES.items():
+        counts[kind] = 0
+        for obj in source.model.query.yield_per(1000):
+            index_document(connection, kind, obj)
+            counts[kind] += 1
+    connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    db.session.commit()
+    return counts
+
+
+def check_search_index():
+    """What is wrong with the search index, or None when it is built and in step with its tables.
+
+    Read-only: building and rebuilding are left to build_search_index.py and
+    the rebuild_search_index job.
+    """
+    connection = db.session.connection()
+    if not search_index_ready(connection):
+        return 'not built'
+    if connection.dialect.name == 'sqlite':
+        indexed = db.session.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        rows = sum(source.model.query.count() for source in SOURCES.values())
+        if indexed != rows:
+            return f'out of step ({indexed} documents for {rows} rows)'
+    return None
+
+
+# ============================================
+# Querying
+# ============================================
+
+def _search_sqlite(words, kinds, limit):
+    # Every word must match; the last one as a prefix so partial input works
+    match = ' AND '.join(f'"{word}"' for word in words[:-1])
+    match = f'{match} AND "{words[-1]}"*' if match else f'"{words[-1]}"*'
+    codes = [SOURCES[kind].code for kind in kinds]
+    rows = db.session.execute(text(f"""
+        SELECT rowid, title, snippet({FTS_TABLE}, 1, '', '', '…', 12) AS snippet,
+               bm25({FTS_TABLE}, 10.0, 1.0) AS rank
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH :match AND (rowid % 8) IN ({', '.join(str(code) for code in codes)})
+        ORDER BY rank
+        LIMIT :limit
+    """), {'match': match, 'limit': limit})
+    return [(KINDS_BY_CODE[rowid % 8], rowid // 8, title, snippet, -rank)
+            for rowid, title, snippet, rank in rows]
+
+
+def _search_mysql(words, kinds, limit):
+    against = ' '.join(f'+{word}*' for word in words)
+    results = []
+    for kind in kinds:
+        source = SOURCES[kind]
+        columns = ', '.join((source.title,) + source.body)
+        body = f"CONCAT_WS(' ', {', '.join(source.body)})" if source.body else "''"
+        rows = db.session.execute(text(f"""
+            SELECT id, {source.title}, LEFT({body}, 160),
+                   MATCH ({columns}) AGAINST (:against IN BOOLEAN MODE) AS score
+            FROM {source.model.__table__.name}
+            WHERE MATCH ({columns}) AGAINST (:against IN BOOLEAN MODE)
+            ORDER BY score DESC
+            LIMIT :limit
+        """), {'against': against, 'limit': limit})
+        results.extend((kind, ref_id, title, snippet, score) for ref_id, title, snippet, score in rows)
+    results.sort(key=lambda result: result[4], reverse=True)
+    return results[:limit]
+
+
+def search(query, kinds=None, limit=DEFAULT_LIMIT):
+    """Return ranked (kind, id, title, snippet, score) tuples for a query."""
+    words = WORD_RE.findall(query)
+    kinds = [kind for kind in (kinds or SOURCES) if kind in SOURCES]
+    if not words or not kinds:
+        return []
+    if db.engine.dialect.name == 'mysql':
+        return _search_mysql(words, kinds, limit)
+    return _search_sqlite(words, kinds, limit)
+
+
+def search_api():
+    query = request.args.get('q', '').strip()
+    kinds = [kind for kind in request.args.get('type', '').split(',') if kind] or None
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+
+    if kinds and any(kind not in SOURCES for kind in kinds):
+        return jsonify({'success': False, 'error': f"type must be one of: {', '.join(SOURCES)}"}), 400
+    if not search_index_ready(db.session.connection()):
+        return jsonify({'success': False, 'error': 'Search index not built: run build_search_index.py'}), 503
+
+    results = [{
+        'type': kind,
+        'id': ref_id,
+        'title': title,
+        'snippet': snippet,
+        'score': round(score, 4),
+        'url': url_for(SOURCES[kind].endpoint, **{SOURCES[kind].url_arg: ref_id}),
+    } for kind, ref_id, title, snippet, score in search(query, kinds, limit)]
+
+    return jsonify({'query': query, 'results': results})
+
+
+def init_search(app):
+    """Register the /api/search endpoint; optionally check the index."""
+    app.config.setdefault('SEARCH_INDEX_CHECK_ON_START', False)
+    app.add_url_rule('/api/search', 'search_api', search_api)
+
+    if app.config['SEARCH_INDEX_CHECK_ON_START']:
+        with app.app_context():
+            try:
+                problem = check_search_index()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                app.logger.warning('Search index not checked at startup: %s', e)
+            else:
+                if problem:
+                    app.logger.warning('Search index %s: run build_search_index.py or the '
+                                       'rebuild_search_index job', problem)
@@ -1,6 +1,8 @@
 import pandas as pd
-from app import app, db
-from models import Training, Topic, Student
+from config import create_db_app
+from models import db, Training, Topic, Student
+
+app = create_db_app()
 
 def seed_database():
     file_path = '/Users/TKM-h.almughrabi-c/Downloads/qa-trainings/QA Training Plan.xlsx'
@@ -6,8 +6,10 @@ Usage:
     python seed_instructors.py
 """
 
-from app import app, db
-from models import Instructor, Training
+from config import create_db_app
+from models import db, Instructor, Training
+
+app = create_db_app()
 
 def seed_instructors():
     """Create sample instructor data"""
@@ -0,0 +1,290 @@
+"""
+Skill-gap analysis and cohort suggestions for scheduling trainings.
+
+The student x skill proficiency matrix is held in memory as a dense int8
+array: each cell is an index into PROFICIENCY_LEVELS, or -1 when the student
+has not been assessed. Each active skill has a target level
+(KnowledgeSkill.target_level, else DEFAULT_TARGET_LEVEL); a student's gap in
+a skill is how many levels they are below it, counting "not assessed" as one
+level below Beginner.
+
+    /api/skill-gaps           - per skill: students below target and
+                                suggested cohorts grouped by current level
+    /api/skill-gaps/clusters  - k-means groups of students with similar gap
+                                profiles and the skills each group lacks
+
+- The matrix is built with one query on first use in each worker.
+- Commits that add, change or delete assessments or students patch single
+  cells or rows through a commit listener; skill changes and bulk writes
+  trigger a rebuild on next use.
+- A VersionTracker row lets each worker notice writes committed by other
+  workers and rebuild its copy.
+"""
+
+import threading
+
+import numpy as np
+from flask import request, jsonify
+
+from cache import VersionTracker, on_commit
+from models import db, Student, KnowledgeAssessment, KnowledgeSkill, PROFICIENCY_LEVELS, DEFAULT_TARGET_LEVEL
+from replicas import primary_reads
+
+NOT_ASSESSED = -1
+LEVEL_INDEX = {level: i for i, level in enumerate(PROFICIENCY_LEVELS)}
+DEFAULT_COHORT_SIZE = 12
+DEFAULT_CLUSTERS = 4
+MAX_CLUSTERS = 20
+KMEANS_ITERATIONS = 50
+MAX_COHORT_SIZE = 100
+
+
+class SkillGapError(ValueError):
+    """Invalid skill-gap parameters."""
+
+
+def _int_param(values, name, default, low, high):
+    value = values.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise SkillGapError(f'{name} must be an integer')
+    if not low <= value <= high:
+        raise SkillGapError(f'{name} must be between {low} and {high}')
+    return value
+
+
+class SkillMatrix:
+    """Dense int8 student x skill level matrix with per-skill targets."""
+
+    def __init__(self):
+        self.student_ids = []
+        self.names = []
+        self.skill_ids = []
+        self.skill_names = []
+        self.targets = np.empty(0, dtype=np.int8)
+        self.levels = np.empty((0, 0), dtype=np.int8)
+        self._rows = {}
+        self._cols = {}
+        self.lock = threading.RLock()
+
+    def load(self, students, skills, assessments):
+        """students: (id, name); skills: (id, name, target); assessments: (student_id, skill_id, level)."""
+        levels = np.full((len(students), len(skills)), NOT_ASSESSED, dtype=np.int8)
+        rows = {student_id: i for i, (student_id, _) in enumerate(students)}
+        cols = {skill_id: i for i, (skill_id, _, _) in enumerate(skills)}
+        for student_id, skill_id, level in assessments:
+            row, col = rows.get(student_id), cols.get(skill_id)
+            if row is not None and col is not None:
+                levels[row, col] = LEVEL_INDEX.get(level, NOT_ASSESSED)
+        targets = np.array([LEVEL_INDEX.get(target or DEFAULT_TARGET_LEVEL, LEVEL_INDEX[DEFAULT_TARGET_LEVEL])
+                            for _, _, target in skills], dtype=np.int8)
+        with self.lock:
+            self.student_ids = [student_id for student_id, _ in students]
+            self.names = [name for _, name in students]
+            self.skill_ids = [skill_id for skill_id, _, _ in skills]
+            self.skill_names = [name for _, name, _ in skills]
+            self.targets, self.levels = targets, levels
+            self._rows, self._cols = rows, cols
+
+    def set_level(self, student_id, skill_id, level):
+        """Update one cell. Returns False when the student is unknown (needs a rebuild)."""
+        with self.lock:
+            row = self._rows.get(student_id)
+            if row is None:
+                return False
+            col = self._cols.get(skill_id)
+            if col is not None:
+                self.levels[row, col] = LEVEL_INDEX.get(level, NOT_ASSESSED) if level else NOT_ASSESSED
+            return True
+
+    def add_student(self, student_id, name):
+        with self.lock:
+            if student_id in self._rows:
+                self.names[self._rows[student_id]] = name
+                return
+            self._rows[student_id] = len(self.student_ids)
+            self.student_ids.append(student_id)
+            self.names.append(name)
+            blank = np.full((1, len(self.skill_ids)), NOT_ASSESSED, dtype=np.int8)
+            self.levels = np.vstack([self.levels, blank])
+
+    def remove_student(self, student_id):
+        with self.lock:
+            row = self._rows.pop(student_id, None)
+            if row is None:
+                return
+            del self.student_ids[row]
+            del self.names[row]
+            self.levels = np.delete(self.levels, row, axis=0)
+            self._rows = {sid: i for i, sid in enumerate(self.student_ids)}
+
+    def gaps(self):
+        """int8 matrix of levels below target (0 when met); unassessed counts from below Beginner."""
+        with self.lock:
+            return np.maximum(self.targets[np.newaxis, :] - self.levels, 0).astype(np.int8)
+
+
+matrix = SkillMatrix()
+tracker = VersionTracker('skill_gaps', [Student, KnowledgeAssessment, KnowledgeSkill])
+_build_lock = threading.Lock()
+_built = False
+
+
+def build_matrix():
+    """(Re)load the matrix from the database."""
+    global _built
+    # Same connection as the version: a lagging replica must not be stamped current
+    with primary_reads():
+        version = tracker.read_version()
+        students = db.session.query(Student.id, Student.name).order_by(Student.name, Student.id).all()
+        skills = db.session.query(KnowledgeSkill.id, KnowledgeSkill.topic, KnowledgeSkill.target_level) \
+            .filter_by(is_active=True).order_by(KnowledgeSkill.order, KnowledgeSkill.id).all()
+        assessments = db.session.query(
+            KnowledgeAssessment.student_id, KnowledgeAssessment.skill_id, KnowledgeAssessment.proficiency_level
+        ).all()
+    matrix.load(students, skills, assessments)
+    tracker.mark_loaded(version)
+    _built = True
+
+
+def ensure_matrix():
+    """Build the matrix on first use and rebuild it when another worker wrote."""
+    if not _built or tracker.is_stale():
+        with _build_lock:
+            build_matrix()
+
+
+@on_commit
+def apply_changes(changes):
+    """Keep the matrix in step with this worker's own commits."""
+    global _built
+    if not _built:
+        return
+    for change in changes:
+        if change.model not in (Student, KnowledgeAssessment, KnowledgeSkill):
+            continue
+        if change.op == 'bulk' or change.model is KnowledgeSkill:
+            _built = False  # columns or unknown rows changed; rebuild on next use
+            return
+        values = change.values
+        if change.model is Student:
+            if change.op == 'delete':
+                matrix.remove_student(values['id'])
+            else:
+                matrix.add_student(values['id'], values['name'])
+        else:
+            level = None if change.op == 'delete' else values['proficiency_level']
+            if not matrix.set_level(values['student_id'], values['skill_id'], level):
+                _built = False
+                return
+
+
+def kmeans(points, k, iterations=KMEANS_ITERATIONS):
+    """Deterministic k-means (farthest-point seeding). Returns (labels, centroids)."""
+    points = points.astype(np.float32)
+    centroids = [points[np.argmax(points.sum(axis=1))]]
+    distances = ((points - centroids[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        centroids.append(points[np.argmax(distances)])
+        distances = np.minimum(distances, ((points - centroids[-1]) ** 2).sum(axis=1))
+    centroids = np.array(centroids)
+
+    labels = np.zeros(len(points), dtype=np.int64)
+    for iteration in range(iterations):
+        distances = ((points[:, np.newaxis, :] - centroids[np.newaxis, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(k):
+            members = points[labels == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+    return labels, centroids
+
+
+def skill_gap_summary(cohort_size=DEFAULT_COHORT_SIZE):
+    """Skills ordered by total gap, each with cohorts of students at the same level."""
+    with matrix.lock:
+        gaps = matrix.gaps()
+        levels = matrix.levels.copy()
+        student_ids, names = list(matrix.student_ids), list(matrix.names)
+        skill_ids, skill_names, targets = list(matrix.skill_ids), list(matrix.skill_names), matrix.targets.copy()
+
+    totals = gaps.sum(axis=0, dtype=np.int64)
+    below = (gaps > 0).sum(axis=0)
+    skills = []
+    for col in np.argsort(-totals, kind='stable'):
+        if not below[col]:
+            continue
+        cohorts = []
+        # One cohort per starting level, lowest first, split to cohort_size
+        for level in range(NOT_ASSESSED, int(targets[col])):
+            rows = np.flatnonzero((levels[:, col] == level) & (gaps[:, col] > 0))
+            for start in range(0, len(rows), cohort_size):
+                cohorts.append({
+                    'from_level': PROFICIENCY_LEVELS[level] if level >= 0 else 'Not Assessed',
+                    'students': [{'id': student_ids[r], 'name': names[r]} for r in rows[start:start + cohort_size]],
+                })
+        skills.append({
+            'skill_id': skill_ids[col],
+            'skill': skill_names[col],
+            'target_level': PROFICIENCY_LEVELS[targets[col]],
+            'students_below_target': int(below[col]),
+            'total_gap': int(totals[col]),
+            'cohorts': cohorts,
+        })
+    return {'students': len(student_ids), 'skills': skills}
+
+
+def skill_gap_clusters(k):
+    """Groups of students with similar gap vectors and the skills each group lacks most."""
+    with matrix.lock:
+        gaps = matrix.gaps()
+        student_ids, names = list(matrix.student_ids), list(matrix.names)
+        skill_ids, skill_names = list(matrix.skill_ids), list(matrix.skill_names)
+    if not student_ids or not skill_ids:
+        return []
+
+    labels, centroids = kmeans(gaps, min(k, len(student_ids)))
+    clusters = []
+    for cluster, centroid in enumerate(centroids):
+        rows = np.flatnonzero(labels == cluster)
+        if not len(rows):
+            continue
+        top = [col for col in np.argsort(-centroid, kind='stable') if centroid[col] > 0]
+        clusters.append({
+            'size': len(rows),
+            'mean_gap': round(float(centroid.mean()), 2),
+            'skills': [{'skill_id': skill_ids[col], 'skill': skill_names[col],
+                        'mean_gap': round(float(centroid[col]), 2)} for col in top],
+            'students': [{'id': student_ids[r], 'name': names[r]} for r in rows],
+        })
+    return sorted(clusters, key=lambda c: -c['mean_gap'])
+
+
+def skill_gaps_api():
+    try:
+        cohort_size = _int_param(request.args, 'cohort_size', DEFAULT_COHORT_SIZE, 1, MAX_COHORT_SIZE)
+    except SkillGapError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    ensure_matrix()
+    return jsonify(dict(skill_gap_summary(cohort_size), success=True))
+
+
+def skill_gap_clusters_api():
+    try:
+        k = _int_param(request.args, 'k', DEFAULT_CLUSTERS, 1, MAX_CLUSTERS)
+    except SkillGapError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    ensure_matrix()
+    return jsonify({'success': True, 'clusters': skill_gap_clusters(k)})
+
+
+def init_skill_gaps(app):
+    """Register the /api/skill-gaps endpoints."""
+    app.add_url_rule('/api/skill-gaps', 'skill_gaps_api', skill_gaps_api)
+    app.add_url_rule('/api/skill-gaps/clusters', 'skill_gap_clusters_api', skill_gap_clusters_api)
@@ -0,0 +1,87 @@
+"""
+Startup time report.
+
+Every worker (and every `flask` command) pays for importing the app and
+running create_app(), so keep an eye on it as modules are added:
+
+    flask --app app startup-report                 # totals and the slowest imports
+    flask --app app startup-report --budget-ms 1500  # exit 1 when over budget (CI)
+
+The report starts a fresh interpreter with `python -X importtime`, so
+nothing is already cached in sys.modules, and lists the modules app.py
+imports directly, by cumulative import time. A module's cost is charged to
+whichever of them imports it first.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import click
+
+PROBE = (
+    "import json, app\n"
+    "timings = app.create_app().config['STARTUP_TIMINGS']\n"
+    "print('STARTUP_TIMINGS ' + json.dumps(timings))\n"
+)
+
+
+def parse_importtime(stderr):
+    """[(module, depth, self_us, cumulative_us)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_startup():
+    """(timings, direct imports of app.py) from a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    marker = [line for line in result.stdout.splitlines() if line.startswith('STARTUP_TIMINGS ')]
+    if result.returncode != 0 or not marker:
+        raise click.ClickException('Could not start the app:\n' + result.stderr[-2000:])
+    timings = json.loads(marker[-1].split(' ', 1)[1])
+
+    # Children of the `app` entry are listed before it, one level deeper
+    rows = parse_importtime(result.stderr)
+    app_index = next(i for i, row in enumerate(rows) if row[0] == 'app' and row[1] == 0)
+    children = []
+    for name, depth, _, cumulative_us in reversed(rows[:app_index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative_us / 1e6))
+    timings['import_app'] = rows[app_index][3] / 1e6
+    return timings, sorted(children, key=lambda child: -child[1])
+
+
+def init_startup(app):
+    """Register the `flask startup-report` command."""
+
+    @app.cli.command('startup-report')
+    @click.option('--top', default=15, show_default=True, help='How many imports to list.')
+    @click.option('--budget-ms', type=float, help='Fail when import + create_app takes longer.')
+    def startup_report(top, budget_ms):
+        """Measure how long importing and creating the app takes."""
+        timings, imports = measure_startup()
+        total = timings['import_app'] + timings['create_app']
+        click.echo("=" * 60)
+        click.echo("Startup Time")
+        click.echo("=" * 60)
+        click.echo(f"import app:    {timings['import_app'] * 1000:8.1f} ms")
+        click.echo(f"create_app():  {timings['create_app'] * 1000:8.1f} ms")
+        click.echo(f"total:         {total * 1000:8.1f} ms")
+        click.echo()
+        click.echo("Slowest imports (cumulative):")
+        for name, seconds in imports[:top]:
+            click.echo(f"  {seconds * 1000:8.1f} ms  {name}")
+        if budget_ms is not None and total * 1000 > budget_ms:
+            click.echo()
+            click.echo(f"❌ Over the {budget_ms:.0f} ms budget")
+            sys.exit(1)
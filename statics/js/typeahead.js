@@ -0,0 +1,109 @@
+// Typeahead pickers backed by /api/typeahead.
+//
+// Markup:
+//   <div class="typeahead" data-typeahead="student">
+//     <input type="hidden" name="student_id" value="...">
+//     <input type="text" class="form-input typeahead-input" value="..." required>
+//     <ul class="typeahead-results" role="listbox"></ul>
+//   </div>
+//
+// Picking a suggestion stores its id in the hidden input. Editing the text
+// clears the id again, so the form can only submit names that exist.
+(function () {
+    const DEBOUNCE_MS = 120;
+
+    function setup(container) {
+        const type = container.dataset.typeahead;
+        const hidden = container.querySelector('input[type="hidden"]');
+        const input = container.querySelector('.typeahead-input');
+        const list = container.querySelector('.typeahead-results');
+        let results = [];
+        let active = -1;
+        let timer = null;
+        let requestId = 0;
+
+        function validate() {
+            const missing = (input.required || input.value.trim() !== '') && !hidden.value;
+            input.setCustomValidity(missing ? 'Choose a name from the list' : '');
+        }
+
+        function close() {
+            list.innerHTML = '';
+            list.hidden = true;
+            active = -1;
+        }
+
+        function choose(index) {
+            const result = results[index];
+            if (!result) return;
+            hidden.value = result.id;
+            input.value = result.name;
+            validate();
+            close();
+            container.dispatchEvent(new CustomEvent('typeahead:select', { detail: result }));
+        }
+
+        function render() {
+            list.innerHTML = '';
+            results.forEach((result, index) => {
+                const item = document.createElement('li');
+                item.textContent = result.name;
+                item.setAttribute('role', 'option');
+                item.className = index === active ? 'active' : '';
+                item.addEventListener('mousedown', (event) => {
+                    event.preventDefault();  // keep focus so blur doesn't close first
+                    choose(index);
+                });
+                list.appendChild(item);
+            });
+            list.hidden = results.length === 0;
+        }
+
+        async function lookup() {
+            const query = input.value.trim();
+            const current = ++requestId;
+            if (!query) {
+                results = [];
+                close();
+                return;
+            }
+            const params = new URLSearchParams({ q: query, type: type, limit: 10 });
+            const response = await fetch(`/api/typeahead?${params}`);
+            const data = await response.json();
+            if (current !== requestId) return;  // a newer keystroke won
+            results = data.results || [];
+            active = results.length ? 0 : -1;
+            render();
+        }
+
+        input.addEventListener('input', () => {
+            hidden.value = '';
+            validate();
+            clearTimeout(timer);
+            timer = setTimeout(lookup, DEBOUNCE_MS);
+        });
+
+        input.addEventListener('keydown', (event) => {
+            if (list.hidden) return;
+            if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+                event.preventDefault();
+                const step = event.key === 'ArrowDown' ? 1 : -1;
+                active = (active + step + results.length) % results.length;
+                render();
+            } else if (event.key === 'Enter') {
+                event.preventDefault();
+                choose(active);
+            } else if (event.key === 'Escape') {
+                close();
+            }
+        });
+
+        input.addEventListener('blur', close);
+        validate();
+        close();
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('[data-typeahead]').forEach(setup);
+    });
+})();
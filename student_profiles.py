@@ -0,0 +1,141 @@
+"""
+Student profile aggregation.
+
+Builds everything the student profile page shows with two queries:
+1. The student's topics, each joined to its training and to the student's
+   attendance and progress rows for it (archived attendance through its
+   rollup, see archive.py)
+2. The student's knowledge assessments joined to their skills
+
+Topics are grouped by training in Python, and the finished profile (plain
+dicts, no ORM objects) is cached per student. The cache entry is dropped
+whenever a commit touches that student's attendance, progress, assessments
+or student row; changes to shared data such as topic or skill names clear
+the whole cache. A TTL bounds staleness when several worker processes each
+hold their own cache.
+"""
+
+from sqlalchemy import or_, select, case, literal, union_all
+
+from archive import has_archived
+from cache import LRUCache, on_commit
+from models import (db, Training, Topic, Student, Attendance, AttendanceArchiveRollup, Progress, KnowledgeAssessment,
+                    KnowledgeSkill, Instructor, Certificate)
+
+profile_cache = LRUCache(max_size=1000, ttl=300)
+
+# Models whose rows carry a student_id and only affect that student's profile
+PER_STUDENT_MODELS = (Attendance, AttendanceArchiveRollup, Progress, KnowledgeAssessment)
+# Models the profile page never shows
+UNRELATED_MODELS = (Instructor, Certificate)
+
+
+def _attendance(student_id):
+    """The student's attendance records, plus the latest archived one per topic.
+
+    Each has the number of sessions it stands for as `present`, and
+    `archived` tells the rollup rows apart (their id is the attendance id of
+    the latest archived record).
+    """
+    stmt = select(
+        Attendance.id, Attendance.topic_id, Attendance.date, Attendance.status,
+        case((Attendance.status == 'Present', 1), else_=0).label('present'), literal(False).label('archived')
+    ).where(Attendance.student_id == student_id)
+    if has_archived():
+        stmt = union_all(stmt, select(
+            AttendanceArchiveRollup.last_id, AttendanceArchiveRollup.topic_id, AttendanceArchiveRollup.last_date,
+            AttendanceArchiveRollup.last_status, AttendanceArchiveRollup.present, literal(True)
+        ).where(AttendanceArchiveRollup.student_id == student_id))
+    return stmt.subquery('attendance')
+
+
+def build_student_profile(student_id):
+    """Load and aggregate one student's profile, or return None if missing."""
+    name = db.session.query(Student.name).filter(Student.id == student_id).scalar()
+    if name is None:
+        return None
+
+    attendance = _attendance(student_id)
+    rows = db.session.query(
+        Training.id, Training.name,
+        Topic.id, Topic.name, Topic.phase,
+        attendance.c.id, attendance.c.status, attendance.c.present, attendance.c.archived,
+        Progress.id, Progress.status,
+    ).join(Training, Training.id == Topic.training_id) \
+     .outerjoin(attendance, attendance.c.topic_id == Topic.id) \
+     .outerjoin(Progress, (Progress.topic_id == Topic.id) & (Progress.student_id == student_id)) \
+     .filter(or_(attendance.c.id.isnot(None), Progress.id.isnot(None))) \
+     .order_by(Training.id, Topic.id, attendance.c.date, attendance.c.id, Progress.id) \
+     .all()
+
+    trainings = []
+    topics = {}
+    present = {}
+    completed_ids = set()
+    for (training_id, training_name, topic_id, topic_name, phase, attendance_id, attendance_status, present_count,
+         archived, progress_id, progress_status) in rows:
+        topic = topics.get(topic_id)
+        if topic is None:
+            if not trainings or trainings[-1]['id'] != training_id:
+                trainings.append({'id': training_id, 'name': training_name, 'topics': []})
+            topic = {'id': topic_id, 'name': topic_name, 'phase': phase, 'attendance': None, 'progress': None}
+            topics[topic_id] = topic
+            trainings[-1]['topics'].append(topic)
+        # Rows are ordered by session date, then record id, so the latest record per topic wins
+        if attendance_id is not None:
+            topic['attendance'] = attendance_status
+            present[(bool(archived), attendance_id)] = present_count
+        if progress_id is not None:
+            topic['progress'] = progress_status
+            if progress_status == 'Completed':
+                completed_ids.add(progress_id)
+
+    assessments = [
+        {'topic': topic, 'proficiency_level': level, 'last_updated': last_updated}
+        for topic, level, last_updated in db.session.query(
+            KnowledgeSkill.topic, KnowledgeAssessment.proficiency_level, KnowledgeAssessment.last_updated
+        ).join(KnowledgeAssessment.skill)
+         .filter(KnowledgeAssessment.student_id == student_id)
+         .order_by(KnowledgeAssessment.skill_id)
+    ]
+
+    total_topics = len(topics)
+    stats = {
+        'total_trainings': len(trainings),
+        'total_topics': total_topics,
+        'attendance_rate': int((sum(present.values()) / total_topics * 100)) if total_topics > 0 else 0,
+        'completion_rate': int((len(completed_ids) / total_topics * 100)) if total_topics > 0 else 0,
+        'total_skills': len(assessments)
+    }
+
+    return {
+        'student': {'id': student_id, 'name': name},
+        'trainings': trainings,
+        'assessments': assessments,
+        'stats': stats,
+    }
+
+
+def get_student_profile(student_id):
+    """Return the cached profile for a student, building it on a miss."""
+    profile = profile_cache.get(student_id)
+    if profile is None:
+        profile = build_student_profile(student_id)
+        if profile is not None:
+            profile_cache.set(student_id, profile)
+    return profile
+
+
+@on_commit
+def invalidate_profiles(changes):
+    """Drop cached profiles touched by a committed transaction."""
+    for change in changes:
+        if change.model in UNRELATED_MODELS:
+            continue
+        if change.values is not None and change.model in PER_STUDENT_MODELS:
+            profile_cache.delete(change.values['student_id'])
+        elif change.values is not None and change.model is Student:
+            profile_cache.delete(change.values['id'])
+        else:
+            profile_cache.clear()
+            return
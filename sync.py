@@ -0,0 +1,276 @@
+"""
+Offline-first roster capture: batched, idempotent sync of attendance and progress.
+
+The topic page queues roster changes in the browser (localStorage) and sends
+them here whenever it can reach the server, so marks taken on flaky Wi-Fi are
+not lost:
+
+    POST /api/sync
+    {"changes": [{"key": "6f1c...", "entity": "attendance", "student_id": 3,
+                  "topic_id": 7, "date": "2026-10-19", "status": "Present",
+                  "version": 4, "ts": "2026-10-19T09:14:03.120Z"}, ...]}
+
+- key: idempotency key generated by the client. Received keys are kept in
+  sync_receipt for SYNC_RECEIPT_DAYS; a retried change is reported as a
+  duplicate and not applied again.
+- version: the record version the user saw when making the change (0: no
+  record), checked like the roster form's version_<id> fields (see
+  concurrency.py). If the record has since changed to a different status the
+  change is not applied ('conflict') and the current state is returned so the
+  page can show it; sending it again with that version overwrites.
+- ts: when the change was made on the device. Changes without a version are
+  last-writer-wins: one older than the record's updated_at is not applied
+  ('stale'). A ts in the future is clamped to the server clock so a device
+  with a skewed clock cannot pin a record.
+
+The batch is applied in one transaction: existing records are loaded with one
+query per entity and all writes go out in a single flush (batched INSERTs and
+UPDATEs), so a whole session's marks sync in one round-trip. Writes go through
+the ORM, so history, caches, live updates and row versions see them as usual.
+
+Every change gets a result in request order: applied, stale, conflict,
+duplicate or invalid (with an error, e.g. attendance of an archived session,
+see archive.py), plus the record's current status and version.
+"""
+
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from flask import request, jsonify
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from archive import ArchiveError, check_not_archived
+from concurrency import VersionConflict, check_version
+from models import db, Student, Topic, Attendance, Progress, SyncReceipt, utcnow
+
+MAX_BATCH = 1000
+MAX_ATTEMPTS = 3
+SYNC_RECEIPT_DAYS = 30
+PURGE_INTERVAL_SECONDS = 3600
+QUERY_CHUNK = 500
+
+Entity = namedtuple('Entity', ['model', 'statuses', 'keys'])
+
+ENTITIES = {
+    'attendance': Entity(Attendance, ('Present', 'Absent', 'Excused'), ('student_id', 'topic_id', 'date')),
+    'progress': Entity(Progress, ('Not Started', 'In Progress', 'Completed'), ('student_id', 'topic_id')),
+}
+
+_last_purge = 0.0
+
+
+class SyncError(ValueError):
+    """Invalid sync request or change."""
+
+
+def parse_change(raw, now):
+    """Validated change dict from one request item."""
+    if not isinstance(raw, dict):
+        raise SyncError('Each change must be an object')
+    key = raw.get('key')
+    if not isinstance(key, str) or not 0 < len(key) <= 64:
+        raise SyncError('key must be a string of 1-64 characters')
+    entity = ENTITIES.get(raw.get('entity'))
+    if entity is None:
+        raise SyncError('entity must be one of: ' + ', '.join(ENTITIES))
+    if raw.get('status') not in entity.statuses:
+        raise SyncError('status must be one of: ' + ', '.join(entity.statuses))
+    try:
+        change = {
+            'key': key,
+            'entity': raw['entity'],
+            'student_id': int(raw['student_id']),
+            'topic_id': int(raw['topic_id']),
+            'status': raw['status'],
+        }
+        if 'date' in entity.keys:
+            change['date'] = datetime.strptime(raw['date'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        raise SyncError('student_id, topic_id' + (' and date (YYYY-MM-DD)' if 'date' in entity.keys else '') +
+                        ' are required')
+    version = raw.get('version')
+    if version is not None and (isinstance(version, bool) or not isinstance(version, int) or version < 0):
+        raise SyncError('version must be a whole number (0 when no record was seen)')
+    change['version'] = version
+    try:
+        ts = datetime.fromisoformat(str(raw['ts']).replace('Z', '+00:00'))
+    except (KeyError, ValueError):
+        raise SyncError('ts must be an ISO timestamp')
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    change['ts'] = min(ts, now)
+    return change
+
+
+def identity(change):
+    return (change['entity'],) + tuple(change[key] for key in ENTITIES[change['entity']].keys)
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), QUERY_CHUNK):
+        yield values[start:start + QUERY_CHUNK]
+
+
+def _existing_ids(model, ids):
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(row_id for row_id, in db.session.query(model.id).filter(model.id.in_(chunk)))
+    return found
+
+
+def _received(keys):
+    """{key: result} for keys already in sync_receipt."""
+    received = {}
+    for chunk in _chunks(keys):
+        received.update(db.session.query(SyncReceipt.key, SyncReceipt.result).filter(SyncReceipt.key.in_(chunk)))
+    return received
+
+
+def _load_records(name, changes):
+    """{identity: record} for the roster entries the changes touch, one query per chunk."""
+    entity = ENTITIES[name]
+    model = entity.model
+    wanted = {identity(c) for c in changes}
+    records = {}
+    for chunk in _chunks({c['topic_id'] for c in changes}):
+        query = model.query.filter(model.topic_id.in_(chunk),
+                                   model.student_id.in_({c['student_id'] for c in changes}))
+        if 'date' in entity.keys:
+            query = query.filter(model.date.in_({c['date'] for c in changes}))
+        for record in query.order_by(model.id):
+            key = (name,) + tuple(getattr(record, k) for k in entity.keys)
+            if key in wanted:
+                records.setdefault(key, record)  # the roster has no unique key; use the oldest row
+    return records
+
+
+def _conflicts(record, change):
+    """True when the record moved past the version the change was made against."""
+    try:
+        check_version(record, change['version'], lambda r: r.status, change['status'])
+    except VersionConflict:
+        return True
+    return False
+
+
+def _state(record):
+    if record is None:
+        return {'status': None, 'version': 0, 'updated_at': None}
+    return {
+        'status': record.status,
+        'version': record.version,
+        'updated_at': record.updated_at.isoformat() + 'Z' if record.updated_at else None,
+    }
+
+
+def apply_changes(raw_changes):
+    """Apply one batch in a single transaction; returns the per-change results."""
+    now = utcnow()
+    results = [None] * len(raw_changes)
+    valid = []
+    for i, raw in enumerate(raw_changes):
+        try:
+            valid.append((i, parse_change(raw, now)))
+        except SyncError as e:
+            results[i] = {'key': raw.get('key') if isinstance(raw, dict) else None, 'result': 'invalid', 'error': str(e)}
+
+    students = _existing_ids(Student, {c['student_id'] for _, c in valid})
+    topics = _existing_ids(Topic, {c['topic_id'] for _, c in valid})
+    known = []
+    for i, change in valid:
+        if change['student_id'] not in students or change['topic_id'] not in topics:
+            results[i] = {'key': change['key'], 'result': 'invalid', 'error': 'Unknown student or topic'}
+            continue
+        try:
+            if 'date' in change:
+                check_not_archived(change['topic_id'], change['date'])
+        except ArchiveError as e:
+            results[i] = {'key': change['key'], 'result': 'invalid', 'error': str(e)}
+            continue
+        known.append((i, change))
+
+    received = _received({c['key'] for _, c in known})
+    records = {}
+    for name in ENTITIES:
+        changes = [c for _, c in known if c['entity'] == name]
+        if changes:
+            records.update(_load_records(name, changes))
+
+    # Last writer wins, within the batch first: the newest change per record
+    fresh, seen = [], set()
+    for i, change in known:
+        if change['key'] in received or change['key'] in seen:
+            results[i] = {'key': change['key'], 'result': 'duplicate'}
+        else:
+            seen.add(change['key'])
+            fresh.append((i, change))
+    winners = {}
+    for i, change in fresh:
+        current = winners.get(identity(change))
+        if current is None or change['ts'] >= current[1]['ts']:
+            winners[identity(change)] = (i, change)
+
+    for i, change in fresh:
+        key = identity(change)
+        record = records.get(key)
+        if winners[key][0] != i or (change['version'] is None and record is not None and record.updated_at
+                                    and record.updated_at > change['ts']):
+            results[i] = {'key': change['key'], 'result': 'stale'}
+        elif _conflicts(record, change):
+            results[i] = {'key': change['key'], 'result': 'conflict'}
+        elif record is None:
+            entity = ENTITIES[change['entity']]
+            record = entity.model(**{k: change[k] for k in entity.keys}, status=change['status'],
+                                  updated_at=change['ts'])
+            db.session.add(record)
+            records[key] = record
+            results[i] = {'key': change['key'], 'result': 'applied'}
+        else:
+            if record.status != change['status']:
+                record.status = change['status']
+            record.updated_at = change['ts']
+            results[i] = {'key': change['key'], 'result': 'applied'}
+        db.session.add(SyncReceipt(key=change['key'], result=results[i]['result'], received_at=now))
+
+    db.session.flush()
+    for i, change in known:
+        results[i].update(_state(records.get(identity(change))))
+    _purge_receipts(now)
+    db.session.commit()
+    return results
+
+
+def _purge_receipts(now):
+    """Forget idempotency keys older than SYNC_RECEIPT_DAYS, at most once per PURGE_INTERVAL_SECONDS."""
+    global _last_purge
+    if time.monotonic() - _last_purge < PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge = time.monotonic()
+    db.session.execute(delete(SyncReceipt).where(SyncReceipt.received_at < now - timedelta(days=SYNC_RECEIPT_DAYS)))
+
+
+def sync_api():
+    data = request.get_json(silent=True)
+    changes = data.get('changes') if isinstance(data, dict) else None
+    if not isinstance(changes, list):
+        return jsonify({'success': False, 'error': 'Expected {"changes": [...]}'}), 400
+    if len(changes) > MAX_BATCH:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH} changes per request'}), 400
+
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return jsonify({'success': True, 'results': apply_changes(changes)})
+        except (StaleDataError, IntegrityError):
+            # A concurrent write (or a concurrent retry of this batch) got in
+            # first; start over so it is seen as stale or duplicate
+            db.session.rollback()
+    return jsonify({'success': False, 'error': 'The roster is busy, please retry'}), 409
+
+
+def init_sync(app):
+    """Register the /api/sync endpoint."""
+    app.add_url_rule('/api/sync', 'sync_api', sync_api, methods=['POST'])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Copy the primary SQLite database onto the read-replica file.
+
+For testing DATABASE_READ_URL locally without a real replica: the app reads
+from the copy and writes to the primary, and this script plays the part of
+replication. It uses SQLite's online backup API, so it is safe to run while
+the app is serving requests.
+
+Usage:
+    python sync_replica.py                 # copy once
+    python sync_replica.py --interval 5    # copy every 5 seconds until Ctrl+C
+
+Paths default to the sqlite:/// URLs in DATABASE_URL (or instance/trainings.db)
+and DATABASE_READ_URL.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from sqlalchemy.engine import make_url
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def sqlite_path(url):
+    parsed = make_url(url)
+    if parsed.get_backend_name() != 'sqlite' or not parsed.database:
+        raise SystemExit(f"Not a SQLite file URL: {url}")
+    return parsed.database
+
+
+def sync_replica(primary, replica):
+    """Copy primary onto replica; returns the number of seconds it took"""
+    started = time.perf_counter()
+    source = sqlite3.connect(primary)
+    target = sqlite3.connect(replica)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy the primary SQLite database to the read replica')
+    parser.add_argument('--primary', help='Primary database file')
+    parser.add_argument('--replica', help='Replica database file')
+    parser.add_argument('--interval', type=float, help='Keep copying every N seconds')
+    args = parser.parse_args()
+
+    primary = args.primary or sqlite_path(
+        os.getenv('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'instance', 'trainings.db'))
+    replica = args.replica or (sqlite_path(os.environ['DATABASE_READ_URL']) if os.getenv('DATABASE_READ_URL') else None)
+    if not replica:
+        raise SystemExit("Set DATABASE_READ_URL or pass --replica")
+
+    while True:
+        elapsed = sync_replica(primary, replica)
+        print(f"✓ {primary} -> {replica} in {elapsed * 1000:.0f}ms")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
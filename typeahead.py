@@ -0,0 +1,177 @@
+"""
+Name typeahead backed by an in-process prefix index.
+
+Student, training and instructor names are normalized (case-folded, accents
+stripped) and every word of a name becomes a key in one sorted list, so a
+lookup is a bisect plus a short scan and never touches the database.
+
+- The index is built from the database when each worker starts (or on
+  first use, if the database could not be read then).
+- Commits that insert, rename or delete one of these rows update the index
+  in place through a commit listener.
+- A VersionTracker row lets each worker notice, within a few seconds, writes
+  committed by other workers and rebuild its copy.
+"""
+
+import bisect
+import threading
+import unicodedata
+
+from flask import request, jsonify
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import VersionTracker, on_commit
+from models import db, Student, Training, Instructor
+from replicas import primary_reads
+
+SOURCES = {
+    'student': Student,
+    'training': Training,
+    'instructor': Instructor,
+}
+KINDS_BY_MODEL = {model: kind for kind, model in SOURCES.items()}
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def normalize(value):
+    """Case-fold and strip accents so 'José' and 'jose' share a key."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+class PrefixIndex:
+    """Sorted (key, kind, id) entries with one key per word of each name."""
+
+    def __init__(self):
+        self.keys = []
+        self.names = {}  # (kind, id) -> display name
+        self.lock = threading.RLock()
+
+    def _keys_for(self, name):
+        words = normalize(name).split()
+        # The key starting at each word, so "qa" matches "Senior QA Engineer"
+        return {' '.join(words[i:]) for i in range(len(words))}
+
+    def load(self, entries):
+        """Replace the whole index with (kind, id, name) entries."""
+        keys, names = [], {}
+        for kind, ref_id, name in entries:
+            names[(kind, ref_id)] = name
+            keys.extend((key, kind, ref_id) for key in self._keys_for(name))
+        keys.sort()
+        with self.lock:
+            self.keys, self.names = keys, names
+
+    def remove(self, kind, ref_id):
+        with self.lock:
+            name = self.names.pop((kind, ref_id), None)
+            if name is None:
+                return
+            for key in self._keys_for(name):
+                entry = (key, kind, ref_id)
+                position = bisect.bisect_left(self.keys, entry)
+                if position < len(self.keys) and self.keys[position] == entry:
+                    del self.keys[position]
+
+    def add(self, kind, ref_id, name):
+        with self.lock:
+            self.remove(kind, ref_id)
+            self.names[(kind, ref_id)] = name
+            for key in self._keys_for(name):
+                bisect.insort(self.keys, (key, kind, ref_id))
+
+    def search(self, query, kinds, limit):
+        words = normalize(query).split()
+        if not words:
+            return []
+        first, rest = words[0], words[1:]
+        matches = {}
+        with self.lock:
+            position = bisect.bisect_left(self.keys, (first,))
+            while position < len(self.keys) and self.keys[position][0].startswith(first):
+                key, kind, ref_id = self.keys[position]
+                position += 1
+                if kind not in kinds or (kind, ref_id) in matches:
+                    continue
+                # Remaining words must each start a later word of the name
+                tail = key.split()[1:]
+                if all(any(word.startswith(term) for word in tail) for term in rest):
+                    name = self.names[(kind, ref_id)]
+                    starts_name = normalize(name).startswith(first)
+                    matches[(kind, ref_id)] = (not starts_name, normalize(name), kind, ref_id, name)
+        # Names that start with the query come first, then alphabetical
+        return [(kind, ref_id, name) for _, _, kind, ref_id, name in sorted(matches.values())[:limit]]
+
+
+index = PrefixIndex()
+tracker = VersionTracker('typeahead', SOURCES.values())
+_build_lock = threading.Lock()
+_built = False
+
+
+def build_index():
+    """(Re)load every name from the database."""
+    global _built
+    # Read the names from the primary too: a lagging replica would be stamped
+    # with the primary's version and never reloaded
+    with primary_reads():
+        version = tracker.read_version()
+        entries = []
+        for kind, model in SOURCES.items():
+            entries.extend((kind, ref_id, name) for ref_id, name in db.session.query(model.id, model.name))
+    index.load(entries)
+    tracker.mark_loaded(version)
+    _built = True
+
+
+def ensure_index():
+    """Build the index on first use and rebuild it when another worker wrote."""
+    if not _built or tracker.is_stale():
+        with _build_lock:
+            build_index()
+
+
+@on_commit
+def apply_changes(changes):
+    """Keep the index in step with this worker's own commits."""
+    global _built
+    if not _built:
+        return
+    for change in changes:
+        kind = KINDS_BY_MODEL.get(change.model)
+        if kind is None:
+            continue
+        if change.op == 'bulk':
+            _built = False  # unknown rows changed; rebuild on next use
+        elif change.op == 'delete':
+            index.remove(kind, change.values['id'])
+        else:
+            index.add(kind, change.values['id'], change.values['name'])
+
+
+def typeahead_api():
+    query = request.args.get('q', '')
+    kinds = [kind for kind in request.args.get('type', '').split(',') if kind] or list(SOURCES)
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+
+    if any(kind not in SOURCES for kind in kinds):
+        return jsonify({'success': False, 'error': f"type must be one of: {', '.join(SOURCES)}"}), 400
+
+    ensure_index()
+    results = [{'type': kind, 'id': ref_id, 'name': name}
+               for kind, ref_id, name in index.search(query, set(kinds), limit)]
+    return jsonify({'query': query, 'results': results})
+
+
+def init_typeahead(app):
+    """Register the /api/typeahead endpoint and build the index."""
+    app.add_url_rule('/api/typeahead', 'typeahead_api', typeahead_api)
+    with app.app_context():
+        try:
+            ensure_index()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.warning('Typeahead index not built at startup: %s', e)
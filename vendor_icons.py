@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Build the self-hosted icon sprite.
+
+Scans templates/ for icon('name') / icon('name', set='fa') calls and writes
+only those icons as <symbol>s into statics/icons/sprite.svg. Sources are the
+SVG folders shipped with the upstream packages:
+- feather-icons (npm): node_modules/feather-icons/dist/icons/
+- Font Awesome Free (npm @fortawesome/fontawesome-free or the
+  `fontawesomefree` wheel): svgs/solid/
+
+Run this whenever a template starts using a new icon, then run
+build_assets.py to fingerprint the sprite.
+
+Usage:
+    python vendor_icons.py --feather-dir DIR --fontawesome-dir DIR
+"""
+
+import argparse
+import os
+import re
+import sys
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+TEMPLATES_DIR = os.path.join(basedir, 'templates')
+SPRITE_PATH = os.path.join(basedir, 'statics', 'icons', 'sprite.svg')
+
+ICON_CALL_RE = re.compile(r"icon\(\s*'([a-z0-9-]+)'([^)]*)\)")
+SVG_RE = re.compile(r'<svg\b([^>]*)>(.*)</svg>', re.DOTALL)
+VIEWBOX_RE = re.compile(r'viewBox="([^"]+)"')
+
+# Font Awesome 5 names used in the templates -> their Font Awesome 6 file names
+FA_ALIASES = {
+    'map-marker-alt': 'location-dot',
+}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Build the subset icon sprite from upstream SVGs')
+    parser.add_argument('--feather-dir', required=True, help='Directory with feather icon SVGs')
+    parser.add_argument('--fontawesome-dir', required=True, help='Directory with Font Awesome solid SVGs')
+    return parser.parse_args()
+
+
+def find_used_icons():
+    """Return ({feather names}, {fa names}) referenced by the templates."""
+    feather, fontawesome = set(), set()
+    for template in os.listdir(TEMPLATES_DIR):
+        if not template.endswith('.html'):
+            continue
+        with open(os.path.join(TEMPLATES_DIR, template)) as f:
+            for name, rest in ICON_CALL_RE.findall(f.read()):
+                (fontawesome if "set='fa'" in rest else feather).add(name)
+    return feather, fontawesome
+
+
+def read_symbol(path, symbol_id):
+    """Turn one upstream SVG file into a <symbol> element."""
+    with open(path) as f:
+        match = SVG_RE.search(f.read())
+    if not match:
+        raise ValueError(f"Not an SVG file: {path}")
+    viewbox = VIEWBOX_RE.search(match.group(1))
+    body = re.sub(r'<!--.*?-->', '', match.group(2), flags=re.DOTALL).strip()
+    return f'  <symbol id="{symbol_id}" viewBox="{viewbox.group(1) if viewbox else "0 0 24 24"}">{body}</symbol>'
+
+
+def main():
+    args = parse_args()
+    feather, fontawesome = find_used_icons()
+
+    symbols = []
+    missing = []
+    for name in sorted(feather):
+        path = os.path.join(args.feather_dir, f'{name}.svg')
+        if os.path.exists(path):
+            symbols.append(read_symbol(path, f'feather-{name}'))
+        else:
+            missing.append(f'feather/{name}')
+    for name in sorted(fontawesome):
+        path = os.path.join(args.fontawesome_dir, f'{FA_ALIASES.get(name, name)}.svg')
+        if os.path.exists(path):
+            symbols.append(read_symbol(path, f'fa-{name}'))
+        else:
+            missing.append(f'fa/{name}')
+
+    if missing:
+        print(f"✗ Missing source SVGs: {', '.join(missing)}")
+        return 1
+
+    os.makedirs(os.path.dirname(SPRITE_PATH), exist_ok=True)
+    with open(SPRITE_PATH, 'w') as f:
+        f.write('<svg xmlns="http://www.w3.org/2000/svg">\n')
+        f.write('  <!-- Feather icons (MIT) and Font Awesome Free (CC BY 4.0); see LICENSE-* -->\n')
+        f.write('\n'.join(symbols) + '\n')
+        f.write('</svg>\n')
+
+    print(f"✓ Wrote {len(feather)} feather and {len(fontawesome)} Font Awesome icons to {os.path.relpath(SPRITE_PATH, basedir)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,13 +3,15 @@
 Knowledge Assessment Data Verification Script
 
 This script verifies the integrity of knowledge assessment data by:
-1. Checking for orphaned assessments (assessments with no matching skill)
+1. Checking for orphaned assessments (assessments whose skill is missing or inactive)
 2. Identifying active skills with no assessments
 3. Reporting data consistency issues
 """
 
-from app import app, db
-from models import KnowledgeSkill, KnowledgeAssessment, Student
+from config import create_db_app
+from models import db, KnowledgeSkill, KnowledgeAssessment, Student
+
+app = create_db_app()
 
 def verify_knowledge_data():
     """Verify knowledge assessment data integrity"""
@@ -33,8 +35,13 @@ def verify_knowledge_data():
         print(f"📊 Total Students: {len(all_students)}")
         print()
         
-        # Create a set of valid topics from active skills
-        valid_skills = {skill.topic for skill in active_skills}
+        # Assessments reference skills by id; valid ones point at an active skill
+        valid_skill_ids = {skill.id for skill in active_skills}
+        
+        # Assessment counts per skill in a single query
+        assessment_counts = dict(db.session.query(
+            KnowledgeAssessment.skill_id, db.func.count(KnowledgeAssessment.id)
+        ).group_by(KnowledgeAssessment.skill_id).all())
         
         # Check for orphaned assessments
         print("-" * 60)
@@ -43,7 +50,7 @@ def verify_knowledge_data():
         
         orphaned_assessments = []
         for assessment in all_assessments:
-            if assessment.topic not in valid_skills:
+            if assessment.skill_id not in valid_skill_ids:
                 orphaned_assessments.append(assessment)
         
         if orphaned_assessments:
@@ -54,7 +61,7 @@ def verify_knowledge_data():
                 student_name = student.name if student else "Unknown Student"
                 print(f"  • ID: {assessment.id}")
                 print(f"    Student: {student_name} (ID: {assessment.student_id})")
-                print(f"    Topic: {assessment.topic}")
+                print(f"    Skill: {assessment.topic or 'Missing'} (ID: {assessment.skill_id})")
                 print(f"    Proficiency: {assessment.proficiency_level}")
                 print()
         else:
@@ -68,19 +75,14 @@ def verify_knowledge_data():
         
         skills_without_assessments = []
         for skill in active_skills:
-            assessment_count = KnowledgeAssessment.query.filter_by(
-                topic=skill.topic
-            ).count()
-            
-            if assessment_count == 0:
+            if assessment_counts.get(skill.id, 0) == 0:
                 skills_without_assessments.append(skill)
         
         if skills_without_assessments:
             print(f"ℹ️  Found {len(skills_without_assessments)} skill(s) with no assessments:")
             print()
             for skill in skills_without_assessments:
-                print(f"  • Category: {skill.category}")
-                print(f"    Topic: {skill.topic}")
+                print(f"  • Topic: {skill.topic} (ID: {skill.id})")
                 print()
         else:
             print("✅ All active skills have at least one assessment!")
@@ -92,11 +94,8 @@ def verify_knowledge_data():
         print("-" * 60)
         
         for skill in active_skills:
-            assessment_count = KnowledgeAssessment.query.filter_by(
-                topic=skill.topic
-            ).count()
             print(f"\n📌 {skill.topic}")
-            print(f"   Assessments: {assessment_count}")
+            print(f"   Assessments: {assessment_counts.get(skill.id, 0)}")
         
         print()
         print("=" * 60)